@@ -0,0 +1 @@
+"""Microbenchmarks for Mineboard hot paths."""
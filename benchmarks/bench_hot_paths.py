@@ -0,0 +1,225 @@
+"""Benchmark the RCON, service and route paths Mineboard runs hottest.
+
+Runs against a ``FakeRconServer`` and a throwaway SQLite database, so it
+needs neither a Minecraft server nor an existing install. From the
+repository root::
+
+    python -m benchmarks.bench_hot_paths
+    python -m benchmarks.bench_hot_paths --json results.json
+    python -m benchmarks.bench_hot_paths --baseline results.json
+
+``--json`` writes every result (mean/p50/p95/max latency and ops/s) with
+the run parameters, so numbers can be kept per release; ``--baseline``
+prints the change against such a file and flags regressions.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.rcon_fake import FakeRconServer
+
+PASSWORD = "bench"
+PLAYER = "Steve"
+
+
+def measure(name, fn, iterations, warmup=3):
+    """Time ``fn`` over ``iterations`` calls and return a result dict."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "mean_ms": round(1000 * total / iterations, 4),
+        "p50_ms": round(1000 * statistics.median(samples), 4),
+        "p95_ms": round(1000 * samples[min(iterations - 1, int(iterations * 0.95))], 4),
+        "max_ms": round(1000 * samples[-1], 4),
+        "ops_per_sec": round(iterations / total, 1) if total else None,
+    }
+
+
+def seed_database(db, user_id, args):
+    """Fill the temporary database with realistic per-tenant data."""
+    from src.services.item_service import ITEM_INDEX
+
+    rng = random.Random(42)
+    items = list(ITEM_INDEX)
+    db.executemany(
+        "INSERT OR REPLACE INTO item_usage (item, user_id, used_count) VALUES (?, ?, ?)",
+        [(item, user_id, rng.randint(1, 500)) for item in rng.sample(items, min(len(items), args.items))],
+    )
+    db.executemany(
+        "INSERT OR REPLACE INTO locations (id, user_id, name, icon, description, x, y, z) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (f"loc-{i}", user_id, f"Location {i}", "map-marker-alt", "Benchmark location",
+             rng.randint(-5000, 5000), rng.randint(-60, 300), rng.randint(-5000, 5000))
+            for i in range(args.locations)
+        ],
+    )
+
+    # Chat: a population of users, one group with everyone, and a message history
+    db.executemany(
+        "INSERT INTO users (username, password_hash, role, gamer_tag) VALUES (?, ?, 'user', ?)",
+        [(f"user{i}", "x", f"Gamer{i}") for i in range(args.users)],
+    )
+    user_ids = [row[0] for row in db.execute("SELECT id FROM users").fetchall()]
+    group_id = db.execute("INSERT INTO chat_groups (name, created_by) VALUES ('Everyone', ?)", (user_id,)).lastrowid
+    db.executemany(
+        "INSERT INTO group_members (group_id, user_id, last_read_at) VALUES (?, ?, ?)",
+        [(group_id, uid, "2000-01-01 00:00:00") for uid in user_ids],
+    )
+    peer = user_ids[-1]
+    start = datetime.now(timezone.utc) - timedelta(days=30)
+    messages = []
+    for i in range(args.messages):
+        timestamp = (start + timedelta(seconds=i * 30)).strftime("%Y-%m-%d %H:%M:%S")
+        kind = i % 3
+        if kind == 0:
+            # Part of the benchmarked conversation
+            sender, recipient = (user_id, peer) if i % 2 else (peer, user_id)
+            messages.append((sender, recipient, None, f"message {i}", timestamp, i % 5 == 0))
+        elif kind == 1:
+            messages.append((rng.choice(user_ids), None, group_id, f"group message {i}", timestamp, 0))
+        else:
+            sender, recipient = rng.sample(user_ids, 2)
+            messages.append((sender, recipient, None, f"message {i}", timestamp, 0))
+    db.executemany(
+        "INSERT INTO messages (sender_id, recipient_id, group_id, content, timestamp, read) VALUES (?, ?, ?, ?, ?, ?)",
+        messages,
+    )
+    db.commit()
+    return peer, group_id
+
+
+def run_benchmarks(args):
+    workdir = tempfile.mkdtemp(prefix="mineboard-bench-")
+    # The database module reads DB_PATH at import time
+    os.environ["DB_PATH"] = os.path.join(workdir, "data.db")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import app
+    from src.database import get_db
+    from src.rcon_client import run_command
+    from src.services.config_service import save_rcon_config
+    from src.services.item_service import build_item_catalog
+    from src.services.location_service import fetch_locations
+    from src.services.player_service import get_player_stats
+    from src.config_loader import get_kits
+
+    players = {f"Player{i}": {} for i in range(args.players - 1)}
+    players[PLAYER] = {}
+    server = FakeRconServer(password=PASSWORD, players=players, latency=args.latency)
+    host, port = server.address
+    results = []
+
+    with server, contextlib.redirect_stdout(io.StringIO()):
+        # Routes print progress; keep it out of the report
+        with app.app_context():
+            user_id = 1
+            save_rcon_config(user_id, host, port, PASSWORD)
+            peer, group_id = seed_database(get_db(), user_id, args)
+
+            results.append(measure("rcon.run_command", lambda: run_command("list", user_id), args.iterations))
+            results.append(measure("player.get_player_stats", lambda: get_player_stats(PLAYER, user_id), args.iterations))
+            results.append(measure("item.build_item_catalog", lambda: build_item_catalog(user_id), args.iterations))
+            results.append(measure("location.fetch_locations", lambda: fetch_locations(user_id), args.iterations))
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+            session["_fresh"] = True
+
+        def get(path):
+            def call():
+                response = client.get(path)
+                if response.status_code != 200:
+                    raise RuntimeError(f"GET {path} returned {response.status_code}")
+            return call
+
+        kit_id = get_kits().get("kits", [{}])[0].get("id")
+
+        def give_kit():
+            response = client.post(f"/kit/{kit_id}", data={"player": PLAYER})
+            if not response.get_json().get("success"):
+                raise RuntimeError(f"Kit {kit_id} failed: {response.get_data(as_text=True)}")
+
+        if kit_id:
+            results.append(measure("route.give_kit", give_kit, args.iterations))
+        results.append(measure("chat.get_messages.dm", get(f"/api/chat/messages?target_id={peer}"), args.iterations))
+        results.append(measure("chat.get_messages.group",
+                               get(f"/api/chat/messages?target_id={group_id}&is_group=true"), args.iterations))
+        results.append(measure("chat.get_unread_count", get("/api/chat/unread-count"), args.iterations))
+        results.append(measure("route.dashboard", get("/"), args.iterations))
+
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\n{'benchmark':<28} {'baseline p50':>13} {'p50':>10} {'change':>8}")
+    for result in results:
+        before = baseline.get(result["name"])
+        if not before or not before["p50_ms"]:
+            continue
+        change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"]
+        flag = "  REGRESSION" if change > threshold else ""
+        regressions += bool(flag)
+        print(f"{result['name']:<28} {before['p50_ms']:>13.3f} {result['p50_ms']:>10.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Mineboard hot paths")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake RCON latency per command, seconds")
+    parser.add_argument("--players", type=int, default=20, help="online players on the fake server")
+    parser.add_argument("--items", type=int, default=150, help="items with usage history")
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against an earlier --json file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown counted as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+
+    print(f"{'benchmark':<28} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'ops/s':>9}")
+    for r in results:
+        print(f"{r['name']:<28} {r['mean_ms']:>9.3f} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} "
+              f"{r['max_ms']:>9.3f} {r['ops_per_sec']:>9}")
+
+    if args.json:
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline and compare(results, args.baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
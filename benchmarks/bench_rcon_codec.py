@@ -0,0 +1,102 @@
+"""Compare the RCON packet decoder against the original implementation.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_rcon_codec
+
+For each response size this reports the time per packet and the memory
+blocks and bytes each decoded packet allocates, for the old
+``data += chunk`` / triple ``struct.unpack`` reader and for
+``PacketReader``. Allocations come from the difference between
+``tracemalloc`` snapshots taken before and after decoding ``PACKETS``
+packets whose results are kept, divided by ``PACKETS``. The reader and
+its preallocated buffer exist before the first snapshot, so only what
+decoding a packet leaves behind is counted; temporaries freed within a
+read, and small tuples CPython reuses from its free lists, show up in
+the time instead.
+"""
+import socket
+import struct
+import threading
+import time
+import tracemalloc
+
+from src.rcon_codec import SERVERDATA_RESPONSE_VALUE, PacketReader, encode_packet
+
+PACKETS = 2000
+
+
+class LegacyReader:
+    """The decoder ``RconClient`` used before the codec module existed."""
+
+    def __init__(self, sock):
+        self.socket = sock
+
+    def read_packet(self):
+        length_data = self._recv_exact(4)
+        length = struct.unpack('<i', length_data)[0]
+        packet_data = self._recv_exact(length)
+        request_id = struct.unpack('<i', packet_data[:4])[0]
+        packet_type = struct.unpack('<i', packet_data[4:8])[0]
+        payload = packet_data[8:-2]
+        return (request_id, payload, packet_type)
+
+    def _recv_exact(self, num_bytes):
+        data = b''
+        while len(data) < num_bytes:
+            chunk = self.socket.recv(num_bytes - len(data))
+            if not chunk:
+                raise Exception("Connection closed by server")
+            data += chunk
+        return data
+
+
+def _feed(sock, stream):
+    sock.sendall(stream)
+    sock.shutdown(socket.SHUT_WR)
+
+
+def measure(reader_cls, payload_size, trace):
+    """Decode ``PACKETS`` packets; return (seconds per packet, blocks and bytes allocated per packet)."""
+    stream = encode_packet(1, SERVERDATA_RESPONSE_VALUE, "x" * payload_size) * PACKETS
+    reader_sock, writer_sock = socket.socketpair()
+    writer_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    feeder = threading.Thread(target=_feed, args=(writer_sock, stream))
+    feeder.start()
+
+    reader = reader_cls(reader_sock)
+    packets = [None] * PACKETS   # kept, so what each packet allocates stays traced
+    if trace:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    for i in range(PACKETS):
+        packets[i] = reader.read_packet()
+    elapsed = time.perf_counter() - start
+    blocks = size = 0
+    if trace:
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        for stat in after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "filename"):
+            blocks += stat.count_diff
+            size += stat.size_diff
+
+    feeder.join()
+    reader_sock.close()
+    writer_sock.close()
+    return elapsed / PACKETS, blocks / PACKETS, size / PACKETS
+
+
+def main():
+    print(f"{'payload':>8} {'reader':>8} {'us/packet':>10} {'allocs/packet':>14} {'bytes/packet':>13}")
+    for payload_size in (0, 64, 1024, 4096):
+        for name, reader_cls in (("legacy", LegacyReader), ("codec", PacketReader)):
+            # Timing and tracing are separate runs so tracing overhead doesn't skew timings
+            per_packet, _, _ = measure(reader_cls, payload_size, trace=False)
+            _, blocks, size = measure(reader_cls, payload_size, trace=True)
+            print(f"{payload_size:>8} {name:>8} {per_packet * 1e6:>10.2f} {blocks:>14.2f} {size:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
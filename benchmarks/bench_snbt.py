@@ -0,0 +1,176 @@
+"""Compare the regex-to-JSON SNBT parser against a recursive-descent one.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_snbt
+
+For player dumps with growing inventories this reports the time per
+parse of ``src.snbt.parse`` and of ``DescentParser``, a straightforward
+parser that walks the text character by character in Python, and checks
+that both return the same value. Times are the best of ``REPEATS`` runs,
+as with ``timeit``, to keep other load on the machine out of the ratio.
+"""
+import re
+import time
+
+from src.snbt import parse
+from src.rcon_fake import Byte, default_player, to_snbt
+
+ROUNDS = 100
+REPEATS = 7
+
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?([bBsSlLfFdD]?)")
+_BARE = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.+-")
+
+
+class DescentParser:
+    """Recursive-descent SNBT parser with the same value mapping as ``src.snbt``."""
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def parse(self):
+        value = self.value()
+        self.skip_space()
+        if self.pos != len(self.text):
+            raise ValueError(f"Trailing data at {self.pos}")
+        return value
+
+    def skip_space(self):
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def expect(self, char):
+        self.skip_space()
+        if self.text[self.pos] != char:
+            raise ValueError(f"Expected {char!r} at {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        self.skip_space()
+        char = self.text[self.pos]
+        if char == "{":
+            return self.compound()
+        if char == "[":
+            return self.list()
+        if char in "\"'":
+            return self.quoted()
+        return self.scalar(self.bare())
+
+    def compound(self):
+        self.pos += 1
+        result = {}
+        self.skip_space()
+        if self.text[self.pos] == "}":
+            self.pos += 1
+            return result
+        while True:
+            self.skip_space()
+            key = self.quoted() if self.text[self.pos] in "\"'" else self.bare()
+            self.expect(":")
+            result[key] = self.value()
+            self.skip_space()
+            if self.text[self.pos] == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return result
+
+    def list(self):
+        self.pos += 1
+        self.skip_space()
+        if self.text[self.pos] in "BIL" and self.text[self.pos + 1:self.pos + 2] == ";":
+            self.pos += 2   # typed array; its elements are plain numbers
+        items = []
+        self.skip_space()
+        if self.text[self.pos] == "]":
+            self.pos += 1
+            return items
+        while True:
+            items.append(self.value())
+            self.skip_space()
+            if self.text[self.pos] == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return items
+
+    def quoted(self):
+        quote = self.text[self.pos]
+        self.pos += 1
+        chars = []
+        while True:
+            char = self.text[self.pos]
+            self.pos += 1
+            if char == "\\":
+                chars.append(self.text[self.pos])
+                self.pos += 1
+            elif char == quote:
+                return "".join(chars)
+            else:
+                chars.append(char)
+
+    def bare(self):
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos] in _BARE:
+            self.pos += 1
+        return self.text[start:self.pos]
+
+    def scalar(self, word):
+        number = _NUMBER.fullmatch(word)
+        if number is None:
+            return {"true": 1, "false": 0}.get(word, word)
+        suffix = number.group(1)
+        digits = word[:-1] if suffix else word
+        fractional = "." in digits or "e" in digits or "E" in digits
+        if suffix in ("f", "F", "d", "D") or (not suffix and fractional):
+            return float(digits)
+        if fractional:
+            return word
+        return int(digits)
+
+
+def player_dump(items):
+    """A ``data get entity`` body for a player carrying ``items`` enchanted stacks."""
+    player = default_player("Steve")
+    player["Inventory"] = [
+        {
+            "Slot": Byte(slot % 36),
+            "id": "minecraft:diamond_sword",
+            "count": 1,
+            "components": {
+                "minecraft:enchantments": {"levels": {"minecraft:sharpness": 5, "minecraft:unbreaking": 3}},
+                "minecraft:custom_name": f"'{{\"text\":\"Blade {slot}\"}}'",
+                "minecraft:damage": slot,
+            },
+        }
+        for slot in range(items)
+    ]
+    player["active_effects"] = [{"id": "minecraft:speed", "amplifier": Byte(1), "duration": 600}]
+    return to_snbt(player)
+
+
+def measure(fn, text):
+    fn(text)
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            fn(text)
+        best = min(best, (time.perf_counter() - start) / ROUNDS)
+    return best
+
+
+def main():
+    print(f"{'items':>6} {'bytes':>7} {'regex us':>9} {'descent us':>11} {'speed-up':>9}")
+    for items in (0, 9, 36, 72):
+        text = player_dump(items)
+        assert parse(text) == DescentParser(text).parse()
+        fast = measure(parse, text)
+        slow = measure(lambda t: DescentParser(t).parse(), text)
+        print(f"{items:>6} {len(text):>7} {fast * 1e6:>9.1f} {slow * 1e6:>11.1f} {slow / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Reader for Anvil region files (``region/r.<x>.<z>.mca``).
+
+A region holds 32x32 chunks. Its first 4 KiB is a table of chunk
+locations (sector offset and count), the next 4 KiB a table of each
+chunk's last-save timestamp, and each chunk is a length-prefixed,
+compressed NBT document. Files are memory-mapped, so reading the
+timestamp table or one chunk touches only those pages; nothing else of
+the file is read or decompressed.
+"""
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.nbt import NbtError, read_nbt
+
+SECTOR = 4096
+CHUNKS = 32
+
+COMPRESSION_GZIP = 1
+COMPRESSION_ZLIB = 2
+COMPRESSION_NONE = 3
+COMPRESSION_LZ4 = 4
+# Set on the compression byte when the chunk is stored in a separate c.<x>.<z>.mcc file
+COMPRESSION_EXTERNAL = 128
+
+_REGION_NAME = re.compile(r"r\.(-?\d+)\.(-?\d+)\.mca$")
+_CHUNK_HEADER = struct.Struct(">iB")
+_TIMESTAMPS = struct.Struct(f">{CHUNKS * CHUNKS}i")
+
+
+class RegionFile:
+    """One memory-mapped ``.mca`` file; chunk coordinates are local (0-31)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        match = _REGION_NAME.search(os.path.basename(path))
+        self.region_x, self.region_z = (int(match.group(1)), int(match.group(2))) if match else (0, 0)
+        stat = os.stat(path)
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self._file = open(path, "rb")
+        # Regions being created can be shorter than their header
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size >= 2 * SECTOR else None
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def timestamps(self) -> List[int]:
+        """Last-save time of every chunk (index ``z * 32 + x``), 0 where absent."""
+        if self._map is None:
+            return [0] * (CHUNKS * CHUNKS)
+        return list(_TIMESTAMPS.unpack_from(self._map, SECTOR))
+
+    def chunk_bytes(self, x: int, z: int) -> Optional[bytes]:
+        """Decompressed NBT of one chunk, or None if it was never generated."""
+        if self._map is None:
+            return None
+        entry = struct.unpack_from(">I", self._map, 4 * (z * CHUNKS + x))[0]
+        offset, sectors = (entry >> 8) * SECTOR, entry & 0xFF
+        if not offset or not sectors or offset + _CHUNK_HEADER.size > len(self._map):
+            return None
+        length, compression = _CHUNK_HEADER.unpack_from(self._map, offset)
+        if compression & COMPRESSION_EXTERNAL:
+            external = os.path.join(
+                os.path.dirname(self.path),
+                f"c.{self.region_x * CHUNKS + x}.{self.region_z * CHUNKS + z}.mcc",
+            )
+            with open(external, "rb") as f:
+                payload = f.read()
+            compression &= ~COMPRESSION_EXTERNAL
+        else:
+            start = offset + _CHUNK_HEADER.size
+            payload = self._map[start:start + length - 1]
+        if compression == COMPRESSION_ZLIB:
+            return zlib.decompress(payload)
+        if compression == COMPRESSION_GZIP:
+            return zlib.decompress(payload, 16 + zlib.MAX_WBITS)
+        if compression == COMPRESSION_NONE:
+            return bytes(payload)
+        # LZ4 (opt-in since 1.20.5) needs a codec we do not ship
+        return None
+
+    def read_chunk(self, x: int, z: int, tags: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """One chunk's NBT (only ``tags`` of it, see ``read_nbt``), or None if absent or unreadable."""
+        try:
+            data = self.chunk_bytes(x, z)
+            return read_nbt(data, tags) if data is not None else None
+        except (OSError, zlib.error, NbtError):
+            return None
+
+
+class RegionCache:
+    """Open ``RegionFile`` objects, reopened when the file changes on disk."""
+
+    def __init__(self, max_open: int = 32):
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._regions: "OrderedDict[str, RegionFile]" = OrderedDict()
+
+    def get(self, path: str) -> Optional[RegionFile]:
+        """The region at ``path``, or None if it does not exist."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            region = self._regions.get(path)
+            if region is not None and region.version == (stat.st_mtime_ns, stat.st_size):
+                self._regions.move_to_end(path)
+                return region
+            if region is not None:
+                # Readers still holding the old map keep it alive until they finish
+                del self._regions[path]
+            try:
+                region = RegionFile(path)
+            except (OSError, ValueError):
+                return None
+            self._regions[path] = region
+            while len(self._regions) > self.max_open:
+                self._regions.popitem(last=False)
+            return region
@@ -0,0 +1,444 @@
+"""Asyncio RCON client.
+
+Shares the packet codec and response reassembly with the blocking
+``RconClient`` but runs on asyncio streams, so one event loop can talk to
+hundreds of tenant servers without tying up a worker per slow server.
+
+``run_commands`` takes the same route as ``rcon_client.run_commands``:
+the response cache, the per-server circuit breakers, the rate limits and
+the adaptive timeouts are shared with the blocking client, and
+authenticated connections are reused from a per-loop pool that follows
+the blocking pool's limits and invalidations. It takes no scheduler
+slot: slots bound worker threads, and a coroutine waiting on a slow
+server holds none.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from src import rcon_client
+from src.rcon_client import _expand_commands, _format_rcon_error, _is_unreachable, _merge_responses
+from src.rcon_codec import (
+    LENGTH,
+    MAX_PACKET_LENGTH,
+    SERVERDATA_AUTH,
+    SERVERDATA_EXECCOMMAND,
+    SERVERDATA_RESPONSE_VALUE,
+    ResponseCollector,
+    append_packet,
+    decode_packet,
+    encode_packet,
+)
+from src.rcon_ratelimit import RateLimited
+from src.rcon_timeouts import COMMAND, CONNECT
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRconClient:
+    """RCON client built on asyncio streams.
+
+    ``timeout`` is the default for each call; ``connect`` and ``commands``
+    accept a per-call override. A connection that times out mid-response
+    is closed, since its stream can no longer be trusted.
+    """
+
+    def __init__(self, host: str, password: str, port: int = 25575, timeout: float = 10):
+        self.host = host
+        self.password = password
+        self.port = port
+        self.timeout = timeout
+        self.request_id = 0
+        self.pool_generation = None
+        # Seconds the last connect() took, until the caller has recorded it
+        self.connect_rtt = None
+        # Seconds from the first command of the last batch going out to its first reply
+        self.first_reply_rtt = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        # One batch at a time may use the stream
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    async def connect(self, timeout: Optional[float] = None):
+        """Open the connection and authenticate."""
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._connect(), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise Exception("Connection timeout")
+        except Exception:
+            await self.close()
+            raise
+        self.connect_rtt = time.monotonic() - started
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(encode_packet(self._next_request_id(), SERVERDATA_AUTH, self.password))
+        await self._writer.drain()
+
+        response = await self._read_packet()
+        if response[2] == SERVERDATA_RESPONSE_VALUE:
+            # Some servers send an empty response value ahead of the auth result
+            response = await self._read_packet()
+        if response[0] == -1:
+            raise Exception("Authentication failed - invalid password")
+
+        logger.debug(f"Connected and authenticated to {self.host}:{self.port}")
+
+    async def command(self, cmd: str, timeout: Optional[float] = None) -> str:
+        """Send a command and return the (reassembled) response."""
+        return (await self.commands([cmd], timeout=timeout))[0]
+
+    async def commands(self, cmds: List[str], timeout: Optional[float] = None, window: int = 32,
+                       responses: Optional[List[Optional[str]]] = None) -> List[Optional[str]]:
+        """Pipeline several commands and return responses in order.
+
+        ``timeout`` bounds the whole batch. Responses are written into
+        ``responses`` as they arrive, so a caller that passes its own list
+        keeps the replies received before a failure.
+        """
+        if not self._writer:
+            raise Exception("Not connected")
+        if responses is None:
+            responses = [None] * len(cmds)
+
+        async with self._lock:
+            try:
+                await asyncio.wait_for(self._pipeline(cmds, window, responses),
+                                       self.timeout if timeout is None else timeout)
+            except asyncio.TimeoutError:
+                await self.close()
+                raise Exception("Command timeout")
+            except Exception:
+                await self.close()
+                raise
+        return responses
+
+    async def _pipeline(self, cmds: List[str], window: int, responses: List[Optional[str]]):
+        self.first_reply_rtt = None
+        collector = ResponseCollector()
+        next_index = 0
+        started = time.monotonic()
+        while next_index < len(cmds) or collector.pending:
+            batch = bytearray()
+            while next_index < len(cmds) and collector.pending < window:
+                command_id = self._next_request_id()
+                append_packet(batch, command_id, SERVERDATA_EXECCOMMAND, cmds[next_index])
+                sentinel_id = self._next_request_id()
+                append_packet(batch, sentinel_id, SERVERDATA_RESPONSE_VALUE, "")
+                collector.expect(command_id, sentinel_id, next_index)
+                next_index += 1
+            if batch:
+                self._writer.write(batch)
+                await self._writer.drain()
+
+            request_id, payload, _ = await self._read_packet()
+            completed = collector.feed(request_id, payload)
+            if completed:
+                if self.first_reply_rtt is None:
+                    self.first_reply_rtt = time.monotonic() - started
+                index, response = completed
+                responses[index] = response
+
+    def is_alive(self) -> bool:
+        """Cheap liveness check for an idle connection: not closed by either side."""
+        return (self._writer is not None and not self._writer.is_closing()
+                and not self._reader.at_eof())
+
+    async def close(self):
+        """Close the connection."""
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _next_request_id(self) -> int:
+        self.request_id += 1
+        return self.request_id
+
+    async def _read_packet(self):
+        try:
+            length = LENGTH.unpack(await self._reader.readexactly(4))[0]
+            if length < 10 or length > MAX_PACKET_LENGTH:
+                raise Exception(f"Invalid RCON packet length {length}")
+            return decode_packet(await self._reader.readexactly(length))
+        except asyncio.IncompleteReadError:
+            raise Exception("Connection closed by server")
+
+
+class AsyncRconPool:
+    """Authenticated ``AsyncRconClient`` connections for one event loop.
+
+    Mirrors ``RconConnectionPool``: keyed by ``(host, port, password)``, at
+    most ``max_per_server`` checked out per key, idle ones closed after
+    ``idle_timeout`` seconds. Clients are tagged with the blocking pool's
+    generation for their key, so ``reset_rcon_client`` retires them too.
+    """
+
+    def __init__(self, max_per_server: int = 4, idle_timeout: float = 60.0):
+        self.max_per_server = max_per_server
+        self.idle_timeout = idle_timeout
+        self._slots: Dict[tuple, asyncio.Semaphore] = {}
+        self._idle: Dict[tuple, deque] = {}   # key -> deque of (client, last_used)
+
+    async def acquire(self, host: str, port: int, password: str, timeout: float = 10,
+                      user_id: Optional[int] = None,
+                      connect_timeout: Optional[float] = None) -> AsyncRconClient:
+        """Check out a connected client, reusing an idle one when possible.
+
+        ``timeout`` bounds the wait for a free connection; a new connection
+        is opened with ``connect_timeout`` (default: ``timeout``).
+        """
+        key = (host, port, password)
+        generation = rcon_client._pool.checkout_generation(key, user_id)
+        slots = self._slots.setdefault(key, asyncio.Semaphore(self.max_per_server))
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise Exception("Connection pool exhausted - timeout waiting for a free connection")
+
+        try:
+            idle = self._idle.get(key)
+            cutoff = time.monotonic() - self.idle_timeout
+            # Oldest connections sit at the left of the deque
+            while idle and idle[0][1] < cutoff:
+                await idle.popleft()[0].close()
+            while idle:
+                client, _ = idle.pop()
+                if client.pool_generation == generation and client.is_alive():
+                    return client
+                await client.close()
+
+            client = AsyncRconClient(host, password, port=port, timeout=connect_timeout or timeout)
+            client.pool_generation = generation
+            await client.connect()
+            return client
+        except BaseException:
+            slots.release()
+            raise
+
+    async def release(self, client: AsyncRconClient, discard: bool = False):
+        """Return a client to the pool, or close it if it is no longer usable."""
+        key = (client.host, client.port, client.password)
+        stale = client.pool_generation != rcon_client._pool.checkout_generation(key)
+        if discard or stale or not client.connected:
+            await client.close()
+        else:
+            self._idle.setdefault(key, deque()).append((client, time.monotonic()))
+        self._slots[key].release()
+
+    async def close_all(self):
+        """Close every idle connection."""
+        idle, self._idle = self._idle, {}
+        for clients in idle.values():
+            for client, _ in clients:
+                await client.close()
+
+
+# Event loop -> its pool; streams cannot be used from another loop
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncRconPool]" = weakref.WeakKeyDictionary()
+_pools_lock = threading.Lock()
+
+
+def _loop_pool() -> AsyncRconPool:
+    loop = asyncio.get_running_loop()
+    with _pools_lock:
+        pool = _pools.get(loop)
+        if pool is None:
+            pool = _pools[loop] = AsyncRconPool(rcon_client._pool.max_per_server,
+                                                rcon_client._pool.idle_timeout)
+        return pool
+
+
+async def run_command(cfg: Dict[str, Any], command: str, timeout: Optional[float] = None) -> str:
+    """Execute one command against the server described by ``cfg``.
+
+    ``cfg`` is a dict as returned by ``get_rcon_config``. Errors are
+    returned as ``"Error: ..."`` strings, like the blocking ``run_command``.
+    """
+    return (await run_commands(cfg, [command], timeout=timeout))[0]
+
+
+async def run_commands(cfg: Dict[str, Any], commands: List[str],
+                       timeout: Optional[float] = None) -> List[str]:
+    """Pipeline several commands over one pooled connection; see ``rcon_client.run_commands``.
+
+    ``timeout`` bounds the connect and the whole batch; by default both
+    use the server's adaptive timeouts.
+    """
+    if not commands:
+        return []
+
+    results, owners, packets = _expand_commands(commands)
+    responses: List[Optional[str]] = [None] * len(packets)
+    error = await _dispatch(cfg, packets, responses, timeout) if packets else None
+    return _merge_responses(results, owners, responses, error)
+
+
+async def _dispatch(cfg: Dict[str, Any], packets: List[str], responses: List[Optional[str]],
+                    timeout: Optional[float]) -> Optional[str]:
+    """Answer a batch from the shared response cache where possible and run the rest."""
+    user_id = cfg.get("user_id")
+    if cfg.get("generation") is not None and rcon_client._pool.note_config_generation(user_id, cfg["generation"]):
+        # Credentials changed; drop sockets opened with the old ones
+        rcon_client.reset_rcon_client(user_id)
+
+    server = (cfg["host"], cfg["port"], cfg["password"])
+    generation = rcon_client._cache.generation(server)
+    live = rcon_client._from_cache(server, packets, responses)
+    if not live:
+        return None
+
+    batch = [packets[position] for position in live]
+    batch_responses: List[Optional[str]] = [None] * len(batch)
+    error = await _admit(cfg, batch, batch_responses, user_id, timeout)
+    rcon_client._to_cache(server, packets, live, batch_responses, responses, generation)
+    return error
+
+
+async def _admit(cfg: Dict[str, Any], packets: List[str], responses: List[Optional[str]],
+                 user_id: Optional[int], timeout: Optional[float]) -> Optional[str]:
+    """Admit a batch past the circuit breaker and rate limits, then execute it."""
+    server = (cfg["host"], cfg["port"])
+
+    # Fail fast while the server is known to be unreachable
+    error = rcon_client._breakers.before_call(server)
+    if error:
+        return error
+
+    try:
+        wait = rcon_client._rate_limiter.reserve(server, user_id, packets)
+    except RateLimited as e:
+        rcon_client._breakers.cancel_trial(server)
+        return _format_rcon_error(e)
+    if wait:
+        await asyncio.sleep(wait)
+    return await _execute(cfg, packets, responses, user_id, timeout)
+
+
+async def _execute(cfg: Dict[str, Any], packets: List[str], responses: List[Optional[str]],
+                   user_id: Optional[int], timeout: Optional[float]) -> Optional[str]:
+    """Pipeline packets over a pooled connection and record the outcome."""
+    server = (cfg["host"], cfg["port"])
+    timeouts = rcon_client._timeouts
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    def budget(estimate: float) -> float:
+        return estimate if deadline is None else max(0.0, deadline - time.monotonic())
+
+    pool = _loop_pool()
+    client = None
+    discard = True
+    try:
+        client = await pool.acquire(cfg["host"], cfg["port"], cfg["password"], timeout=budget(10),
+                                    user_id=user_id, connect_timeout=budget(timeouts.connect_timeout(server)))
+        if client.connect_rtt is not None:
+            timeouts.record(server, CONNECT, client.connect_rtt)
+            client.connect_rtt = None
+
+        logger.debug(f"Executing batch of {len(packets)} commands")
+        await client.commands(packets, timeout=budget(timeouts.command_timeout(server, packets)),
+                              responses=responses)
+        # Slow families would skew the estimate, so they are not sampled
+        if client.first_reply_rtt is not None and not timeouts.is_slow(packets):
+            timeouts.record(server, COMMAND, client.first_reply_rtt)
+        discard = False
+        rcon_client._breakers.record_success(server)
+        return None
+
+    except Exception as e:
+        error = _format_rcon_error(e)
+        if str(e) in ("Connection timeout", "Command timeout"):
+            timeouts.record_timeout(server)
+        if _is_unreachable(e):
+            rcon_client._breakers.record_failure(server, error)
+        else:
+            # The server answered, even if the command or login failed
+            rcon_client._breakers.record_success(server)
+        return error
+
+    finally:
+        if client:
+            await pool.release(client, discard=discard)
+
+
+async def run_on_servers(cfgs: Iterable[Dict[str, Any]], command: str, timeout: Optional[float] = None,
+                         concurrency: int = 200) -> List[str]:
+    """Run the same command on many servers concurrently.
+
+    At most ``concurrency`` connections are open at once. A slow or dead
+    server only costs its own ``timeout``, not a worker.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(cfg):
+        async with semaphore:
+            return await run_command(cfg, command, timeout=timeout)
+
+    return await asyncio.gather(*(limited(cfg) for cfg in cfgs))
+
+
+class _LoopThread:
+    """Event loop on a daemon thread, started on first use."""
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def submit(self, coro, timeout: Optional[float] = None):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="rcon-async", daemon=True).start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+
+_loop_thread = _LoopThread()
+
+
+def _forget_loop_thread():
+    # A forked child (gunicorn --preload) has none of the parent's threads,
+    # so the loop it started is not running there
+    global _loop_thread, _pools, _pools_lock
+    _loop_thread = _LoopThread()
+    _pools, _pools_lock = weakref.WeakKeyDictionary(), threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_loop_thread)
+
+
+def run_sync(coro, timeout: Optional[float] = 120):
+    """Bridge for blocking callers: run a coroutine on the shared RCON loop.
+
+    Gives up (and cancels the coroutine) after ``timeout`` seconds.
+    Example::
+
+        results = run_sync(run_on_servers(cfgs, "list", timeout=5))
+    """
+    return _loop_thread.submit(coro, timeout)
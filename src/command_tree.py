@@ -0,0 +1,174 @@
+"""Server command tree parsed from ``help`` output.
+
+Vanilla ``help`` prints one usage line per root command::
+
+    /give <targets> <item> [<count>]
+    /time (add|query|set)
+    /tell -> msg
+
+Over RCON the lines may arrive without separators between them. The
+parsed tree knows each root command, its aliases and the leading shape
+of its arguments, which is enough to reject typos and wrong
+subcommands locally and to complete command names and subcommand
+keywords. Anything it cannot judge (plugin commands, arguments after a
+free-form one) is let through for the server to decide.
+"""
+import difflib
+import re
+from typing import Dict, List, Optional, Tuple
+
+# A slash glued to the end of the previous usage line starts a new command
+_GLUED_LINE = re.compile(r"(?<=\S)/(?=[a-z][\w.-]*(?: |/|$))")
+_USAGE_LINE = re.compile(r"^/([a-z][\w.-]*)(?:\s+(.*))?$")
+
+# Argument kinds in a parsed usage
+LITERAL = "literal"
+ARGUMENT = "argument"
+OPTIONAL = "optional"
+
+_OPENERS = {"(": ")", "[": "]", "<": ">", "{": "}"}
+
+
+def split_top_level(text: str) -> List[str]:
+    """Split on spaces outside brackets and quotes (``@e[type=cow, limit=1]`` is one word)."""
+    words, current, stack, quote = [], [], [], None
+    for char in text:
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+            current.append(char)
+        elif char in _OPENERS:
+            stack.append(_OPENERS[char])
+            current.append(char)
+        elif stack and char == stack[-1]:
+            stack.pop()
+            current.append(char)
+        elif char == " " and not stack:
+            if current:
+                words.append("".join(current))
+                current = []
+        else:
+            current.append(char)
+    if current:
+        words.append("".join(current))
+    return words
+
+
+def _parse_usage(usage: str) -> List[Tuple[str, Optional[Tuple[str, ...]]]]:
+    """Usage text as ``(kind, literals)`` pairs; literals are set for keyword positions."""
+    parsed = []
+    for token in split_top_level(usage):
+        if token.startswith("["):
+            parsed.append((OPTIONAL, None))
+        elif token.startswith("(") and token.endswith(")"):
+            choices = tuple(choice.strip() for choice in token[1:-1].split("|"))
+            if all(choice and not choice.startswith(("<", "[", "(")) for choice in choices):
+                parsed.append((LITERAL, choices))
+            else:
+                parsed.append((ARGUMENT, None))
+        elif token.startswith("<"):
+            parsed.append((ARGUMENT, None))
+        else:
+            parsed.append((LITERAL, (token,)))
+    return parsed
+
+
+class CommandTree:
+    """Root commands, aliases and usages parsed from one server's ``help``."""
+
+    def __init__(self, usages: Dict[str, str], aliases: Dict[str, str]):
+        self.usages = usages
+        self.aliases = aliases
+        self._shapes = {name: _parse_usage(usage) for name, usage in usages.items()}
+
+    def __len__(self):
+        return len(self.usages)
+
+    def names(self) -> List[str]:
+        return sorted(set(self.usages) | set(self.aliases))
+
+    def resolve(self, name: str) -> Optional[str]:
+        name = self.aliases.get(name, name)
+        return name if name in self.usages else None
+
+    def usage(self, name: str) -> Optional[str]:
+        resolved = self.resolve(name)
+        if resolved is None:
+            return None
+        return f"/{name} {self.usages[resolved]}".rstrip()
+
+    def validate(self, command: str) -> Optional[str]:
+        """Why ``command`` would certainly fail, or None if it may be valid."""
+        words = split_top_level(command.strip().lstrip("/"))
+        if not words:
+            return "Command is empty"
+        name, args = words[0], words[1:]
+        if ":" in name:
+            return None   # namespaced plugin commands are not listed by vanilla help
+        resolved = self.resolve(name)
+        if resolved is None:
+            suggestion = difflib.get_close_matches(name, self.names(), n=1)
+            hint = f" Did you mean /{suggestion[0]}?" if suggestion else ""
+            return f"Unknown command /{name}.{hint}"
+
+        shape = self._shapes[resolved]
+        if not shape and args:
+            return f"/{name} takes no arguments"
+        required = 0
+        positional = True
+        for position, (kind, literals) in enumerate(shape):
+            if kind == OPTIONAL:
+                break
+            # Every required part takes at least one word
+            required += 1
+            if kind == ARGUMENT:
+                # Some arguments span several words (``~ ~ ~``), so later positions may shift
+                positional = False
+            elif positional and position < len(args) and args[position] not in literals:
+                return f"/{name} expects {' or '.join(literals)}, not {args[position]!r}"
+        if len(args) < required:
+            return f"Incomplete command, usage: {self.usage(name)}"
+
+        if resolved == "execute" and "run" in args:
+            return self.validate(" ".join(args[args.index("run") + 1:]))
+        return None
+
+    def complete(self, text: str, limit: int = 20) -> List[str]:
+        """Completions for a partially typed command, as full command lines."""
+        slash = "/" if text.startswith("/") else ""
+        words = text.lstrip("/").split(" ")
+        if len(words) == 1:
+            return [slash + name for name in self.names() if name.startswith(words[0])][:limit]
+
+        resolved = self.resolve(words[0])
+        if resolved is None:
+            return []
+        args, partial = words[1:-1], words[-1]
+        shape = self._shapes[resolved]
+        if len(args) >= len(shape):
+            return []
+        kind, literals = shape[len(args)]
+        if kind != LITERAL:
+            return []
+        prefix = slash + " ".join(words[:-1]) + " "
+        return [prefix + literal for literal in literals if literal.startswith(partial)][:limit]
+
+
+def parse_help(text: str) -> CommandTree:
+    """Build a ``CommandTree`` from ``help`` output, with or without line breaks."""
+    usages: Dict[str, str] = {}
+    aliases: Dict[str, str] = {}
+    for line in text.splitlines():
+        for entry in _GLUED_LINE.sub("\n/", line.strip()).splitlines():
+            match = _USAGE_LINE.match(entry.strip())
+            if not match:
+                continue
+            name, usage = match.group(1), (match.group(2) or "").strip()
+            if usage.startswith("->"):
+                aliases[name] = usage[2:].strip().lstrip("/")
+            else:
+                usages.setdefault(name, usage)
+    return CommandTree(usages, aliases)
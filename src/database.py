@@ -89,6 +89,70 @@ def init_db():
         """
     )
     
+    # Player inventory snapshots: a baseline, then deltas holding only changed slots
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS inventory_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            player TEXT NOT NULL,
+            baseline_id INTEGER,
+            digest TEXT NOT NULL,
+            taken_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS idx_inventory_snapshots_player ON inventory_snapshots (user_id, player, id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_inventory_snapshots_baseline ON inventory_snapshots (baseline_id)")
+
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS inventory_slots (
+            snapshot_id INTEGER NOT NULL,
+            container TEXT NOT NULL,
+            slot INTEGER NOT NULL,
+            item TEXT,
+            count INTEGER NOT NULL DEFAULT 0,
+            components TEXT,
+            PRIMARY KEY (snapshot_id, container, slot),
+            FOREIGN KEY (snapshot_id) REFERENCES inventory_snapshots(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """
+    )
+
+    # Player stats loaded from world/stats/<uuid>.json; files are re-read when mtime or size changes
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stats_files (
+            user_id INTEGER NOT NULL,
+            uuid TEXT NOT NULL,
+            name TEXT,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, uuid),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """
+    )
+
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS player_stats (
+            user_id INTEGER NOT NULL,
+            uuid TEXT NOT NULL,
+            category TEXT NOT NULL,
+            stat TEXT NOT NULL,
+            value INTEGER NOT NULL,
+            PRIMARY KEY (user_id, uuid, category, stat),
+            FOREIGN KEY (user_id, uuid) REFERENCES stats_files(user_id, uuid) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS idx_player_stats_rank ON player_stats (user_id, category, stat, value DESC)")
+
     # Create error logs table (per-user)
     db.execute(
         """
@@ -211,6 +275,18 @@ def init_db():
     except sqlite3.OperationalError:
         pass
         
+    # Check for missing game_port in rcon_config (migration)
+    try:
+        db.execute("ALTER TABLE rcon_config ADD COLUMN game_port INTEGER")
+    except sqlite3.OperationalError:
+        pass
+
+    # Check for missing server_dir in rcon_config (migration)
+    try:
+        db.execute("ALTER TABLE rcon_config ADD COLUMN server_dir TEXT")
+    except sqlite3.OperationalError:
+        pass
+
     # Check for missing image_url in chat_groups (migration)
     try:
         db.execute("ALTER TABLE chat_groups ADD COLUMN image_url TEXT")
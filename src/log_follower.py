@@ -0,0 +1,361 @@
+"""Follow a Minecraft server's ``logs/latest.log`` for live console views.
+
+One ``LogFollower`` per log file and process reads new lines as they are
+written and keeps the most recent ones in a ring buffer. Viewers never
+touch the file: they ask the follower for the lines after the last
+line id they saw and get an immediate answer, so any number of
+browser tabs share one file handle and one reader thread, and no web
+worker waits on a viewer. The thread starts when the log is first asked
+for and exits once nobody has asked for ``LOG_FOLLOW_IDLE`` seconds.
+
+On Linux the follower sleeps on inotify events for the log directory;
+elsewhere, or if inotify is unavailable, it polls. Either way it handles
+the server's log rollover: at startup (and at midnight) log4j renames
+``latest.log`` to ``<date>-<n>.log`` and gzips it, then starts a new
+``latest.log``. The open handle still reaches the old file, so its last
+lines are drained before switching. If the follower was stopped in the
+meantime, the missed tail is read from the newest ``.log.gz``. A file
+truncated in place is re-read from the start.
+
+Every web worker process runs its own follower, so line ids must not
+depend on which one a poll lands on. A line's id is the file it came
+from (device, inode and a checksum of its first line, which tells a log
+truncated and rewritten in place from its earlier contents) and the
+byte offset where the line ends; every follower of the file gives the
+same line the same id.
+"""
+import collections
+import gzip
+import os
+import select
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import ctypes
+    import ctypes.util
+
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    _libc.inotify_init1.restype = ctypes.c_int
+    _libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+except (OSError, AttributeError, ImportError):
+    _libc = None
+
+# Lines kept per log for viewers that connect or fall behind
+LOG_BUFFER_LINES = int(os.environ.get("LOG_BUFFER_LINES", 2000))
+# Seconds between checks when inotify is unavailable (and the longest inotify sleep)
+LOG_POLL_INTERVAL = float(os.environ.get("LOG_POLL_INTERVAL", 1.0))
+# Seconds the reader thread keeps going after the last request for its lines
+LOG_FOLLOW_IDLE = float(os.environ.get("LOG_FOLLOW_IDLE", 60))
+
+# How much of an existing log to load when a follower starts
+_SEED_BYTES = 256 * 1024
+_READ_SIZE = 64 * 1024
+_MAX_LINE = 16 * 1024
+_TAIL_BYTES = 64
+# Bytes of the first line that identify a log file's contents
+_HEAD_BYTES = 64
+
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+# Writes, truncation, and files appearing or disappearing (rotation)
+_IN_EVENTS = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+Line = Tuple[str, str]   # (id, text)
+_Entry = Tuple[str, int, int, str]   # (file key, start offset, end offset, text)
+
+# Identity of a file that was rolled over after being read to its end
+_ROLLED = (-1, -1)
+
+
+def _file_key(identity: Tuple[int, int], head: bytes) -> str:
+    """Key of a log file, the same in every process: its identity and a checksum of its first line."""
+    first_line = head.split(b"\n", 1)[0][:_HEAD_BYTES]
+    return f"{identity[0]:x}.{identity[1]:x}.{zlib.crc32(first_line):08x}"
+
+
+def _parse_id(line_id: str) -> Optional[Tuple[str, int]]:
+    key, _, offset = line_id.rpartition("-")
+    return (key, int(offset)) if key and offset.isdigit() else None
+
+
+class _DirectoryWatch:
+    """Wake-ups for changes in one directory via inotify (Linux only)."""
+
+    def __init__(self, directory: str):
+        self.fd = _libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if _libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_EVENTS) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"Cannot watch {directory}")
+
+    def wait(self, timeout: float):
+        """Block until something changed in the directory, or ``timeout`` passed."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            # Which file changed does not matter; the follower re-checks its log
+            try:
+                while os.read(self.fd, 64 * _INOTIFY_EVENT.size):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class LogFollower:
+    """Shared tail of one log file; see the module docstring.
+
+    Args:
+        path: The log file, usually ``<server>/logs/latest.log``.
+        max_lines: Ring buffer size.
+    """
+
+    def __init__(self, path: str, max_lines: int = LOG_BUFFER_LINES):
+        self.path = path
+        self.mode = None
+        self._lines: "collections.deque[_Entry]" = collections.deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self._last_request = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._identity: Optional[Tuple[int, int]] = None   # (st_dev, st_ino) of the open file
+        self._key: Optional[str] = None   # _file_key of the open file, once it has a line
+        self._offset = 0
+        self._partial = b""
+        self._tail = b""   # last bytes read, to notice a file rewritten in place
+
+    @property
+    def last_id(self) -> Optional[str]:
+        with self._lock:
+            return self._id(self._lines[-1]) if self._lines else None
+
+    def touch(self):
+        """Note that someone is watching, starting the reader thread if it is not running."""
+        with self._lock:
+            self._last_request = time.monotonic()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-follower", daemon=True)
+                self._thread.start()
+
+    def lines_after(self, line_id: Optional[str], backlog: int = 200) -> Tuple[List[Line], bool, bool]:
+        """Buffered lines after ``line_id``, whether some were lost, and whether the id was unknown.
+
+        Without an id, or with one from a file this follower has no lines
+        of, the answer is the last ``backlog`` lines. An id past the
+        newest line (another worker read further) gets no lines yet.
+        """
+        with self._lock:
+            position = _parse_id(line_id) if line_id else None
+            if position is not None:
+                key, offset = position
+                first = None   # the oldest buffered line of that file
+                for index in range(len(self._lines) - 1, -1, -1):
+                    entry = self._lines[index]
+                    if entry[0] != key:
+                        continue
+                    if entry[2] <= offset:
+                        return [self._line(e) for e in list(self._lines)[index + 1:]], False, False
+                    first = index
+                if first is not None:
+                    skipped = self._lines[first][1] > offset
+                    return [self._line(e) for e in list(self._lines)[first:]], skipped, False
+            lines = [self._line(e) for e in list(self._lines)[-backlog:]] if backlog else []
+            return lines, False, bool(line_id)
+
+    @staticmethod
+    def _id(entry: _Entry) -> str:
+        return f"{entry[0]}-{entry[2]}"
+
+    @classmethod
+    def _line(cls, entry: _Entry) -> Line:
+        return cls._id(entry), entry[3]
+
+    # Reader thread
+
+    def _run(self):
+        watch = None
+        try:
+            while True:
+                with self._lock:
+                    if time.monotonic() - self._last_request > LOG_FOLLOW_IDLE:
+                        # Under the lock, so a request arriving now starts a fresh thread
+                        self._stop(watch)
+                        return
+                self._check()
+                if watch is None and _libc is not None:
+                    try:
+                        watch = _DirectoryWatch(os.path.dirname(self.path))
+                        self.mode = "inotify"
+                        self._check()   # anything written before the watch existed
+                    except OSError:
+                        watch = None
+                if watch is not None:
+                    # Still re-check now and then: events on network filesystems can go missing
+                    watch.wait(max(LOG_POLL_INTERVAL, 5.0))
+                else:
+                    self.mode = "poll"
+                    time.sleep(LOG_POLL_INTERVAL)
+        except BaseException:
+            with self._lock:
+                self._stop(watch)
+            raise
+
+    def _stop(self, watch: Optional[_DirectoryWatch]):
+        if watch is not None:
+            watch.close()
+        self._close()
+        self._thread = None
+
+    def _check(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            stat = None
+        if self._file is not None:
+            rolled = stat is None or (stat.st_dev, stat.st_ino) != self._identity
+            if not rolled and (stat.st_size < self._offset or not self._same_before_offset()):
+                # Truncated or rewritten in place
+                self._file.seek(0)
+                self._offset, self._partial, self._tail, self._key = 0, b"", b"", None
+            self._drain()
+            if rolled:
+                # The old file is fully read now, so the next one starts at 0
+                self._flush_partial(self._offset)
+                self._close()
+                self._identity, self._offset, self._tail, self._key = _ROLLED, 0, b"", None
+        if self._file is None and stat is not None:
+            self._open(stat)
+            self._drain()
+
+    def _open(self, stat: os.stat_result):
+        try:
+            self._file = open(self.path, "rb")
+        except OSError:
+            return
+        identity = (stat.st_dev, stat.st_ino)
+        if self._identity == identity and stat.st_size >= self._offset and self._same_before_offset():
+            self._file.seek(self._offset)   # restarted on the same file
+        elif self._identity is None:
+            if stat.st_size > _SEED_BYTES:
+                # First start: the tail of the log, from the first whole line
+                self._file.seek(stat.st_size - _SEED_BYTES)
+                self._file.readline()
+            self._offset, self._tail, self._partial = self._file.tell(), b"", b""
+        else:
+            if self._identity not in (identity, _ROLLED):
+                # Restarted after the server rolled the file we had been reading
+                self._catch_up_rolled()
+            self._offset, self._tail, self._partial, self._key = 0, b"", b"", None
+        self._identity = identity
+
+    def _same_before_offset(self) -> bool:
+        """Whether the bytes before the read position are still the ones read there."""
+        if not self._tail:
+            return True
+        try:
+            return os.pread(self._file.fileno(), len(self._tail), self._offset - len(self._tail)) == self._tail
+        except OSError:
+            return False
+
+    def _catch_up_rolled(self):
+        """Lines missed while stopped, from the rolled-over log the server gzipped."""
+        directory = os.path.dirname(self.path)
+        try:
+            rolled = [
+                os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".log.gz")
+            ]
+            newest = max(rolled, key=os.path.getmtime) if rolled else None
+            if newest is None:
+                return
+            with gzip.open(newest, "rb") as f:
+                data = f.read()
+        except (OSError, EOFError, ValueError):
+            return
+        if self._tail and data[self._offset - len(self._tail):self._offset] != self._tail:
+            return   # not the file we were reading
+        if len(data) > self._offset:
+            if self._key is None:
+                self._key = _file_key(self._identity, data[:_HEAD_BYTES])
+            self._emit(data[self._offset:], len(data))
+            self._flush_partial(len(data))
+
+    def _drain(self):
+        while True:
+            try:
+                chunk = self._file.read(_READ_SIZE)
+            except OSError:
+                return
+            if not chunk:
+                return
+            self._offset += len(chunk)
+            self._tail = (self._tail + chunk)[-_TAIL_BYTES:]
+            self._emit(chunk, self._offset)
+
+    def _emit(self, chunk: bytes, end: int):
+        """Buffer the complete lines in ``chunk``, which ends at byte ``end`` of the file."""
+        data = self._partial + chunk
+        start = end - len(data)
+        *complete, self._partial = data.split(b"\n")
+        lines = []
+        for line in complete:
+            lines.append((start, start + len(line) + 1, line.rstrip(b"\r")[:_MAX_LINE]))
+            start += len(line) + 1
+        if len(self._partial) > _MAX_LINE:
+            lines.append((start, end, self._partial[:_MAX_LINE]))
+            self._partial = b""
+        if lines:
+            self._append(lines)
+
+    def _flush_partial(self, end: int):
+        if self._partial:
+            self._append([(end - len(self._partial), end, self._partial.rstrip(b"\r"))])
+            self._partial = b""
+
+    def _append(self, lines: List[Tuple[int, int, bytes]]):
+        if self._key is None:
+            try:
+                head = os.pread(self._file.fileno(), _HEAD_BYTES, 0)
+            except OSError:
+                head = b""
+            self._key = _file_key(self._identity, head)
+        with self._lock:
+            for start, end, line in lines:
+                self._lines.append((self._key, start, end, line.decode("utf-8", "replace")))
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_followers: Dict[str, LogFollower] = {}
+_followers_lock = threading.Lock()
+
+
+def _forget_followers():
+    # A forked child (gunicorn --preload) has none of the parent's reader
+    # threads, and its locks may have been held mid-fork
+    global _followers, _followers_lock
+    _followers, _followers_lock = {}, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_followers)
+
+
+def get_follower(path: str) -> LogFollower:
+    """The process-wide follower for ``path``."""
+    path = os.path.realpath(path)
+    with _followers_lock:
+        follower = _followers.get(path)
+        if follower is None:
+            follower = _followers[path] = LogFollower(path)
+        return follower
@@ -0,0 +1,279 @@
+"""Reader for binary NBT, the format of ``playerdata/*.dat`` and region chunks.
+
+    >>> data = read_nbt_file("world/playerdata/<uuid>.dat", tags=("Pos", "Health", "abilities.flying"))
+    >>> data["Pos"], data["abilities"]["flying"]
+
+Decoding is lazy: only the requested tags are turned into Python values.
+Everything else is skipped by its encoded length (a list of 10 000 longs
+is one pointer bump), and reading stops as soon as every requested
+top-level tag has been seen. Files are decompressed as they are read, so
+a stop that early also skips decompressing the rest. Values use the same
+types as ``src.snbt``: ints, floats, strings, lists and dicts, with byte
+arrays as ``bytes`` and int and long arrays as lists of ints.
+"""
+import gzip
+import struct
+import zlib
+from typing import Any, BinaryIO, Dict, Iterable, Optional
+
+TAG_END = 0
+TAG_BYTE = 1
+TAG_SHORT = 2
+TAG_INT = 3
+TAG_LONG = 4
+TAG_FLOAT = 5
+TAG_DOUBLE = 6
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+TAG_INT_ARRAY = 11
+TAG_LONG_ARRAY = 12
+
+# Scalars: struct format and size
+_SCALARS = {
+    TAG_BYTE: struct.Struct(">b"),
+    TAG_SHORT: struct.Struct(">h"),
+    TAG_INT: struct.Struct(">i"),
+    TAG_LONG: struct.Struct(">q"),
+    TAG_FLOAT: struct.Struct(">f"),
+    TAG_DOUBLE: struct.Struct(">d"),
+}
+# Arrays: element format and size
+_ARRAYS = {TAG_BYTE_ARRAY: ("b", 1), TAG_INT_ARRAY: ("i", 4), TAG_LONG_ARRAY: ("q", 8)}
+_INT = _SCALARS[TAG_INT]
+_USHORT = struct.Struct(">H")
+# Bytes decompressed at a time when reading from a file
+_READ_SIZE = 64 * 1024
+
+
+class NbtError(ValueError):
+    """Raised for truncated or malformed NBT."""
+
+
+def _decode_string(raw: bytes) -> str:
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        # Java's modified UTF-8: encoded NUL and surrogate pairs
+        text = raw.replace(b"\xc0\x80", b"\x00").decode("utf-8", "surrogatepass")
+        return text.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+
+
+def _wanted_tree(tags: Iterable[str]) -> Dict[str, Any]:
+    """``("Pos", "abilities.flying")`` -> ``{"Pos": None, "abilities": {"flying": None}}``."""
+    tree: Dict[str, Any] = {}
+    for tag in tags:
+        node = tree
+        parts = tag.split(".")
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                break   # a parent is already wanted whole
+            node = node.setdefault(part, child)
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+class _Reader:
+    """Decodes from ``data``, refilled from ``stream`` (if given) as decoding reaches its end."""
+
+    __slots__ = ("data", "pos", "stream", "base")
+
+    def __init__(self, data: bytes = b"", stream: Optional[BinaryIO] = None):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.stream = stream
+        self.base = 0   # offset in the document of data[0]
+
+    @property
+    def offset(self) -> int:
+        return self.base + self.pos
+
+    def need(self, size: int):
+        if self.pos + size > len(self.data):
+            if self.stream is None:
+                raise NbtError(f"Truncated NBT at offset {self.offset}")
+            self._fill(size)
+
+    def _fill(self, size: int):
+        """Keep the unread part of the buffer and read on until ``size`` bytes from ``pos`` are in it."""
+        skipped = self.pos - len(self.data)   # skipping may jump past what was read
+        chunks = [self.data[self.pos:].tobytes()] if skipped < 0 else []
+        self.base += self.pos
+        self.pos = 0
+        while skipped > 0:
+            chunk = self.stream.read(min(skipped, _READ_SIZE))
+            if not chunk:
+                raise NbtError(f"Truncated NBT at offset {self.base - skipped}")
+            skipped -= len(chunk)
+        missing = size - sum(len(chunk) for chunk in chunks)
+        while missing > 0:
+            chunk = self.stream.read(max(missing, _READ_SIZE))
+            if not chunk:
+                self.data = memoryview(b"".join(chunks))
+                raise NbtError(f"Truncated NBT at offset {self.base + len(self.data)}")
+            chunks.append(chunk)
+            missing -= len(chunk)
+        self.data = memoryview(b"".join(chunks))
+
+    def byte(self) -> int:
+        self.need(1)
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def int(self) -> int:
+        self.need(4)
+        value = _INT.unpack_from(self.data, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def length(self) -> int:
+        value = self.int()
+        if value < 0:
+            raise NbtError(f"Negative length at offset {self.offset - 4}")
+        return value
+
+    def string(self) -> str:
+        self.need(2)
+        length = _USHORT.unpack_from(self.data, self.pos)[0]
+        self.pos += 2
+        self.need(length)
+        raw = bytes(self.data[self.pos:self.pos + length])
+        self.pos += length
+        return _decode_string(raw)
+
+    def skip_string(self):
+        self.need(2)
+        self.pos += 2 + _USHORT.unpack_from(self.data, self.pos)[0]
+
+    def value(self, tag: int, wanted: Optional[Dict[str, Any]] = None) -> Any:
+        scalar = _SCALARS.get(tag)
+        if scalar is not None:
+            self.need(scalar.size)
+            value = scalar.unpack_from(self.data, self.pos)[0]
+            self.pos += scalar.size
+            return value
+        if tag == TAG_STRING:
+            return self.string()
+        if tag == TAG_COMPOUND:
+            return self.compound(wanted)
+        if tag == TAG_LIST:
+            item_tag = self.byte()
+            return [self.value(item_tag, wanted) for _ in range(self.length())]
+        array = _ARRAYS.get(tag)
+        if array is not None:
+            code, size = array
+            length = self.length()
+            self.need(length * size)
+            start, self.pos = self.pos, self.pos + length * size
+            if tag == TAG_BYTE_ARRAY:
+                return bytes(self.data[start:self.pos])
+            return list(struct.unpack_from(f">{length}{code}", self.data, start))
+        raise NbtError(f"Unknown tag type {tag} at offset {self.offset}")
+
+    def skip(self, tag: int):
+        scalar = _SCALARS.get(tag)
+        if scalar is not None:
+            self.pos += scalar.size
+        elif tag == TAG_STRING:
+            self.skip_string()
+        elif tag == TAG_COMPOUND:
+            while True:
+                child = self.byte()
+                if child == TAG_END:
+                    break
+                self.skip_string()
+                self.skip(child)
+        elif tag == TAG_LIST:
+            item_tag = self.byte()
+            length = self.length()
+            scalar = _SCALARS.get(item_tag)
+            if scalar is not None:
+                self.pos += length * scalar.size
+            elif item_tag == TAG_STRING:
+                # Recipe books and the like are long string lists
+                data, pos = self.data, self.pos
+                for _ in range(length):
+                    if pos + 2 > len(data):
+                        self.pos = pos
+                        self.need(2)
+                        data, pos = self.data, self.pos
+                    pos += 2 + _USHORT.unpack_from(data, pos)[0]
+                self.pos = pos
+            else:
+                for _ in range(length):
+                    self.skip(item_tag)
+        elif tag in _ARRAYS:
+            length = self.length()
+            self.pos += length * _ARRAYS[tag][1]
+        else:
+            raise NbtError(f"Unknown tag type {tag} at offset {self.offset}")
+        self.need(0)
+
+    def compound(self, wanted: Optional[Dict[str, Any]] = None, stop_early: bool = False) -> Dict[str, Any]:
+        """Decode a compound's entries, or only those in ``wanted`` (skipping the rest)."""
+        result = {}
+        remaining = len(wanted) if wanted is not None else -1
+        while True:
+            tag = self.byte()
+            if tag == TAG_END:
+                return result
+            name = self.string()
+            if wanted is None:
+                result[name] = self.value(tag)
+            elif name in wanted:
+                result[name] = self.value(tag, wanted[name])
+                remaining -= 1
+                if remaining == 0 and stop_early:
+                    return result
+            else:
+                self.skip(tag)
+
+
+def read_nbt(data: bytes, tags: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Decode an uncompressed NBT document, or just ``tags`` of its root compound.
+
+    ``tags`` are root-level names, or dotted paths into nested compounds
+    (``"abilities.flying"``); missing tags are simply absent.
+    """
+    return _read_root(_Reader(data), tags)
+
+
+def _read_root(reader: _Reader, tags: Optional[Iterable[str]]) -> Dict[str, Any]:
+    if reader.byte() != TAG_COMPOUND:
+        raise NbtError("NBT root is not a compound")
+    reader.skip_string()   # root name, usually empty
+    wanted = _wanted_tree(tags) if tags is not None else None
+    return reader.compound(wanted, stop_early=True)
+
+
+def decompress(data: bytes) -> bytes:
+    """Undo the gzip or zlib compression NBT is stored with (raw data is returned as is)."""
+    if data[:2] == b"\x1f\x8b":
+        return gzip.decompress(data)
+    if data[:1] == b"\x78":
+        return zlib.decompress(data)
+    return data
+
+
+def read_nbt_file(path: str, tags: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Read a (usually gzip-compressed) NBT file such as ``playerdata/<uuid>.dat``.
+
+    Gzip and uncompressed files are decoded as they are read, and only as
+    far as ``tags`` need; zlib-compressed ones are read whole.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(2)
+        f.seek(0)
+        try:
+            if magic == b"\x1f\x8b":
+                with gzip.GzipFile(fileobj=f) as stream:
+                    return _read_root(_Reader(stream=stream), tags)
+            if magic[:1] == b"\x78":
+                return read_nbt(zlib.decompress(f.read()), tags)
+            return _read_root(_Reader(stream=f), tags)
+        except (OSError, EOFError, zlib.error) as e:
+            raise NbtError(f"Cannot decompress {path}: {e}") from None
@@ -0,0 +1,164 @@
+"""Per-server circuit breaker for RCON.
+
+After ``failure_threshold`` consecutive connection failures a server's
+breaker opens: calls fail fast with the cached offline error instead of
+waiting out the socket timeout. A background thread probes the server's
+port with exponential backoff; once it accepts connections the breaker
+goes half-open and lets a single real request through, whose outcome
+closes or re-opens it.
+"""
+import heapq
+import logging
+import socket
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+ServerKey = Tuple[str, int]
+
+
+class CircuitBreaker:
+    """State for one server; guarded by the registry lock."""
+
+    def __init__(self, key: ServerKey, base_backoff: float):
+        self.key = key
+        self.state = CLOSED
+        self.failures = 0
+        self.backoff = base_backoff
+        self.retry_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.trial_in_flight = False
+
+
+class CircuitBreakerRegistry:
+    """Circuit breakers keyed by ``(host, port)`` with a shared probe thread."""
+
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 5,
+                 max_backoff: float = 300, probe_timeout: float = 3):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.probe_timeout = probe_timeout
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._breakers: Dict[ServerKey, CircuitBreaker] = {}
+        self._probes = []   # heap of (due, key)
+        self._thread: Optional[threading.Thread] = None
+
+    def before_call(self, key: ServerKey) -> Optional[str]:
+        """Return a fail-fast error if the server is known to be down, else None."""
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None or breaker.state == CLOSED:
+                return None
+            if breaker.state == HALF_OPEN and not breaker.trial_in_flight:
+                breaker.trial_in_flight = True
+                return None
+            # Probe thread may not exist in a freshly forked worker
+            self._ensure_probe_thread()
+            retry_in = max(0, int((breaker.retry_at or time.monotonic()) - time.monotonic()))
+            last_error = (breaker.last_error or "").removeprefix("Error: ")
+            return f"Error: Server offline, retrying in {retry_in}s. Last error: {last_error}"
+
+    def record_success(self, key: ServerKey):
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                return
+            if breaker.state != CLOSED:
+                logger.info(f"RCON circuit for {key[0]}:{key[1]} closed")
+            # Keep the entry only while there is something to remember
+            del self._breakers[key]
+
+    def record_failure(self, key: ServerKey, error: str):
+        with self._lock:
+            breaker = self._breakers.setdefault(key, CircuitBreaker(key, self.base_backoff))
+            breaker.failures += 1
+            breaker.last_error = error
+            breaker.trial_in_flight = False
+            if breaker.state == HALF_OPEN:
+                breaker.backoff = min(breaker.backoff * 2, self.max_backoff)
+                self._open(breaker)
+            elif breaker.state == CLOSED and breaker.failures >= self.failure_threshold:
+                self._open(breaker)
+
+    def cancel_trial(self, key: ServerKey):
+        """Give back a half-open trial that never reached the server."""
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is not None:
+                breaker.trial_in_flight = False
+
+    def reset(self, key: ServerKey):
+        """Forget a server's history, e.g. after its settings change."""
+        with self._lock:
+            self._breakers.pop(key, None)
+
+    def snapshot(self, key: ServerKey) -> Dict[str, Any]:
+        """Current breaker state for display."""
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                return {"state": CLOSED, "failures": 0, "retry_in": None, "last_error": None}
+            retry_in = None
+            if breaker.state == OPEN and breaker.retry_at is not None:
+                retry_in = max(0, round(breaker.retry_at - time.monotonic(), 1))
+            return {
+                "state": breaker.state,
+                "failures": breaker.failures,
+                "retry_in": retry_in,
+                "last_error": breaker.last_error,
+            }
+
+    def _open(self, breaker: CircuitBreaker):
+        logger.warning(f"RCON circuit for {breaker.key[0]}:{breaker.key[1]} open for {breaker.backoff}s")
+        breaker.state = OPEN
+        breaker.retry_at = time.monotonic() + breaker.backoff
+        heapq.heappush(self._probes, (breaker.retry_at, breaker.key))
+        self._ensure_probe_thread()
+        self._wakeup.notify()
+
+    def _ensure_probe_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._probe_loop, name="rcon-breaker", daemon=True)
+            self._thread.start()
+
+    def _probe_loop(self):
+        while True:
+            with self._lock:
+                while not self._probes or self._probes[0][0] > time.monotonic():
+                    timeout = self._probes[0][0] - time.monotonic() if self._probes else None
+                    self._wakeup.wait(timeout)
+                due, key = heapq.heappop(self._probes)
+                breaker = self._breakers.get(key)
+                # Skip entries superseded by a reset or a newer schedule
+                if breaker is None or breaker.state != OPEN or breaker.retry_at != due:
+                    continue
+
+            reachable = self._probe(key)
+
+            with self._lock:
+                if self._breakers.get(key) is not breaker or breaker.state != OPEN:
+                    continue
+                if reachable:
+                    logger.info(f"RCON circuit for {key[0]}:{key[1]} half-open")
+                    breaker.state = HALF_OPEN
+                    breaker.retry_at = None
+                else:
+                    breaker.backoff = min(breaker.backoff * 2, self.max_backoff)
+                    breaker.retry_at = time.monotonic() + breaker.backoff
+                    heapq.heappush(self._probes, (breaker.retry_at, key))
+
+    def _probe(self, key: ServerKey) -> bool:
+        """Check that the RCON port accepts TCP connections, without authenticating."""
+        try:
+            with socket.create_connection(key, timeout=self.probe_timeout):
+                return True
+        except OSError:
+            return False
@@ -0,0 +1,202 @@
+"""Short-lived cache of read-only RCON responses.
+
+Player lists, entity data and the like change on a seconds scale, yet
+every page load and poll asked the server again. ``ResponseCache`` keeps
+responses to classified read-only commands for a per-family TTL, keyed by
+server. Commands that change the world invalidate the entries they can
+affect: ``tp Steve ...`` drops cached ``Pos`` (and full entity dumps) for
+Steve, ``give`` drops his inventory, ``kick`` drops the player list, and
+any command the cache does not understand drops everything for that
+server. Read-only commands (``rcon_singleflight.is_read_only``) never
+invalidate anything.
+"""
+import threading
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+from src.rcon_singleflight import is_read_only, normalize_command
+
+# Cache families and the env var suffixes they are configured with
+FAMILY_PLAYERS = "players"
+FAMILY_ENTITY = "entity"
+FAMILY_TIME = "time"
+FAMILY_STATIC = "static"
+FAMILIES = (FAMILY_PLAYERS, FAMILY_ENTITY, FAMILY_TIME, FAMILY_STATIC)
+
+# Entity data paths each command can change, and where its target argument is
+_ENTITY_WRITES = {
+    "tp": (0, ("Pos", "Rotation", "Dimension")),
+    "teleport": (0, ("Pos", "Rotation", "Dimension")),
+    "spreadplayers": (None, ("Pos",)),
+    "give": (0, ("Inventory", "SelectedItem")),
+    "clear": (0, ("Inventory", "SelectedItem")),
+    "enchant": (0, ("Inventory", "SelectedItem")),
+    "item": (2, ("Inventory", "SelectedItem", "EnderItems")),
+    "effect": (1, ("active_effects", "Health")),
+    "xp": (1, ("XpLevel", "XpP", "XpTotal", "Score")),
+    "experience": (1, ("XpLevel", "XpP", "XpTotal", "Score")),
+    "gamemode": (1, ("playerGameType",)),
+    "damage": (0, ("Health",)),
+    "kill": (0, None),   # everything about the target
+}
+
+# Commands that change who is online or listed
+_PLAYER_LIST_WRITES = {"kick", "ban", "ban-ip", "pardon", "pardon-ip", "op", "deop", "whitelist"}
+
+# Commands with no effect on anything the cache holds
+_NO_EFFECT = {"say", "me", "tell", "msg", "w", "tellraw", "title", "playsound", "particle", "list",
+              "data get", "time query", "seed", "help", "locate"}
+
+_Classified = Tuple[str, Optional[str], Optional[str]]
+
+
+def classify(command: str) -> Optional[_Classified]:
+    """Return ``(family, subject, path)`` for a cacheable command, else None."""
+    words = normalize_command(command).split(" ")
+    if words[0] == "list":
+        return (FAMILY_PLAYERS, None, None)
+    if words[:3] == ["data", "get", "entity"] and len(words) in (4, 5) and not words[3].startswith("@"):
+        path = words[4] if len(words) == 5 else None
+        # Player names are case-insensitive
+        return (FAMILY_ENTITY, words[3].lower(), path)
+    if words[:2] == ["time", "query"]:
+        return (FAMILY_TIME, None, None)
+    if words[0] in ("seed", "help"):
+        return (FAMILY_STATIC, None, None)
+    return None
+
+
+def changes_state(command: str) -> bool:
+    """True if ``command`` may make cached responses stale."""
+    if is_read_only(command):
+        return False
+    words = normalize_command(command).split(" ")
+    return not (words[0] in _NO_EFFECT or " ".join(words[:2]) in _NO_EFFECT)
+
+
+def _root(path: str) -> str:
+    """Top-level tag of an NBT path, e.g. ``Inventory`` for ``Inventory[0].id``."""
+    return path.split("[", 1)[0].split(".", 1)[0].split("{", 1)[0]
+
+
+class ResponseCache:
+    """Per-server TTL cache for read-only command responses.
+
+    ``ttls`` maps a family to seconds; families missing or set to 0 are not
+    cached. Servers are any hashable key (the client uses host, port and
+    password so tenants never see each other's replies).
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_entries_per_server: int = 512):
+        self.ttls = ttls
+        self.max_entries_per_server = max_entries_per_server
+        self._lock = threading.Lock()
+        # server -> normalized command -> (expires_at, family, subject, path, response)
+        self._entries: Dict[Hashable, Dict[str, tuple]] = {}
+        # Bumped on every invalidation so a read that raced a write is not stored
+        self._generations: Dict[Hashable, int] = {}
+        self._stats = {family: {"hits": 0, "misses": 0, "invalidations": 0} for family in FAMILIES}
+
+    def generation(self, server: Hashable) -> int:
+        with self._lock:
+            return self._generations.get(server, 0)
+
+    def get(self, server: Hashable, command: str) -> Optional[str]:
+        """Cached response for ``command``, or None on a miss or uncacheable command."""
+        classified = classify(command)
+        if classified is None or not self.ttls.get(classified[0]):
+            return None
+        family = classified[0]
+        with self._lock:
+            entry = self._entries.get(server, {}).get(normalize_command(command))
+            if entry is None or entry[0] <= time.monotonic():
+                self._stats[family]["misses"] += 1
+                return None
+            self._stats[family]["hits"] += 1
+            return entry[4]
+
+    def put(self, server: Hashable, command: str, response: str, generation: int):
+        """Store a response fetched while the server was at ``generation``."""
+        classified = classify(command)
+        if classified is None:
+            return
+        family, subject, path = classified
+        ttl = self.ttls.get(family)
+        if not ttl:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._generations.get(server, 0) != generation:
+                return
+            entries = self._entries.setdefault(server, {})
+            if len(entries) >= self.max_entries_per_server:
+                for key in [k for k, e in entries.items() if e[0] <= now]:
+                    del entries[key]
+                if len(entries) >= self.max_entries_per_server:
+                    # Still full of live entries: drop the one closest to expiry
+                    del entries[min(entries, key=lambda k: entries[k][0])]
+            entries[normalize_command(command)] = (now + ttl, family, subject, path, response)
+
+    def invalidate_for(self, server: Hashable, command: str) -> int:
+        """Drop whatever a (possibly mutating) command may have made stale.
+
+        Returns the server's generation afterwards.
+        """
+        if not changes_state(command):
+            return self.generation(server)
+        words = normalize_command(command).split(" ")
+        name = words[0]
+        if name in _ENTITY_WRITES:
+            index, paths = _ENTITY_WRITES[name]
+            target = words[index + 1] if index is not None and len(words) > index + 1 else None
+            if target is None or target.startswith("@"):
+                target = None   # selector or implicit target: could be anyone
+            self._invalidate(server, FAMILY_ENTITY, target and target.lower(), paths)
+        elif name in _PLAYER_LIST_WRITES:
+            self._invalidate(server, FAMILY_PLAYERS)
+        elif name == "time":
+            self._invalidate(server, FAMILY_TIME)
+        else:
+            self._invalidate(server)
+        return self.generation(server)
+
+    def clear(self, server: Hashable):
+        self._invalidate(server)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Hits, misses, hit rate, invalidations and live entries per family."""
+        now = time.monotonic()
+        with self._lock:
+            live = {family: 0 for family in FAMILIES}
+            for entries in self._entries.values():
+                for entry in entries.values():
+                    if entry[0] > now:
+                        live[entry[1]] += 1
+            result = {}
+            for family, counts in self._stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                result[family] = {
+                    **counts,
+                    "hit_rate": round(counts["hits"] / lookups, 3) if lookups else 0.0,
+                    "entries": live[family],
+                    "ttl": self.ttls.get(family, 0),
+                }
+            return result
+
+    def _invalidate(self, server, family=None, subject=None, paths=None):
+        with self._lock:
+            self._generations[server] = self._generations.get(server, 0) + 1
+            entries = self._entries.get(server)
+            if not entries:
+                return
+            if family is None:
+                stale = list(entries)
+            else:
+                stale = [
+                    key for key, (_, entry_family, entry_subject, entry_path, _) in entries.items()
+                    if entry_family == family
+                    and (subject is None or entry_subject == subject)
+                    and (paths is None or entry_path is None or _root(entry_path) in paths)
+                ]
+            for key in stale:
+                self._stats[entries.pop(key)[1]]["invalidations"] += 1
@@ -0,0 +1,180 @@
+"""Record and replay RCON traffic.
+
+With ``RCON_CAPTURE_FILE`` set, every command that goes out over RCON is
+appended to that file as one compact JSON line::
+
+    {"t": 1760000000.123, "s": "mc.example.com:25575", "u": 7, "c": "list", "r": "There are ...", "l": 3.2}
+
+(wall-clock time, server, user, command, response or ``"e"`` error, and
+latency in ms). A pipelined response is timed from its command going out
+or the previous response arriving, whichever is later, so latencies
+compare with a replay that sends one command at a time. Passwords are
+never written. Lines are written with a
+single ``O_APPEND`` write, so several worker processes can share a file.
+
+Replay a capture against a local stand-in server, or any RCON server::
+
+    python -m src.rcon_capture capture.jsonl                    # fake server, real timing
+    python -m src.rcon_capture capture.jsonl --speed 10         # ten times faster
+    python -m src.rcon_capture capture.jsonl --speed 0 --user 7 # as fast as possible, one tenant
+    python -m src.rcon_capture capture.jsonl --host 127.0.0.1 --port 25575 --password secret
+
+Each user's commands are replayed on their own connection with the
+captured gaps between them, and the replayed latencies are reported next
+to the captured ones.
+"""
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class CaptureWriter:
+    """Append-only capture of RCON commands, responses and latencies."""
+
+    def __init__(self, path: str, include_responses: bool = True):
+        self.path = path
+        self.include_responses = include_responses
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+
+    def record(self, server: str, user_id: Optional[int], command: str, latency: float,
+               response: Optional[str] = None, error: Optional[str] = None):
+        entry: Dict[str, Any] = {"t": round(time.time(), 3), "s": server, "u": user_id, "c": command}
+        if error is not None:
+            entry["e"] = error
+        elif self.include_responses:
+            entry["r"] = response
+        entry["l"] = round(1000 * latency, 2)
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n"
+        # One write per line keeps concurrent writers from interleaving
+        os.write(self._fd, line.encode("utf-8"))
+
+
+def read_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield captured entries, skipping a torn last line."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def _captured_players(entries: List[Dict[str, Any]]) -> List[str]:
+    """Player names from the latest captured ``list`` response, to seed a fake server."""
+    from src.rcon_client import parse_online_players
+
+    for entry in reversed(entries):
+        if entry["c"].lstrip("/").split(" ")[0] == "list" and entry.get("r"):
+            return parse_online_players(entry["r"])
+    return []
+
+
+def replay(entries: List[Dict[str, Any]], host: str, port: int, password: str,
+           speed: float = 1.0) -> Dict[str, Any]:
+    """Replay entries per user, preserving gaps divided by ``speed`` (0: no waiting)."""
+    from src.rcon_client import RconClient
+
+    by_user: Dict[Any, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        by_user.setdefault(entry.get("u"), []).append(entry)
+    start_time = entries[0]["t"] if entries else 0
+    results: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    def run_user(user_entries):
+        client = RconClient(host, password, port=port)
+        client.connect()
+        try:
+            for entry in user_entries:
+                if speed:
+                    delay = (entry["t"] - start_time) / speed - (time.monotonic() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                sent = time.monotonic()
+                try:
+                    client.command(entry["c"])
+                    error = None
+                except Exception as e:
+                    error = str(e)
+                    client.disconnect()
+                    client.connect()
+                with lock:
+                    results.append({
+                        "user": entry.get("u"),
+                        "latency_ms": 1000 * (time.monotonic() - sent),
+                        "captured_ms": entry.get("l"),
+                        "error": error,
+                    })
+        finally:
+            client.disconnect()
+
+    threads = [threading.Thread(target=run_user, args=(user_entries,)) for user_entries in by_user.values()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(results, time.monotonic() - started)
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    def percentiles(values):
+        if not values:
+            return {"p50_ms": None, "p95_ms": None}
+        values = sorted(values)
+        return {
+            "p50_ms": round(statistics.median(values), 2),
+            "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+        }
+
+    replayed = [r["latency_ms"] for r in results if not r["error"]]
+    captured = [r["captured_ms"] for r in results if r["captured_ms"] is not None]
+    return {
+        "commands": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "users": len({r["user"] for r in results}),
+        "elapsed_s": round(elapsed, 2),
+        "replayed": percentiles(replayed),
+        "captured": percentiles(captured),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a Mineboard RCON capture")
+    parser.add_argument("capture")
+    parser.add_argument("--host", help="RCON server to replay against (default: a built-in fake server)")
+    parser.add_argument("--port", type=int, default=25575)
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression; 0 replays without gaps")
+    parser.add_argument("--user", type=int, action="append", help="only replay these user ids")
+    parser.add_argument("--server", help="only replay commands captured for this host:port")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server latency per command, seconds")
+    args = parser.parse_args()
+
+    entries = [
+        entry for entry in read_capture(args.capture)
+        if (not args.user or entry.get("u") in args.user) and (not args.server or entry.get("s") == args.server)
+    ]
+    entries.sort(key=lambda entry: entry["t"])
+
+    if args.host:
+        summary = replay(entries, args.host, args.port, args.password, args.speed)
+    else:
+        from src.rcon_fake import FakeRconServer
+
+        players = {name: {} for name in _captured_players(entries)}
+        with FakeRconServer(password=args.password, players=players, latency=args.latency) as server:
+            host, port = server.address
+            summary = replay(entries, host, port, args.password, args.speed)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
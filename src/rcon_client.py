@@ -1,17 +1,39 @@
+import os
+import select
 import socket
-import struct
 import logging
-from typing import Optional
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from src.services.config_service import get_rcon_config
+from src.rcon_breaker import CircuitBreakerRegistry
+from src.rcon_capture import CaptureWriter
+from src.rcon_gateway import GatewayClient, GatewayError, GatewayUnavailable
+from src.rcon_cache import FAMILY_ENTITY, FAMILY_PLAYERS, FAMILY_STATIC, FAMILY_TIME, ResponseCache, changes_state
+from src.rcon_ratelimit import RateLimited, RateLimiter
+from src.rcon_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, QueueTimeout, RconScheduler, RequestShed
+from src.rcon_singleflight import Flight, SingleFlight, flight_key
+from src.rcon_timeouts import COMMAND, CONNECT, AdaptiveTimeouts
+from src.rcon_codec import (
+    MAX_COMMAND_BYTES,
+    SERVERDATA_AUTH,
+    SERVERDATA_EXECCOMMAND,
+    SERVERDATA_RESPONSE_VALUE,
+    PacketReader,
+    ResponseCollector,
+    append_packet,
+    encode_packet,
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# RCON Protocol Constants
-SERVERDATA_AUTH = 3
-SERVERDATA_AUTH_RESPONSE = 2
-SERVERDATA_EXECCOMMAND = 2
-SERVERDATA_RESPONSE_VALUE = 0
+# Client errors that mean the server itself is unreachable
+UNREACHABLE_ERRORS = {"Connection timeout", "Command timeout", "Connection refused", "Connection closed by server"}
+
+# Chat commands whose message text can be safely sent as several commands
+SPLITTABLE_MESSAGE_COMMANDS = {"say": 0, "me": 0, "tell": 1, "msg": 1, "w": 1}
 
 
 class RconClient:
@@ -23,23 +45,35 @@ class RconClient:
         self.port = port
         self.timeout = timeout
         self.socket = None
+        self.reader = None
         self.request_id = 0
+        self.pool_generation = None
+        # Seconds the last connect() took, until the caller has recorded it
+        self.connect_rtt = None
+        # time.monotonic() at which each command of the last iter_commands() batch was sent
+        self.sent_at: List[Optional[float]] = []
     
     def connect(self):
         """Establish connection and authenticate."""
+        started = time.monotonic()
         try:
             # Create socket with timeout
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.settimeout(self.timeout)
             self.socket.connect((self.host, self.port))
+            self.reader = PacketReader(self.socket)
             
             # Authenticate
             self._send_packet(SERVERDATA_AUTH, self.password)
             response = self._receive_packet()
+            if response[2] == SERVERDATA_RESPONSE_VALUE:
+                # Some servers send an empty response value ahead of the auth result
+                response = self._receive_packet()
             
             if response[0] == -1:
                 raise Exception("Authentication failed - invalid password")
             
+            self.connect_rtt = time.monotonic() - started
             logger.debug(f"Connected and authenticated to {self.host}:{self.port}")
             
         except socket.timeout:
@@ -52,17 +86,66 @@ class RconClient:
             raise
     
     def command(self, cmd: str) -> str:
-        """Send a command and return the response."""
+        """Send a command and return the (reassembled) response."""
+        for _, response in self.iter_commands([cmd]):
+            return response
+
+    def iter_commands(self, cmds: List[str], window: int = 32,
+                      timeout: Optional[float] = None) -> Iterator[Tuple[int, str]]:
+        """Pipeline several commands over this connection.
+
+        Up to ``window`` commands are written back to back before reading.
+        Responses are reassembled by ``ResponseCollector`` and yielded as
+        ``(index, response)`` in arrival order. ``timeout`` overrides the
+        per-read timeout for this batch. The time each command went out is
+        kept in ``sent_at``, so callers can time every response on its own.
+        """
+        self.sent_at = [None] * len(cmds)
         if not self.socket:
             raise Exception("Not connected")
-        
+        if timeout is not None:
+            self.timeout = timeout
+            self.socket.settimeout(timeout)
+
+        collector = ResponseCollector()
+        next_index = 0
         try:
-            self._send_packet(SERVERDATA_EXECCOMMAND, cmd)
-            response = self._receive_packet()
-            return response[1].decode('utf-8', errors='ignore')
+            while next_index < len(cmds) or collector.pending:
+                batch = bytearray()
+                first = next_index
+                while next_index < len(cmds) and collector.pending < window:
+                    command_id = self._next_request_id()
+                    append_packet(batch, command_id, SERVERDATA_EXECCOMMAND, cmds[next_index])
+                    sentinel_id = self._next_request_id()
+                    append_packet(batch, sentinel_id, SERVERDATA_RESPONSE_VALUE, "")
+                    collector.expect(command_id, sentinel_id, next_index)
+                    next_index += 1
+                if batch:
+                    self.sent_at[first:next_index] = [time.monotonic()] * (next_index - first)
+                    self.socket.sendall(batch)
+
+                request_id, payload, _ = self._receive_packet()
+                completed = collector.feed(request_id, payload)
+                if completed:
+                    yield completed
         except socket.timeout:
             raise Exception("Command timeout")
     
+    def is_alive(self) -> bool:
+        """Cheap liveness check for an idle connection.
+
+        An idle RCON socket should have nothing to read. If it is readable the
+        server either closed it (EOF) or left stray bytes behind; neither is
+        safe to reuse.
+        """
+        if not self.socket or self.reader.buffered:
+            return False
+        try:
+            readable, _, _ = select.select([self.socket], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
     def disconnect(self):
         """Close the connection."""
         if self.socket:
@@ -72,110 +155,658 @@ class RconClient:
                 pass
             finally:
                 self.socket = None
+                self.reader = None
     
+    def _next_request_id(self) -> int:
+        self.request_id += 1
+        return self.request_id
+
     def _send_packet(self, packet_type: int, payload: str):
         """Send an RCON packet."""
-        self.request_id += 1
-        payload_bytes = payload.encode('utf-8')
-        
-        # Packet structure: ID (4 bytes) + Type (4 bytes) + Payload + 2 null bytes
-        packet = struct.pack('<ii', self.request_id, packet_type) + payload_bytes + b'\x00\x00'
-        length = struct.pack('<i', len(packet))
-        
-        self.socket.sendall(length + packet)
+        self.socket.sendall(encode_packet(self._next_request_id(), packet_type, payload))
     
     def _receive_packet(self):
-        """Receive an RCON packet."""
-        # Read length (4 bytes)
-        length_data = self._recv_exact(4)
-        length = struct.unpack('<i', length_data)[0]
-        
-        # Read packet data
-        packet_data = self._recv_exact(length)
-        
-        # Parse packet: ID (4 bytes) + Type (4 bytes) + Payload (rest - 2 null bytes)
-        request_id = struct.unpack('<i', packet_data[:4])[0]
-        packet_type = struct.unpack('<i', packet_data[4:8])[0]
-        payload = packet_data[8:-2]  # Remove trailing null bytes
-        
-        return (request_id, payload, packet_type)
-    
-    def _recv_exact(self, num_bytes: int) -> bytes:
-        """Receive exact number of bytes from socket."""
-        data = b''
-        while len(data) < num_bytes:
-            chunk = self.socket.recv(num_bytes - len(data))
-            if not chunk:
-                raise Exception("Connection closed by server")
-            data += chunk
-        return data
-
-
-def run_command(command: str, user_id: Optional[int] = None):
+        """Receive an RCON packet as ``(request_id, payload, packet_type)``.
+
+        The payload is a view into the reader's buffer, valid until the next read.
+        """
+        return self.reader.read_packet()
+
+
+class RconConnectionPool:
+    """Thread-safe pool of authenticated RCON connections.
+
+    Connections are keyed by ``(host, port, password)`` so tenants that share
+    a server and credentials also share sockets. Each key is capped at
+    ``max_per_server`` open connections; idle ones are evicted after
+    ``idle_timeout`` seconds and checked for liveness before reuse.
+    """
+
+    def __init__(self, max_per_server: int = 4, idle_timeout: float = 60.0):
+        self.max_per_server = max_per_server
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = {}          # key -> deque of (client, last_used)
+        self._open = {}          # key -> number of open connections (idle + in use)
+        self._tenant_keys = {}   # user_id -> set of keys used by that tenant
+        self._generation = {}    # key -> bumped on invalidation to retire checked-out clients
+        self._tenant_config_generation = {}  # user_id -> last config generation seen
+
+    def acquire(self, host: str, port: int, password: str, timeout: float = 10,
+                user_id: Optional[int] = None, connect_timeout: Optional[float] = None) -> RconClient:
+        """Check out a connected client, reusing an idle socket when possible.
+
+        ``timeout`` bounds the wait for a free connection; a new connection
+        is opened with ``connect_timeout`` (default: ``timeout``).
+        """
+        key = (host, port, password)
+        deadline = time.monotonic() + timeout
+        with self._available:
+            if user_id is not None:
+                self._tenant_keys.setdefault(user_id, set()).add(key)
+            while True:
+                self._evict_idle(key)
+                idle = self._idle.get(key)
+                while idle:
+                    client, _ = idle.pop()
+                    if client.is_alive():
+                        return client
+                    self._discard_locked(key, client)
+                if self._open.get(key, 0) < self.max_per_server:
+                    self._open[key] = self._open.get(key, 0) + 1
+                    generation = self._generation.get(key, 0)
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Exception("Connection pool exhausted - timeout waiting for a free connection")
+                self._available.wait(remaining)
+
+        # Connect outside the lock so a slow server doesn't block other keys
+        client = RconClient(host, password, port=port, timeout=connect_timeout or timeout)
+        client.pool_generation = generation
+        try:
+            client.connect()
+        except Exception:
+            with self._available:
+                self._discard_locked(key, client)
+                self._available.notify()
+            raise
+        return client
+
+    def release(self, client: RconClient, discard: bool = False):
+        """Return a client to the pool, or close it if it is no longer usable."""
+        key = (client.host, client.port, client.password)
+        with self._available:
+            stale = client.pool_generation != self._generation.get(key, 0)
+            if discard or stale or not client.socket:
+                self._discard_locked(key, client)
+            else:
+                self._idle.setdefault(key, deque()).append((client, time.monotonic()))
+            self._available.notify()
+
+    def checkout_generation(self, key, user_id: Optional[int] = None) -> int:
+        """Current generation of a key, noting that ``user_id`` uses it.
+
+        Connections kept outside this pool (the asyncio client's) are tagged
+        with it and closed once it moves, so ``invalidate`` reaches them too.
+        """
+        with self._lock:
+            if user_id is not None:
+                self._tenant_keys.setdefault(user_id, set()).add(key)
+            return self._generation.get(key, 0)
+
+    def note_config_generation(self, user_id: Optional[int], generation: int) -> bool:
+        """Record a tenant's config generation; True if it changed since last seen."""
+        with self._lock:
+            previous = self._tenant_config_generation.get(user_id)
+            self._tenant_config_generation[user_id] = generation
+        return previous is not None and previous != generation
+
+    def invalidate(self, key):
+        """Close every idle socket for a key; in-use ones are closed on release."""
+        with self._available:
+            for client, _ in self._idle.pop(key, ()):
+                client.disconnect()
+            # Bumping the generation makes release() close checked-out clients
+            self._generation[key] = self._generation.get(key, 0) + 1
+            self._open.pop(key, None)
+            self._available.notify_all()
+
+    def invalidate_tenant(self, user_id: Optional[int]):
+        """Evict all connections a tenant has opened; return the evicted keys."""
+        with self._lock:
+            keys = self._tenant_keys.pop(user_id, set())
+        for key in keys:
+            self.invalidate(key)
+        return keys
+
+    def close_all(self):
+        """Close every pooled connection."""
+        with self._lock:
+            keys = list(self._open)
+            self._tenant_keys.clear()
+        for key in keys:
+            self.invalidate(key)
+
+    def _evict_idle(self, key):
+        idle = self._idle.get(key)
+        if not idle:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        # Oldest connections sit at the left of the deque
+        while idle and idle[0][1] < cutoff:
+            client, _ = idle.popleft()
+            self._discard_locked(key, client)
+
+    def _discard_locked(self, key, client: RconClient):
+        client.disconnect()
+        # Clients from before an invalidation were already uncounted
+        if client.pool_generation == self._generation.get(key, 0) and self._open.get(key, 0) > 0:
+            self._open[key] -= 1
+
+
+_pool = RconConnectionPool(
+    max_per_server=int(os.environ.get("RCON_POOL_MAX_PER_SERVER", 4)),
+    idle_timeout=float(os.environ.get("RCON_POOL_IDLE_TIMEOUT", 60)),
+)
+
+
+_breakers = CircuitBreakerRegistry(
+    failure_threshold=int(os.environ.get("RCON_BREAKER_FAILURES", 3)),
+    base_backoff=float(os.environ.get("RCON_BREAKER_BACKOFF", 5)),
+    max_backoff=float(os.environ.get("RCON_BREAKER_MAX_BACKOFF", 300)),
+)
+
+
+_scheduler = RconScheduler(
+    global_limit=int(os.environ.get("RCON_MAX_CONCURRENT", 32)),
+    per_tenant_limit=int(os.environ.get("RCON_MAX_PER_TENANT", 4)),
+    per_server_limit=int(os.environ.get("RCON_MAX_PER_SERVER", 4)),
+    queue_timeout=float(os.environ.get("RCON_QUEUE_TIMEOUT", 10)),
+)
+
+
+_flights = SingleFlight()
+
+
+_rate_limiter = RateLimiter(
+    server_rate=float(os.environ.get("RCON_RATE_PER_SERVER", 20)),
+    server_burst=float(os.environ.get("RCON_BURST_PER_SERVER", 40)),
+    user_rate=float(os.environ.get("RCON_RATE_PER_USER", 10)),
+    user_burst=float(os.environ.get("RCON_BURST_PER_USER", 20)),
+    heavy_rate=float(os.environ.get("RCON_HEAVY_RATE", 0.5)),
+    heavy_burst=float(os.environ.get("RCON_HEAVY_BURST", 4)),
+    max_wait=float(os.environ.get("RCON_RATE_MAX_WAIT", 5)),
+)
+
+
+_timeouts = AdaptiveTimeouts(
+    floors={
+        CONNECT: float(os.environ.get("RCON_CONNECT_TIMEOUT_FLOOR", 1)),
+        COMMAND: float(os.environ.get("RCON_COMMAND_TIMEOUT_FLOOR", 2)),
+    },
+    ceilings={
+        CONNECT: float(os.environ.get("RCON_CONNECT_TIMEOUT_CEILING", 10)),
+        COMMAND: float(os.environ.get("RCON_COMMAND_TIMEOUT_CEILING", 10)),
+    },
+    slow_command_timeout=float(os.environ.get("RCON_SLOW_COMMAND_TIMEOUT", 60)),
+)
+
+
+# Optional append-only capture of all RCON traffic, for offline replay
+_capture = None
+if os.environ.get("RCON_CAPTURE_FILE"):
+    _capture = CaptureWriter(
+        os.environ["RCON_CAPTURE_FILE"],
+        include_responses=os.environ.get("RCON_CAPTURE_RESPONSES", "1") != "0",
+    )
+
+
+# When set, batches run in the shared gateway process instead of this one
+_gateway = None
+if os.environ.get("RCON_GATEWAY_SOCKET"):
+    _gateway = GatewayClient(
+        os.environ["RCON_GATEWAY_SOCKET"],
+        timeout=float(os.environ.get("RCON_GATEWAY_TIMEOUT", 120)),
+    )
+
+
+def _gateway_request(message: Dict[str, Any], read_only: bool = False) -> Optional[Dict[str, Any]]:
+    """Send a request to the gateway; None if there is none or it cannot be connected to.
+
+    A request that fails after it was sent raises ``GatewayError``: the
+    gateway may have executed it, so it is only answered in-process when
+    ``read_only`` says running it twice is harmless.
+    """
+    if _gateway is None:
+        return None
+    try:
+        return _gateway.request(message)
+    except GatewayUnavailable as e:
+        logger.warning(f"RCON gateway unavailable, running in-process: {e}")
+        return None
+    except GatewayError as e:
+        if not read_only:
+            raise
+        logger.warning(f"RCON gateway request failed, answering in-process: {e}")
+        return None
+
+
+_cache = ResponseCache(ttls={
+    FAMILY_PLAYERS: float(os.environ.get("RCON_CACHE_TTL_PLAYERS", 2)),
+    FAMILY_ENTITY: float(os.environ.get("RCON_CACHE_TTL_ENTITY", 1)),
+    FAMILY_TIME: float(os.environ.get("RCON_CACHE_TTL_TIME", 5)),
+    FAMILY_STATIC: float(os.environ.get("RCON_CACHE_TTL_STATIC", 300)),
+})
+
+
+def _format_rcon_error(e: Exception) -> str:
+    """Map a low-level RCON exception to the user-facing error string."""
+    if isinstance(e, socket.timeout):
+        logger.error("RCON connection timed out")
+        return "Error: Connection timed out. Is the Minecraft server running?"
+
+    if isinstance(e, ConnectionRefusedError):
+        logger.error("RCON connection refused")
+        return "Error: Connection refused. Make sure Minecraft server is running and RCON is enabled."
+
+    error_msg = str(e)
+    logger.error(f"RCON error: {error_msg}")
+
+    if "Authentication failed" in error_msg or "invalid password" in error_msg.lower():
+        return "Error: Authentication failed. Check RCON password in settings."
+
+    if "timeout" in error_msg.lower():
+        return "Error: Connection timed out. Is the Minecraft server running?"
+
+    if "refused" in error_msg.lower():
+        return "Error: Connection refused. Make sure Minecraft server is running and RCON is enabled."
+
+    return f"Error: {error_msg}"
+
+
+def _is_unreachable(e: Exception) -> bool:
+    """True when an error means the server could not be reached at all."""
+    if isinstance(e, OSError):
+        return True
+    return str(e) in UNREACHABLE_ERRORS
+
+
+def split_command(command: str) -> List[str]:
+    """Split a command that exceeds the request size limit.
+
+    Chat commands (``say``, ``me``, ``tell``/``msg``/``w``) are broken into
+    several commands at word boundaries. Anything else that is too long
+    raises, since cutting it would change its meaning.
+    """
+    if len(command.encode('utf-8')) <= MAX_COMMAND_BYTES:
+        return [command]
+
+    parts = command.split(" ")
+    name = parts[0].lstrip("/")
+    if name not in SPLITTABLE_MESSAGE_COMMANDS:
+        raise Exception(f"Command too long ({len(command.encode('utf-8'))} bytes, limit {MAX_COMMAND_BYTES})")
+
+    prefix_len = 1 + SPLITTABLE_MESSAGE_COMMANDS[name]
+    prefix = " ".join(parts[:prefix_len]) + " "
+    budget = MAX_COMMAND_BYTES - len(prefix.encode('utf-8'))
+    # Every chunk must hold at least one character of the message
+    longest = max((len(char.encode('utf-8')) for char in " ".join(parts[prefix_len:])), default=1)
+    if budget < longest:
+        raise Exception(f"Command too long ({len(command.encode('utf-8'))} bytes, limit {MAX_COMMAND_BYTES})")
+
+    chunks = []
+    current = ""
+    for word in parts[prefix_len:]:
+        # Hard-wrap single words that are longer than a whole chunk
+        while len(word.encode('utf-8')) > budget:
+            cut = budget
+            while len(word[:cut].encode('utf-8')) > budget:
+                cut -= 1
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(word[:cut])
+            word = word[cut:]
+        candidate = f"{current} {word}" if current else word
+        if len(candidate.encode('utf-8')) > budget:
+            chunks.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return [prefix + chunk for chunk in chunks]
+
+
+def run_command(command: str, user_id: Optional[int] = None, priority: int = PRIORITY_INTERACTIVE):
     """Execute a command on the Minecraft server via RCON.
-    Creates a fresh connection for each command (thread-safe).
+    Reuses a pooled, already-authenticated connection when one is available.
     
     Args:
         command: The RCON command to execute
         user_id: User ID to use their specific server connection
+        priority: PRIORITY_BACKGROUND for polling that may be shed under load
     """
-    client = None
+    return run_commands([command], user_id, priority)[0]
+
+
+def _expand_commands(commands: List[str]):
+    """Split a batch into request-sized packets.
+
+    Returns ``(results, owners, packets)``: ``results`` is pre-filled with
+    errors for commands that cannot be sent, and ``owners[i]`` is the index
+    of the command that ``packets[i]`` belongs to.
+    """
+    results: List[Optional[str]] = [None] * len(commands)
+    owners = []
+    packets = []
+    for index, command in enumerate(commands):
+        try:
+            parts = split_command(command)
+        except Exception as e:
+            results[index] = _format_rcon_error(e)
+            continue
+        owners.extend([index] * len(parts))
+        packets.extend(parts)
+    return results, owners, packets
+
+
+def _merge_responses(results, owners, responses, error) -> List[str]:
+    """Fold per-packet responses back into one result per command."""
+    pieces = {}
+    for position, index in enumerate(owners):
+        pieces.setdefault(index, []).append(responses[position])
+    for index, chunk in pieces.items():
+        if any(response is None for response in chunk):
+            results[index] = error
+        else:
+            results[index] = "\n".join(response for response in chunk if response)
+    return results
+
+
+def run_commands(commands: List[str], user_id: Optional[int] = None,
+                 priority: int = PRIORITY_INTERACTIVE) -> List[str]:
+    """Execute several commands over a single pooled RCON connection.
+
+    The commands are pipelined and the responses returned in the same order
+    as ``commands``. Oversized chat commands are split into several packets
+    and their responses joined; other oversized commands get an error.
+    If the connection fails part way, commands that did not get a response
+    receive the error string instead, so callers can treat each entry
+    exactly like a ``run_command`` result.
+    """
+    if not commands:
+        return []
+
     try:
-        # Get config for this user
         cfg = get_rcon_config(user_id)
-        
-        # Create new connection
-        logger.debug(f"Connecting to RCON at {cfg['host']}:{cfg['port']}")
-        client = RconClient(cfg["host"], cfg["password"], port=cfg["port"], timeout=10)
-        client.connect()
-        
-        # Execute command
-        logger.debug(f"Executing command: {command}")
-        response = client.command(command)
-        
-        # Clean disconnect
-        client.disconnect()
-        logger.debug("Command executed successfully")
-        
-        return response
-        
-    except socket.timeout:
-        logger.error("RCON connection timed out")
-        return "Error: Connection timed out. Is the Minecraft server running?"
-        
-    except ConnectionRefusedError:
-        logger.error("RCON connection refused")
-        return "Error: Connection refused. Make sure Minecraft server is running and RCON is enabled."
-        
     except Exception as e:
-        error_msg = str(e)
-        logger.error(f"RCON error: {error_msg}")
-        
-        if "Authentication failed" in error_msg or "invalid password" in error_msg.lower():
-            return "Error: Authentication failed. Check RCON password in settings."
-        
-        if "timeout" in error_msg.lower():
-            return "Error: Connection timed out. Is the Minecraft server running?"
-        
-        if "refused" in error_msg.lower():
-            return "Error: Connection refused. Make sure Minecraft server is running and RCON is enabled."
-        
-        return f"Error: {error_msg}"
-        
+        return [_format_rcon_error(e)] * len(commands)
+
+    try:
+        reply = _gateway_request({
+            "op": "run",
+            "cfg": {"host": cfg["host"], "port": cfg["port"], "password": cfg["password"]},
+            "commands": commands,
+            "user_id": user_id,
+            "priority": priority,
+        })
+    except GatewayError as e:
+        # Sent already: the gateway may have run some of it, so never run it again here
+        logger.error(f"RCON gateway failed mid-request: {e}")
+        return [f"Error: RCON gateway failed mid-request ({e}); the command may have run."] * len(commands)
+    if reply is not None:
+        return reply["results"]
+    return execute_batch(cfg, commands, user_id, priority)
+
+
+def execute_batch(cfg: Dict[str, Any], commands: List[str], user_id: Optional[int] = None,
+                  priority: int = PRIORITY_INTERACTIVE) -> List[str]:
+    """Run a batch in this process against an already loaded config.
+
+    This is ``run_commands`` without the config lookup and gateway hop;
+    the gateway calls it with configs sent by the web workers.
+    """
+    results, owners, packets = _expand_commands(commands)
+    responses: List[Optional[str]] = [None] * len(packets)
+    error = _dispatch(cfg, packets, responses, user_id, priority) if packets else None
+    return _merge_responses(results, owners, responses, error)
+
+
+def _dispatch(cfg: Dict[str, Any], packets: List[str], responses: List[Optional[str]],
+              user_id: Optional[int], priority: int) -> Optional[str]:
+    """Answer a batch from the response cache where possible and run the rest.
+
+    Fills ``responses`` in place and returns an error string if the batch
+    could not be (fully) executed.
+    """
+    if _pool.note_config_generation(user_id, cfg["generation"]):
+        # Credentials changed; drop sockets opened with the old ones
+        reset_rcon_client(user_id)
+
+    # Same credentials too, so a tenant never sees a reply it could not fetch itself
+    server = (cfg["host"], cfg["port"], cfg["password"])
+    generation = _cache.generation(server)
+    live = _from_cache(server, packets, responses)
+    if not live:
+        return None
+
+    batch = [packets[position] for position in live]
+    batch_responses: List[Optional[str]] = [None] * len(batch)
+    error = _run_shared(cfg, batch, batch_responses, user_id, priority)
+    _to_cache(server, packets, live, batch_responses, responses, generation)
+    return error
+
+
+def _from_cache(server, packets: List[str], responses: List[Optional[str]]) -> List[int]:
+    """Fill ``responses`` from the cache; return the positions that must run live.
+
+    Hits are only served up to the first packet that may change what the
+    cache holds; every packet after it has to see that change.
+    """
+    live = []
+    writing = False
+    for position, packet in enumerate(packets):
+        cached = None if writing else _cache.get(server, packet)
+        if cached is None:
+            live.append(position)
+            writing = writing or changes_state(packet)
+        else:
+            responses[position] = cached
+    return live
+
+
+def _to_cache(server, packets: List[str], live: List[int], batch_responses: List[Optional[str]],
+              responses: List[Optional[str]], generation: int):
+    """Record the responses of the packets that ran, in order, invalidating after each write.
+
+    ``generation`` is the cache's generation when the batch started. A read
+    is stored only if no write has invalidated the server since, except the
+    batch's own writes that ran before it.
+    """
+    for position, response in zip(live, batch_responses):
+        packet = packets[position]
+        responses[position] = response
+        if changes_state(packet):
+            # Even a write without a reply may have run
+            after = _cache.invalidate_for(server, packet)
+            if after == generation + 1:
+                generation = after
+        elif response is not None:
+            _cache.put(server, packet, response, generation)
+
+
+def _run_shared(cfg: Dict[str, Any], packets: List[str], responses: List[Optional[str]],
+                user_id: Optional[int], priority: int) -> Optional[str]:
+    """Run a batch, sharing the result of an identical read-only batch in flight.
+
+    Callers of any priority share one flight; it is admitted at the most
+    urgent priority among them.
+    """
+    key = flight_key((cfg["host"], cfg["port"], cfg["password"]), packets)
+    if key is None:
+        return _admit(cfg, packets, responses, user_id, priority)
+
+    def leader(flight):
+        error = _admit(cfg, packets, responses, user_id, priority, flight)
+        return list(responses), error
+
+    shared, error = _flights.do(key, leader, priority)
+    responses[:] = shared
+    return error
+
+
+def _admit(cfg: Dict[str, Any], packets: List[str], responses: List[Optional[str]],
+           user_id: Optional[int], priority: int, flight: Optional[Flight] = None) -> Optional[str]:
+    """Admit a batch past the circuit breaker, scheduler and rate limits, then execute it.
+
+    With a ``flight``, its callers' most urgent priority is used instead of
+    ``priority``: background calls are dropped rather than queued, so one
+    dropped after an interactive caller joined is admitted again for it.
+    """
+    server = (cfg["host"], cfg["port"])
+
+    # Fail fast while the server is known to be unreachable
+    error = _breakers.before_call(server)
+    if error:
+        return error
+
+    while True:
+        if flight is not None:
+            priority = flight.priority
+        try:
+            with _scheduler.slot(user_id, server, priority=priority):
+                # Only calls the scheduler admitted spend tokens; background
+                # polls never wait for them, they are dropped instead
+                _rate_limiter.acquire(server, user_id, packets,
+                                      max_wait=0 if priority == PRIORITY_BACKGROUND else None)
+                return _execute(cfg, packets, responses, user_id)
+        except (QueueTimeout, RateLimited) as e:
+            if flight is not None and flight.priority < priority and isinstance(e, (RequestShed, RateLimited)):
+                continue
+            _breakers.cancel_trial(server)
+            return _format_rcon_error(e)
+
+
+def _execute(cfg: Dict[str, Any], packets: List[str], responses: List[Optional[str]],
+             user_id: Optional[int]) -> Optional[str]:
+    """Pipeline packets over a pooled connection and record the outcome."""
+    server = (cfg["host"], cfg["port"])
+    client = None
+    discard = False
+    started = previous = time.monotonic()
+    try:
+        logger.debug(f"Acquiring RCON connection to {cfg['host']}:{cfg['port']}")
+        client = _pool.acquire(cfg["host"], cfg["port"], cfg["password"], timeout=10, user_id=user_id,
+                               connect_timeout=_timeouts.connect_timeout(server))
+        if client.connect_rtt is not None:
+            _timeouts.record(server, CONNECT, client.connect_rtt)
+            client.connect_rtt = None
+
+        logger.debug(f"Executing batch of {len(packets)} commands")
+        # Time to the first response is one round trip plus server work;
+        # slow families would skew the estimate, so they are not sampled
+        sample = not _timeouts.is_slow(packets)
+        started = previous = time.monotonic()
+        for position, response in client.iter_commands(packets, timeout=_timeouts.command_timeout(server, packets)):
+            if sample:
+                _timeouts.record(server, COMMAND, time.monotonic() - started)
+                sample = False
+            if _capture:
+                # Pipelined responses arrive one after another; each is timed from
+                # its command going out or the previous response, whichever is later
+                now = time.monotonic()
+                _capture.record(f"{cfg['host']}:{cfg['port']}", user_id, packets[position],
+                                now - max(client.sent_at[position], previous), response=response)
+                previous = now
+            responses[position] = response
+        _breakers.record_success(server)
+        return None
+
+    except Exception as e:
+        # A failed socket may hold a half-read response; never hand it out again
+        discard = True
+        error = _format_rcon_error(e)
+        if _capture:
+            sent_at = client.sent_at if client else []
+            for position, (packet, response) in enumerate(zip(packets, responses)):
+                if response is None:
+                    # Timed like responses; commands never sent, from the last response
+                    sent = sent_at[position] if position < len(sent_at) else None
+                    _capture.record(f"{cfg['host']}:{cfg['port']}", user_id, packet,
+                                    time.monotonic() - max(sent or previous, previous), error=error)
+        if str(e) in ("Connection timeout", "Command timeout"):
+            _timeouts.record_timeout(server)
+        if _is_unreachable(e):
+            _breakers.record_failure(server, error)
+        else:
+            # The server answered, even if the command or login failed
+            _breakers.record_success(server)
+        return error
+
     finally:
-        # Ensure connection is closed
         if client:
-            try:
-                client.disconnect()
-            except Exception:
-                pass
+            _pool.release(client, discard=discard)
 
 
 def reset_rcon_client(user_id: Optional[int] = None):
-    """No-op function kept for backwards compatibility.
-    Since we don't pool connections anymore, there's nothing to reset.
-    """
-    pass
+    """Evict pooled connections and breaker state for a user's servers."""
+    for host, port, _ in _pool.invalidate_tenant(user_id):
+        _breakers.reset((host, port))
+
+
+def get_server_health(user_id: Optional[int] = None) -> Dict[str, Any]:
+    """Circuit breaker state for the user's configured server."""
+    cfg = get_rcon_config(user_id)
+    reply = _gateway_request({"op": "health", "server": [cfg["host"], cfg["port"]]}, read_only=True)
+    if reply is not None:
+        return reply["breaker"]
+    return _breakers.snapshot((cfg["host"], cfg["port"]))
+
+
+def get_timeout_estimates(user_id: Optional[int] = None) -> Dict[str, Dict[str, Optional[float]]]:
+    """Observed round-trip times and current connect/command timeouts for the user's server."""
+    cfg = get_rcon_config(user_id)
+    reply = _gateway_request({"op": "health", "server": [cfg["host"], cfg["port"]]}, read_only=True)
+    if reply is not None:
+        return reply["timeouts"]
+    return _timeouts.snapshot((cfg["host"], cfg["port"]))
+
+
+def get_scheduler_stats(user_id: Optional[int] = None) -> Dict[Any, Dict[str, Any]]:
+    """Per-tenant queue depth and wait times; all tenants when ``user_id`` is None."""
+    reply = _gateway_request({"op": "stats", "user_id": user_id}, read_only=True)
+    if reply is not None:
+        return reply["scheduler"]
+    if user_id is None:
+        return _scheduler.stats()
+    return _scheduler.stats(user_id)
+
+
+def get_singleflight_stats() -> Dict[str, int]:
+    """How many read-only batches ran, and how many shared another caller's run."""
+    reply = _gateway_request({"op": "stats"}, read_only=True)
+    if reply is not None:
+        return reply["singleflight"]
+    return _flights.stats()
+
+
+def get_rate_limit_stats() -> Dict[str, float]:
+    """Batches admitted, delayed for tokens, and rejected by the rate limiter."""
+    reply = _gateway_request({"op": "stats"}, read_only=True)
+    if reply is not None:
+        return reply["rate_limit"]
+    return _rate_limiter.stats()
+
+
+def get_cache_stats() -> Dict[str, Dict[str, float]]:
+    """Response cache hits, misses and invalidations per command family."""
+    reply = _gateway_request({"op": "stats"}, read_only=True)
+    if reply is not None:
+        return reply["cache"]
+    return _cache.stats()
 
 
 def is_rcon_error(response):
@@ -211,23 +842,31 @@ def parse_rcon_response(response):
     return {"success": True, "message": response, "data": response}
 
 
-def get_online_players(user_id: Optional[int] = None):
+def is_busy_response(response) -> bool:
+    """True if the call was shed, timed out in the scheduler queue, or rate limited."""
+    return str(response).startswith("Error: Server busy")
+
+
+def parse_online_players(response):
+    """Parse the player names out of a ``list`` response."""
+    # Handle errors silently
+    if not response or "Error" in response:
+        logger.debug("Could not get player list, returning empty")
+        return []
+    
+    # Parse response like "There are 2 of a max of 20 players online: player1, player2"
+    if "online:" in response:
+        players_str = response.split("online:")[1].strip()
+        if players_str:
+            return [p.strip() for p in players_str.split(",")]
+    
+    return []
+
+
+def get_online_players(user_id: Optional[int] = None, priority: int = PRIORITY_INTERACTIVE):
     """Get list of online players for a specific user's server"""
     try:
-        response = run_command("list", user_id)
-        
-        # Handle errors silently
-        if not response or "Error" in response:
-            logger.debug("Could not get player list, returning empty")
-            return []
-        
-        # Parse response like "There are 2 of a max of 20 players online: player1, player2"
-        if "online:" in response:
-            players_str = response.split("online:")[1].strip()
-            if players_str:
-                return [p.strip() for p in players_str.split(",")]
-        
-        return []
+        return parse_online_players(run_command("list", user_id, priority))
         
     except Exception as e:
         # Fail gracefully - don't block the application
@@ -0,0 +1,158 @@
+"""RCON packet codec.
+
+Encoding, decoding and response reassembly shared by the blocking and
+asyncio clients. Packets on the wire are::
+
+    length (int32 LE) | request id (int32 LE) | type (int32 LE) | payload | 0x00 0x00
+
+where ``length`` counts everything after itself.
+"""
+import logging
+import struct
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# RCON Protocol Constants
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+# Largest command payload the server accepts in one request packet
+MAX_COMMAND_BYTES = 1446
+
+# Sanity cap on incoming packets; anything larger means the stream is corrupt
+MAX_PACKET_LENGTH = 1 << 20
+
+# Precompiled layouts: the full header, the length prefix, and id + type
+HEADER = struct.Struct('<iii')
+LENGTH = struct.Struct('<i')
+ID_TYPE = struct.Struct('<ii')
+
+_PADDING = b'\x00\x00'
+
+
+def append_packet(buffer: bytearray, request_id: int, packet_type: int, payload: str):
+    """Append one encoded packet to ``buffer`` without intermediate copies."""
+    payload_bytes = payload.encode('utf-8')
+    if packet_type == SERVERDATA_EXECCOMMAND and len(payload_bytes) > MAX_COMMAND_BYTES:
+        raise Exception(f"Command too long ({len(payload_bytes)} bytes, limit {MAX_COMMAND_BYTES})")
+
+    buffer += HEADER.pack(len(payload_bytes) + 10, request_id, packet_type)
+    buffer += payload_bytes
+    buffer += _PADDING
+
+
+def encode_packet(request_id: int, packet_type: int, payload: str) -> bytearray:
+    """Encode one RCON packet, including its length prefix."""
+    buffer = bytearray()
+    append_packet(buffer, request_id, packet_type, payload)
+    return buffer
+
+
+def decode_packet(packet_data) -> Tuple[int, memoryview, int]:
+    """Decode the body of an RCON packet (everything after the length prefix).
+
+    The payload is returned as a memoryview over ``packet_data``.
+    """
+    request_id, packet_type = ID_TYPE.unpack_from(packet_data, 0)
+    payload = memoryview(packet_data)[8:-2]  # Remove trailing null bytes
+    return (request_id, payload, packet_type)
+
+
+class PacketReader:
+    """Read RCON packets from a blocking socket into one reusable buffer.
+
+    ``recv_into`` fills a preallocated bytearray, so pipelined replies that
+    arrive together are read with a single syscall and parsed in place. The
+    payload returned by ``read_packet`` is a memoryview into that buffer and
+    is only valid until the next call.
+    """
+
+    def __init__(self, sock, buffer_size: int = 16384):
+        self.socket = sock
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+    @property
+    def buffered(self) -> int:
+        """Number of received bytes not yet returned as packets."""
+        return self._end - self._start
+
+    def read_packet(self) -> Tuple[int, memoryview, int]:
+        """Return the next ``(request_id, payload, packet_type)``."""
+        while True:
+            available = self._end - self._start
+            needed = 4
+            if available >= 4:
+                length = LENGTH.unpack_from(self._buffer, self._start)[0]
+                if length < 10 or length > MAX_PACKET_LENGTH:
+                    raise Exception(f"Invalid RCON packet length {length}")
+                needed = 4 + length
+                if available >= needed:
+                    # Single pass over the header: length, id and type together
+                    _, request_id, packet_type = HEADER.unpack_from(self._buffer, self._start)
+                    payload = self._view[self._start + 12:self._start + needed - 2]
+                    self._start += needed
+                    return (request_id, payload, packet_type)
+            self._fill(needed)
+
+    def _fill(self, needed: int):
+        available = self._end - self._start
+        if available == 0:
+            self._start = self._end = 0
+        elif self._start + needed > len(self._buffer):
+            if needed > len(self._buffer):
+                # Grow to fit an unusually large packet; rarely taken
+                buffer = bytearray(max(needed, 2 * len(self._buffer)))
+                buffer[:available] = self._view[self._start:self._end]
+                self._view.release()
+                self._buffer = buffer
+                self._view = memoryview(buffer)
+            else:
+                self._view[:available] = self._view[self._start:self._end]
+            self._start, self._end = 0, available
+
+        received = self.socket.recv_into(self._view[self._end:])
+        if not received:
+            raise Exception("Connection closed by server")
+        self._end += received
+
+
+class ResponseCollector:
+    """Reassemble pipelined command responses using sentinel packets.
+
+    Each command is followed by an empty sentinel packet with its own
+    request id. The server answers packets in order, so once the
+    sentinel's reply arrives every fragment of the command's response has
+    been received.
+    """
+
+    def __init__(self):
+        self._fragments = {}   # command request id -> bytearray of payload so far
+        self._sentinels = {}   # sentinel request id -> (command request id, index)
+
+    @property
+    def pending(self) -> int:
+        return len(self._sentinels)
+
+    def expect(self, command_id: int, sentinel_id: int, index: int):
+        """Register a command/sentinel pair that has been sent."""
+        self._fragments[command_id] = bytearray()
+        self._sentinels[sentinel_id] = (command_id, index)
+
+    def feed(self, request_id: int, payload) -> Optional[Tuple[int, str]]:
+        """Consume a packet; return ``(index, response)`` once a command completes."""
+        fragments = self._fragments.get(request_id)
+        if fragments is not None:
+            fragments += payload
+        elif request_id in self._sentinels:
+            command_id, index = self._sentinels.pop(request_id)
+            response = self._fragments.pop(command_id)
+            return index, response.decode('utf-8', errors='ignore')
+        else:
+            logger.debug(f"Ignoring RCON packet with unexpected id {request_id}")
+        return None
@@ -0,0 +1,368 @@
+"""Pure-Python stand-in for a Minecraft server's RCON endpoint.
+
+Used by the tests, the benchmarks and ``rcon_capture``'s replay to
+exercise ``rcon_client`` and the command routes, pooling, pipelining and timeouts without a JVM. It speaks
+the real wire protocol and keeps a tiny world of online players so that
+``list``, ``data get entity``, ``give``, ``tp`` and ``locate`` answer like
+a vanilla server would.
+
+Run standalone::
+
+    python -m src.rcon_fake --port 25575 --password secret --latency 0.005
+
+or embed it::
+
+    with FakeRconServer(password="secret") as server:
+        host, port = server.address
+"""
+import argparse
+import logging
+import random
+import re
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.rcon_codec import (
+    SERVERDATA_AUTH,
+    SERVERDATA_AUTH_RESPONSE,
+    SERVERDATA_EXECCOMMAND,
+    SERVERDATA_RESPONSE_VALUE,
+    PacketReader,
+    append_packet,
+)
+
+logger = logging.getLogger(__name__)
+
+# Vanilla splits responses into packets of at most this many payload bytes
+MAX_RESPONSE_PAYLOAD = 4096
+
+_BARE_KEY = re.compile(r"[A-Za-z0-9_.+-]+")
+UNKNOWN_COMMAND = "Unknown or incomplete command, see below for error{0}<--[HERE]"
+
+
+def default_player(name: str) -> Dict[str, Any]:
+    """Entity data for a freshly joined survival player."""
+    return {
+        "Pos": [0.5, 64.0, 0.5],
+        "Health": 20.0,
+        "foodLevel": 20,
+        "XpLevel": 0,
+        "XpP": 0.0,
+        "XpTotal": 0,
+        "playerGameType": 0,
+        "Dimension": "minecraft:overworld",
+        "Inventory": [],
+        "EnderItems": [],
+        "active_effects": [],
+    }
+
+
+class Byte(int):
+    """An int that renders as an NBT byte (``3b``), e.g. inventory slots."""
+
+
+def to_snbt(value: Any) -> str:
+    """Render a Python value the way ``data get entity`` prints NBT."""
+    if isinstance(value, bool):
+        return "1b" if value else "0b"
+    if isinstance(value, Byte):
+        return f"{int(value)}b"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return f"{value}f"
+    if isinstance(value, str):
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    if isinstance(value, list):
+        # Positions and motion are doubles in vanilla
+        if len(value) == 3 and all(isinstance(v, float) for v in value):
+            return "[" + ", ".join(f"{v}d" for v in value) + "]"
+        return "[" + ", ".join(to_snbt(v) for v in value) + "]"
+    if isinstance(value, dict):
+        # Keys outside the bare-word alphabet (e.g. "minecraft:custom_name") are quoted
+        return "{" + ", ".join(
+            f"{k if _BARE_KEY.fullmatch(k) else to_snbt(k)}: {to_snbt(v)}" for k, v in value.items()
+        ) + "}"
+    raise TypeError(f"Cannot render {type(value).__name__} as SNBT")
+
+
+# Vanilla usage lines for the commands the fake server implements
+HELP_USAGES = {
+    "data": "(get|merge|modify|remove)",
+    "execute": "(align|anchored|as|at|facing|if|in|on|positioned|rotated|run|store|summon|unless)",
+    "give": "<targets> <item> [<count>]",
+    "help": "[<command>]",
+    "list": "[uuids]",
+    "locate": "(biome|poi|structure)",
+    "say": "<message>",
+    "teleport": "(<location>|<destination>|<targets>)",
+    "tp": "-> teleport",
+}
+
+
+class FakeRconServer:
+    """Threaded fake RCON server.
+
+    Args:
+        host, port: Bind address; port 0 picks a free port (see ``address``).
+        password: Accepted RCON password.
+        players: Initial online players, name -> entity data overrides.
+        latency, jitter: Seconds added before each command response, as
+            ``latency`` plus a uniform offset in ``[-jitter, jitter]``.
+        drop_rate: Probability of closing the connection instead of answering
+            a command.
+        fail_auth: Reject every login, whatever the password.
+        max_payload: Split responses into packets of at most this many bytes.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password: str = "password",
+                 players: Optional[Dict[str, Dict[str, Any]]] = None, latency: float = 0.0,
+                 jitter: float = 0.0, drop_rate: float = 0.0, fail_auth: bool = False,
+                 max_payload: int = MAX_RESPONSE_PAYLOAD, max_players: int = 20):
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.fail_auth = fail_auth
+        self.max_payload = max_payload
+        self.max_players = max_players
+        self.players: Dict[str, Dict[str, Any]] = {}
+        for name, data in (players or {}).items():
+            self.players[name] = {**default_player(name), **data}
+        self.handlers: Dict[str, Callable[[list], str]] = {
+            "list": self._list,
+            "data": self._data,
+            "give": self._give,
+            "tp": self._tp,
+            "teleport": self._tp,
+            "locate": self._locate,
+            "execute": self._execute,
+            "help": self._help,
+            "say": lambda args: "",
+        }
+        self.stats = {"connections": 0, "auth_failures": 0, "commands": 0, "dropped": 0}
+        self.log = []   # commands received, in order
+        self._lock = threading.Lock()
+        self._connections = set()   # accepted sockets still open
+        self._stopped = False
+        self._server = socketserver.ThreadingTCPServer((host, port), self._make_handler(), bind_and_activate=False)
+        self._server.daemon_threads = True
+        self._server.allow_reuse_address = True
+        self._server.server_bind()
+        self._server.server_activate()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-rcon", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop accepting and close every open connection, as a server shutting down would."""
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            self._stopped = True
+            connections, self._connections = list(self._connections), set()
+        for sock in connections:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def respond(self, name: str, handler: Callable[[list], str]):
+        """Script the response for a command name; ``handler`` gets the argument list."""
+        self.handlers[name] = handler
+
+    def execute(self, command: str) -> str:
+        """Run one command against the fake world and return the response text."""
+        parts = command.strip().lstrip("/").split()
+        if not parts:
+            return UNKNOWN_COMMAND.format("")
+        with self._lock:
+            self.stats["commands"] += 1
+            self.log.append(command)
+            handler = self.handlers.get(parts[0])
+            if handler is None:
+                return UNKNOWN_COMMAND.format(" " + command)
+            return handler(parts[1:])
+
+    # --- connection handling -------------------------------------------
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with fake._lock:
+                    if fake._stopped:
+                        return   # accepted just before stop(); socketserver closes it
+                    fake.stats["connections"] += 1
+                    fake._connections.add(self.request)
+                # Answers go out one packet per write; don't let Nagle hold them back
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                fake._serve(self.request)
+
+        return Handler
+
+    def _serve(self, sock: socket.socket):
+        reader = PacketReader(sock)
+        authenticated = False
+        try:
+            while True:
+                request_id, payload, packet_type = reader.read_packet()
+                text = bytes(payload).decode("utf-8", errors="replace")
+                out = bytearray()
+                if packet_type == SERVERDATA_AUTH:
+                    authenticated = not self.fail_auth and text == self.password
+                    if not authenticated:
+                        with self._lock:
+                            self.stats["auth_failures"] += 1
+                    append_packet(out, request_id if authenticated else -1, SERVERDATA_AUTH_RESPONSE, "")
+                elif not authenticated:
+                    # Vanilla drops unauthenticated connections
+                    return
+                elif packet_type == SERVERDATA_EXECCOMMAND:
+                    self._delay()
+                    if self.drop_rate and random.random() < self.drop_rate:
+                        with self._lock:
+                            self.stats["dropped"] += 1
+                        return
+                    for chunk in self._split_response(self.execute(text)):
+                        append_packet(out, request_id, SERVERDATA_RESPONSE_VALUE, chunk)
+                else:
+                    append_packet(out, request_id, SERVERDATA_RESPONSE_VALUE, f"Unknown request {packet_type:x}")
+                sock.sendall(out)
+        except Exception as e:
+            logger.debug(f"Fake RCON connection ended: {e}")
+        finally:
+            with self._lock:
+                self._connections.discard(sock)
+            sock.close()
+
+    def _split_response(self, response: str):
+        """Cut a response into packet payloads of at most ``max_payload`` bytes."""
+        chunks = []
+        current, size = [], 0
+        for char in response:
+            width = len(char.encode("utf-8"))
+            if size + width > self.max_payload:
+                chunks.append("".join(current))
+                current, size = [], 0
+            current.append(char)
+            size += width
+        chunks.append("".join(current))
+        return chunks
+
+    def _delay(self):
+        delay = self.latency + (random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    # --- scripted commands ----------------------------------------------
+
+    def _list(self, args):
+        names = ", ".join(self.players)
+        return f"There are {len(self.players)} of a max of {self.max_players} players online: {names}"
+
+    def _data(self, args):
+        if len(args) < 2 or args[0] != "get" or args[1] != "entity":
+            return UNKNOWN_COMMAND.format(" data " + " ".join(args))
+        if len(args) < 3 or args[2] not in self.players:
+            return "No entity was found"
+        name = args[2]
+        entity = self.players[name]
+        if len(args) == 3:
+            return f"{name} has the following entity data: {to_snbt(entity)}"
+        path = args[3]
+        if path not in entity:
+            return f"Found no elements matching {path}"
+        return f"{name} has the following entity data: {to_snbt(entity[path])}"
+
+    def _give(self, args):
+        if len(args) < 2:
+            return UNKNOWN_COMMAND.format(" give " + " ".join(args))
+        name, item = args[0], args[1]
+        count = int(args[2]) if len(args) > 2 and args[2].isdigit() else 1
+        if name not in self.players:
+            return "No player was found"
+        item_id = item if ":" in item else f"minecraft:{item}"
+        inventory = self.players[name]["Inventory"]
+        inventory.append({"Slot": Byte(len(inventory)), "id": item_id, "count": count})
+        display = item_id.split(":", 1)[1].replace("_", " ").title()
+        return f"Gave {count} [{display}] to {name}"
+
+    def _tp(self, args):
+        if len(args) != 4 or args[0] not in self.players:
+            return "No entity was found" if args else UNKNOWN_COMMAND.format(" tp")
+        try:
+            pos = [float(v) for v in args[1:4]]
+        except ValueError:
+            return "Expected double"
+        self.players[args[0]]["Pos"] = pos
+        return f"Teleported {args[0]} to {pos[0]:.6f}, {pos[1]:.6f}, {pos[2]:.6f}"
+
+    def _locate(self, args):
+        if len(args) < 2:
+            return UNKNOWN_COMMAND.format(" locate")
+        target = args[1]
+        x, z = random.randint(-2000, 2000) // 16 * 16, random.randint(-2000, 2000) // 16 * 16
+        distance = int((x * x + z * z) ** 0.5)
+        return f"The nearest {target} is at [{x}, ~, {z}] ({distance} blocks away)"
+
+    def _execute(self, args):
+        # Only "execute ... run <command>" is needed by Mineboard
+        if "run" not in args:
+            return UNKNOWN_COMMAND.format(" execute")
+        handler = self.handlers.get(args[args.index("run") + 1])
+        rest = args[args.index("run") + 2:]
+        return handler(rest) if handler else UNKNOWN_COMMAND.format(" execute")
+
+    def _help(self, args):
+        # Long enough to span several packets, like vanilla's help output
+        commands = [f"{name} {HELP_USAGES.get(name, '[<arguments>]')}".rstrip() for name in sorted(self.handlers)]
+        commands += [f"example{i} <target> [<arguments>]" for i in range(300)]
+        return "".join(f"/{name}\n" for name in commands)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Minecraft RCON server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=25575)
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--players", default="Steve,Alex", help="comma-separated online players")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per command")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="probability of dropping a connection")
+    parser.add_argument("--fail-auth", action="store_true", help="reject every login")
+    args = parser.parse_args()
+
+    players = {name: {} for name in args.players.split(",") if name}
+    server = FakeRconServer(args.host, args.port, args.password, players=players, latency=args.latency,
+                            jitter=args.jitter, drop_rate=args.drop_rate, fail_auth=args.fail_auth)
+    host, port = server.address
+    print(f"Fake RCON server listening on {host}:{port}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Optional RCON gateway shared by all web worker processes.
+
+Every gunicorn worker otherwise keeps its own connection pool, response
+cache, circuit breakers and scheduler, which multiplies sockets to each
+Minecraft server and splits cache hit rates. The gateway is one local
+process that owns all of that; workers send it batches over a Unix
+domain socket.
+
+Start it next to the web server::
+
+    python -m src.rcon_gateway --socket /tmp/mineboard-rcon.sock
+
+and set ``RCON_GATEWAY_SOCKET`` to the same path for the web workers.
+``run_command`` and friends then go through the gateway transparently,
+and fall back to running in-process if it cannot be connected to. Once
+a request has been sent it is never re-run elsewhere: if the reply does
+not arrive, the gateway may already have executed some of the commands.
+
+Frames on the socket are a 4-byte big-endian length followed by a UTF-8
+JSON object. Requests carry an ``op`` (``run``, ``health`` or ``stats``);
+replies carry ``ok`` and either the result fields or ``error``.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME = 16 << 20
+
+
+class GatewayUnavailable(Exception):
+    """Raised when the gateway cannot be reached; nothing was sent to it."""
+
+
+class GatewayError(Exception):
+    """Raised when a request was sent but no usable reply came back.
+
+    The gateway may have run the request, or part of it, so it must not
+    be retried anywhere else.
+    """
+
+
+def send_frame(sock: socket.socket, message: Dict[str, Any]):
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    sock.sendall(FRAME_HEADER.pack(len(body)) + body)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """Read one frame; None on a clean EOF between frames."""
+    header = _recv_exact(sock, FRAME_HEADER.size, eof_ok=True)
+    if header is None:
+        return None
+    length = FRAME_HEADER.unpack(header)[0]
+    if length > MAX_FRAME:
+        raise GatewayError(f"Gateway frame too large ({length} bytes)")
+    return json.loads(_recv_exact(sock, length))
+
+
+def _recv_exact(sock, size, eof_ok=False):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            if eof_ok and received == 0:
+                return None
+            raise GatewayError("Gateway closed the connection")
+        received += count
+    return buffer
+
+
+class GatewayClient:
+    """Worker-side connection to the gateway, one socket per thread."""
+
+    def __init__(self, path: str, timeout: float = 120):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request and return the reply.
+
+        Raises ``GatewayUnavailable`` if the gateway could not be connected
+        to, and ``GatewayError`` for any failure once sending has started.
+        """
+        sock = self._socket()
+        try:
+            send_frame(sock, message)
+            reply = recv_frame(sock)
+            if reply is None:
+                raise GatewayError("Gateway closed the connection")
+        except (OSError, ValueError, GatewayError) as e:
+            self._close()
+            raise GatewayError(str(e) or type(e).__name__)
+        if not reply.get("ok"):
+            raise GatewayError(reply.get("error", "Gateway error"))
+        return reply
+
+    def _socket(self) -> socket.socket:
+        # A socket inherited across fork() would be shared with the parent
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.sock = None
+            self._local.pid = os.getpid()
+        if self._local.sock is not None and not _is_open(self._local.sock):
+            # The gateway restarted since this socket was used; nothing was sent on it yet
+            self._close()
+        if self._local.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError as e:
+                sock.close()
+                raise GatewayUnavailable(f"Cannot connect to gateway at {self.path}: {e}")
+            self._local.sock = sock
+        return self._local.sock
+
+    def _close(self):
+        sock, self._local.sock = getattr(self._local, "sock", None), None
+        if sock:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+
+def _is_open(sock: socket.socket) -> bool:
+    """Whether an idle connection is still usable (no EOF or stray data waiting)."""
+    try:
+        sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT)
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+class RconGateway:
+    """Serve RCON batches for web workers over a Unix domain socket."""
+
+    def __init__(self, path: str):
+        # Imported here: rcon_client itself imports this module for the client side
+        from src import rcon_client
+        # The gateway always runs batches itself, whatever its environment says
+        rcon_client._gateway = None
+        self.rcon = rcon_client
+        self.path = path
+        self._lock = threading.Lock()
+        self._credentials: Dict[Any, tuple] = {}   # user_id -> ((host, port, password), generation)
+
+        if os.path.exists(path):
+            os.unlink(path)   # left over from a previous run
+        self._server = socketserver.ThreadingUnixStreamServer(path, self._make_handler())
+        self._server.daemon_threads = True
+        os.chmod(path, 0o660)
+
+    def serve_forever(self):
+        logger.info(f"RCON gateway listening on {self.path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def shutdown(self):
+        self._server.shutdown()
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        op = message.get("op")
+        if op == "run":
+            cfg = self._with_generation(message.get("user_id"), message["cfg"])
+            results = self.rcon.execute_batch(cfg, message["commands"], message.get("user_id"),
+                                              message.get("priority", self.rcon.PRIORITY_INTERACTIVE))
+            return {"ok": True, "results": results}
+        if op == "health":
+            server = tuple(message["server"])
+            return {
+                "ok": True,
+                "breaker": self.rcon._breakers.snapshot(server),
+                "timeouts": self.rcon._timeouts.snapshot(server),
+            }
+        if op == "stats":
+            user_id = message.get("user_id")
+            scheduler = self.rcon._scheduler.stats() if user_id is None else self.rcon._scheduler.stats(user_id)
+            return {
+                "ok": True,
+                "scheduler": {str(tenant): stats for tenant, stats in scheduler.items()},
+                "singleflight": self.rcon._flights.stats(),
+                "cache": self.rcon._cache.stats(),
+                "rate_limit": self.rcon._rate_limiter.stats(),
+            }
+        return {"ok": False, "error": f"Unknown gateway op {op!r}"}
+
+    def _with_generation(self, user_id, cfg: Dict[str, Any]) -> Dict[str, Any]:
+        """Number credential changes here; worker processes each count their own."""
+        credentials = (cfg["host"], cfg["port"], cfg["password"])
+        with self._lock:
+            previous = self._credentials.get(user_id)
+            generation = previous[1] if previous else 0
+            if previous is None or previous[0] != credentials:
+                generation += 1
+            self._credentials[user_id] = (credentials, generation)
+        return {**cfg, "generation": generation}
+
+    def _make_handler(self):
+        gateway = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        message = recv_frame(self.request)
+                    except (OSError, ValueError, GatewayError) as e:
+                        logger.debug(f"Gateway connection ended: {e}")
+                        return
+                    if message is None:
+                        return
+                    try:
+                        reply = gateway.handle(message)
+                    except Exception as e:
+                        logger.exception("Gateway request failed")
+                        reply = {"ok": False, "error": str(e)}
+                    try:
+                        send_frame(self.request, reply)
+                    except OSError:
+                        return
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mineboard RCON gateway")
+    parser.add_argument("--socket", default=os.environ.get("RCON_GATEWAY_SOCKET", "/tmp/mineboard-rcon.sock"))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    RconGateway(args.socket).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Token-bucket rate limiting of RCON commands.
+
+RCON commands run on the Minecraft server's main thread, so bursts from
+kits, bulk actions or double clicks cost the server tick time. Every
+command that reaches a server takes a token from that server's bucket
+and from the sending user's bucket; heavy commands (``fill``, ``clone``,
+``summon``, ``locate``, ``kill @e`` ...) also take one from a much smaller
+per-server heavy bucket.
+
+A batch that cannot be served right away reserves its tokens and waits
+for them, up to ``max_wait``; one that would have to wait longer is
+rejected without consuming anything.
+"""
+import threading
+import time
+from typing import Dict, Hashable, Iterable, Optional
+
+from src.rcon_timeouts import command_family
+
+# Command families with their own, stricter per-server budget
+HEAVY_COMMANDS = ("fill", "fillbiome", "clone", "summon", "locate", "locatebiome", "place", "forceload")
+
+
+class RateLimited(Exception):
+    """Raised when a batch would have to wait longer than allowed for tokens."""
+
+
+def is_heavy(command: str) -> bool:
+    family = command_family(command)
+    if family in HEAVY_COMMANDS:
+        return True
+    # Killing every entity walks all loaded chunks
+    return family == "kill" and "@e" in command
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``.
+
+    The balance may go negative: that is tokens reserved by callers who
+    are waiting for them.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def wait_for(self, cost: float, now: float) -> float:
+        """Seconds until ``cost`` tokens would be available."""
+        # ``now`` may predate a bucket created after the caller read the clock
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def take(self, cost: float):
+        self.tokens -= cost
+
+
+class RateLimiter:
+    """Per-server, per-user and per-server heavy-command token buckets.
+
+    A rate of 0 disables that bucket.
+    """
+
+    def __init__(self, server_rate: float = 20, server_burst: float = 40,
+                 user_rate: float = 10, user_burst: float = 20,
+                 heavy_rate: float = 0.5, heavy_burst: float = 4, max_wait: float = 5):
+        self.limits = {
+            "server": (server_rate, server_burst),
+            "user": (user_rate, user_burst),
+            "heavy": (heavy_rate, heavy_burst),
+        }
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._buckets: Dict[tuple, TokenBucket] = {}
+        self._stats = {"admitted": 0, "delayed": 0, "rejected": 0, "total_delay": 0.0}
+
+    def acquire(self, server: Hashable, user_id: Optional[Hashable], commands: Iterable[str],
+                max_wait: Optional[float] = None):
+        """Wait until the batch may be sent, or raise ``RateLimited``."""
+        wait = self.reserve(server, user_id, commands, max_wait)
+        if wait:
+            time.sleep(wait)
+
+    def reserve(self, server: Hashable, user_id: Optional[Hashable], commands: Iterable[str],
+                max_wait: Optional[float] = None) -> float:
+        """Take the batch's tokens and return how long to wait before sending it.
+
+        ``acquire`` without the sleep, for callers that must not block
+        (the asyncio client). Raises ``RateLimited`` like ``acquire``.
+        """
+        commands = list(commands)
+        max_wait = self.max_wait if max_wait is None else max_wait
+        costs = {
+            ("server", server): len(commands),
+            ("user", user_id): len(commands),
+            ("heavy", server): sum(1 for command in commands if is_heavy(command)),
+        }
+        now = time.monotonic()
+        with self._lock:
+            buckets = []
+            wait = 0.0
+            for key, cost in costs.items():
+                rate, burst = self.limits[key[0]]
+                if not cost or not rate:
+                    continue
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(rate, burst)
+                wait = max(wait, bucket.wait_for(cost, now))
+                buckets.append((bucket, cost))
+            if wait > max_wait:
+                self._stats["rejected"] += 1
+                raise RateLimited(f"Server busy - rate limit exceeded, retry in {wait:.1f}s")
+            # Reserve now so later callers queue behind this one
+            for bucket, cost in buckets:
+                bucket.take(cost)
+            self._stats["admitted"] += 1
+            if wait:
+                self._stats["delayed"] += 1
+                self._stats["total_delay"] += wait
+        return wait
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        delayed = stats.pop("total_delay")
+        stats["avg_delay_ms"] = round(1000 * delayed / stats["delayed"], 2) if stats["delayed"] else 0.0
+        return stats
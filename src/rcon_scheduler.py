@@ -0,0 +1,202 @@
+"""Fair scheduling of RCON work across tenants.
+
+Every RCON call takes a slot from the scheduler first. Slots are bounded
+globally, per tenant and per server (bulkheads), so one tenant with a slow
+or flooded server cannot occupy every worker thread. When slots are
+scarce, waiting calls are granted round-robin across tenants, and a call
+that is still queued when its deadline passes is rejected.
+
+Calls come in two priority classes. Interactive calls (user clicks) are
+always granted before background polling, and background calls may not
+take a server's last free slot. When a server is saturated, background
+calls are shed immediately instead of queueing.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Optional
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+
+
+class QueueTimeout(Exception):
+    """Raised when a call waited in the scheduler queue past its deadline."""
+
+
+class RequestShed(QueueTimeout):
+    """Raised when a background call is dropped because its server is saturated."""
+
+
+class _Waiter:
+    __slots__ = ("tenant", "server", "priority", "enqueued_at", "deadline", "granted", "event")
+
+    def __init__(self, tenant, server, priority, deadline):
+        self.tenant = tenant
+        self.server = server
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.deadline = deadline
+        self.granted = False
+        self.event = threading.Event()
+
+
+class _TenantStats:
+    __slots__ = ("running", "queued", "granted", "rejected", "shed", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.running = 0
+        self.queued = 0
+        self.granted = 0
+        self.rejected = 0
+        self.shed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class RconScheduler:
+    """Bounded, round-robin fair admission for RCON calls."""
+
+    def __init__(self, global_limit: int = 32, per_tenant_limit: int = 4,
+                 per_server_limit: int = 4, queue_timeout: float = 10):
+        self.global_limit = global_limit
+        self.per_tenant_limit = per_tenant_limit
+        self.per_server_limit = per_server_limit
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._running = 0
+        self._server_running: Dict[Hashable, int] = {}
+        # Per priority: tenant -> waiters in arrival order, and tenants in turn order
+        self._queues: Dict[int, Dict[Hashable, deque]] = {p: {} for p in PRIORITIES}
+        self._rings: Dict[int, deque] = {p: deque() for p in PRIORITIES}
+        self._stats: Dict[Hashable, _TenantStats] = {}
+
+    @contextmanager
+    def slot(self, tenant: Hashable, server: Hashable, timeout: Optional[float] = None,
+             priority: int = PRIORITY_INTERACTIVE):
+        """Hold an execution slot for ``tenant`` on ``server`` for the block."""
+        self.acquire(tenant, server, timeout, priority)
+        try:
+            yield
+        finally:
+            self.release(tenant, server)
+
+    def acquire(self, tenant: Hashable, server: Hashable, timeout: Optional[float] = None,
+                priority: int = PRIORITY_INTERACTIVE):
+        """Wait for a slot; raise ``QueueTimeout`` once the deadline passes.
+
+        Background calls raise ``RequestShed`` straight away when the server
+        has no slot left for them.
+        """
+        deadline = time.monotonic() + (self.queue_timeout if timeout is None else timeout)
+        with self._lock:
+            stats = self._stats.setdefault(tenant, _TenantStats())
+            waiter = _Waiter(tenant, server, priority, deadline)
+            # Fast path: nobody of equal or higher priority is waiting and there is room
+            waiting = any(self._rings[p] for p in PRIORITIES if p <= priority)
+            if not waiting and self._has_room(tenant, server, priority):
+                self._grant_locked(waiter)
+                return
+            if priority == PRIORITY_BACKGROUND and not self._has_room(tenant, server, priority):
+                stats.shed += 1
+                raise RequestShed("Server busy - background request shed")
+            queue = self._queues[priority].setdefault(tenant, deque())
+            if not queue:
+                self._rings[priority].append(tenant)
+            queue.append(waiter)
+            stats.queued += 1
+            self._dispatch_locked()
+
+        waiter.event.wait(max(0, deadline - time.monotonic()))
+        with self._lock:
+            if waiter.granted:
+                return
+            self._remove_locked(waiter)
+            stats.rejected += 1
+        raise QueueTimeout("Server busy - request expired in queue")
+
+    def release(self, tenant: Hashable, server: Hashable):
+        with self._lock:
+            self._running -= 1
+            self._stats[tenant].running -= 1
+            self._server_running[server] -= 1
+            if not self._server_running[server]:
+                del self._server_running[server]
+            self._dispatch_locked()
+
+    def stats(self, tenant: Optional[Hashable] = None) -> Dict[Any, Dict[str, Any]]:
+        """Queue depth, running calls and wait times, per tenant."""
+        with self._lock:
+            items = self._stats.items() if tenant is None else [(tenant, self._stats.get(tenant, _TenantStats()))]
+            return {
+                key: {
+                    "queued": s.queued,
+                    "running": s.running,
+                    "granted": s.granted,
+                    "rejected": s.rejected,
+                    "shed": s.shed,
+                    "avg_wait_ms": round(1000 * s.total_wait / s.granted, 2) if s.granted else 0.0,
+                    "max_wait_ms": round(1000 * s.max_wait, 2),
+                }
+                for key, s in items
+            }
+
+    def _has_room(self, tenant, server, priority) -> bool:
+        server_limit = self.per_server_limit
+        if priority == PRIORITY_BACKGROUND and server_limit > 1:
+            # Keep one slot per server free for interactive calls
+            server_limit -= 1
+        return (
+            self._running < self.global_limit
+            and self._stats[tenant].running < self.per_tenant_limit
+            and self._server_running.get(server, 0) < server_limit
+        )
+
+    def _grant_locked(self, waiter: _Waiter):
+        waited = time.monotonic() - waiter.enqueued_at
+        stats = self._stats[waiter.tenant]
+        stats.running += 1
+        stats.granted += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+        self._running += 1
+        self._server_running[waiter.server] = self._server_running.get(waiter.server, 0) + 1
+        waiter.granted = True
+        waiter.event.set()
+
+    def _dispatch_locked(self):
+        """Grant slots by priority, round-robin across tenants within a priority."""
+        now = time.monotonic()
+        for priority in PRIORITIES:
+            ring = self._rings[priority]
+            idle_turns = 0
+            while ring and idle_turns < len(ring) and self._running < self.global_limit:
+                tenant = ring[0]
+                ring.rotate(-1)
+                granted = None
+                for waiter in self._queues[priority][tenant]:
+                    if waiter.deadline <= now:
+                        continue  # its own thread will reject it
+                    if self._has_room(tenant, waiter.server, priority):
+                        granted = waiter
+                        break
+                if granted is None:
+                    idle_turns += 1
+                    continue
+                idle_turns = 0
+                self._remove_locked(granted)
+                self._grant_locked(granted)
+
+    def _remove_locked(self, waiter: _Waiter):
+        queues = self._queues[waiter.priority]
+        queue = queues.get(waiter.tenant)
+        if not queue or waiter not in queue:
+            return
+        queue.remove(waiter)
+        self._stats[waiter.tenant].queued -= 1
+        if not queue:
+            del queues[waiter.tenant]
+            self._rings[waiter.priority].remove(waiter.tenant)
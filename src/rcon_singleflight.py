@@ -0,0 +1,115 @@
+"""Coalescing of identical in-flight read-only RCON commands.
+
+Every open dashboard tab polls ``list``, so a server watched by several
+admins sees the same query many times at once. ``SingleFlight`` lets the
+first caller (the leader) run the query while identical concurrent calls
+wait for and share its result. Only commands classified as read-only by
+``is_read_only`` are ever merged; anything that may change the world
+always runs on its own.
+
+Callers of every priority share a flight, which records the most urgent
+priority among them, so a background poll that a user click joined can
+be admitted as interactive.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+# Commands (as word prefixes) that only read server state
+READ_ONLY_PREFIXES = (
+    ("list",),
+    ("data", "get"),
+    ("time", "query"),
+    ("seed",),
+    ("help",),
+    ("banlist",),
+    ("whitelist", "list"),
+    ("scoreboard", "players", "get"),
+    ("scoreboard", "players", "list"),
+    ("scoreboard", "objectives", "list"),
+)
+
+
+def normalize_command(command: str) -> str:
+    """Canonical form of a command: no leading slash, single spaces."""
+    return " ".join(command.strip().lstrip("/").split())
+
+
+def is_read_only(command: str) -> bool:
+    """True if ``command`` cannot change the world, so sharing its result is safe."""
+    words = tuple(normalize_command(command).split(" "))
+    return any(words[:len(prefix)] == prefix for prefix in READ_ONLY_PREFIXES)
+
+
+def flight_key(server: Hashable, commands: Iterable[str]) -> Optional[Tuple]:
+    """Key under which a batch may be coalesced, or None if it must run alone."""
+    normalized = []
+    for command in commands:
+        if not is_read_only(command):
+            return None
+        normalized.append(normalize_command(command))
+    return (server, tuple(normalized))
+
+
+class Flight:
+    """One running call, and the most urgent priority (the lowest number) among its callers."""
+
+    __slots__ = ("event", "result", "error", "followers", "priority")
+
+    def __init__(self, priority: int):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self.priority = priority
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Flight] = {}
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[Flight], Any], priority: int = 0) -> Any:
+        """Return ``fn(flight)``, or the result of an identical call already running.
+
+        A follower more urgent than the running call lowers
+        ``flight.priority`` to its own, which ``fn`` may check as it goes.
+        Followers get the leader's return value (or its exception) as-is,
+        so it must not be mutated by the caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Flight(priority)
+                self._executed += 1
+            else:
+                call.followers += 1
+                self._shared += 1
+                call.priority = min(call.priority, priority)
+
+        if not leader:
+            # The leader's own deadlines (queue, pool, socket) bound this wait
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(call)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Calls executed, calls served from another caller's flight, and calls running."""
+        with self._lock:
+            return {"executed": self._executed, "shared": self._shared, "in_flight": len(self._calls)}
@@ -0,0 +1,120 @@
+"""Adaptive RCON timeouts from observed round-trip times.
+
+A fixed 10 second timeout is too long for a LAN server that answers in
+2 ms and too short for a heavy ``locate`` on a slow link. ``AdaptiveTimeouts``
+keeps, per server, a smoothed RTT and RTT variance for connects and for
+commands (as TCP does for retransmission timeouts) and derives each
+timeout as ``srtt + 4 * rttvar``, clamped to a floor and ceiling. Until a
+server has been measured, the ceiling is used. Known slow command
+families get a fixed minimum instead, and their timings are kept out of
+the estimate.
+"""
+import threading
+from typing import Dict, Hashable, Iterable, Optional
+
+CONNECT = "connect"
+COMMAND = "command"
+
+# Commands that can legitimately run for a long time on the server
+SLOW_COMMANDS = ("locate", "locatebiome", "fill", "fillbiome", "clone", "forceload", "save-all")
+
+# EWMA gains from RFC 6298
+_ALPHA = 1 / 8
+_BETA = 1 / 4
+
+
+def command_family(command: str) -> str:
+    """Name of the command that actually runs, looking through ``execute ... run``."""
+    words = command.strip().lstrip("/").split()
+    while words and words[0] == "execute" and "run" in words:
+        words = words[words.index("run") + 1:]
+    return words[0] if words else ""
+
+
+class _Estimate:
+    __slots__ = ("srtt", "rttvar", "samples")
+
+    def __init__(self):
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.samples = 0
+
+    def add(self, rtt: float):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - _BETA) * self.rttvar + _BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - _ALPHA) * self.srtt + _ALPHA * rtt
+        self.samples += 1
+
+
+class AdaptiveTimeouts:
+    """Per-server connect and command timeouts.
+
+    Args:
+        floors, ceilings: Bounds per kind (``CONNECT`` / ``COMMAND``), seconds.
+        slow_command_timeout: Minimum command timeout for ``SLOW_COMMANDS``.
+    """
+
+    def __init__(self, floors: Dict[str, float], ceilings: Dict[str, float],
+                 slow_command_timeout: float = 60, slow_commands: Iterable[str] = SLOW_COMMANDS):
+        self.floors = floors
+        self.ceilings = ceilings
+        self.slow_command_timeout = slow_command_timeout
+        self.slow_commands = frozenset(slow_commands)
+        self._lock = threading.Lock()
+        self._estimates: Dict[tuple, _Estimate] = {}
+
+    def connect_timeout(self, server: Hashable) -> float:
+        return self._timeout(server, CONNECT)
+
+    def command_timeout(self, server: Hashable, commands: Iterable[str] = ()) -> float:
+        """Per-read timeout for a batch; slow families get at least their minimum."""
+        timeout = self._timeout(server, COMMAND)
+        if self.is_slow(commands):
+            timeout = max(timeout, self.slow_command_timeout)
+        return timeout
+
+    def is_slow(self, commands: Iterable[str]) -> bool:
+        return any(command_family(command) in self.slow_commands for command in commands)
+
+    def record(self, server: Hashable, kind: str, rtt: float):
+        """Fold one successful round trip into the server's estimate."""
+        with self._lock:
+            self._estimates.setdefault((server, kind), _Estimate()).add(rtt)
+
+    def record_timeout(self, server: Hashable):
+        """Forget a server's estimates so its next calls get the full ceiling.
+
+        Otherwise a server that slowed down would keep being cut off at a
+        timeout learned while it was fast.
+        """
+        with self._lock:
+            self._estimates.pop((server, CONNECT), None)
+            self._estimates.pop((server, COMMAND), None)
+
+    def snapshot(self, server: Hashable) -> Dict[str, Dict[str, Optional[float]]]:
+        """Smoothed RTT, variance and current timeout per kind, for display."""
+        result = {}
+        for kind in (CONNECT, COMMAND):
+            with self._lock:
+                estimate = self._estimates.get((server, kind))
+                srtt = estimate.srtt if estimate else None
+                rttvar = estimate.rttvar if estimate else None
+                samples = estimate.samples if estimate else 0
+            result[kind] = {
+                "srtt_ms": round(1000 * srtt, 2) if srtt is not None else None,
+                "rttvar_ms": round(1000 * rttvar, 2) if rttvar is not None else None,
+                "samples": samples,
+                "timeout": round(self._timeout(server, kind), 3),
+            }
+        return result
+
+    def _timeout(self, server, kind) -> float:
+        with self._lock:
+            estimate = self._estimates.get((server, kind))
+            if estimate is None or estimate.srtt is None:
+                return self.ceilings[kind]
+            timeout = estimate.srtt + 4 * estimate.rttvar
+        return min(self.ceilings[kind], max(self.floors[kind], timeout))
@@ -2,7 +2,7 @@
 import sys
 import os
 import platform
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_login import login_required, current_user
 from src.services.location_service import fetch_locations, upsert_location, delete_location
 from src.services.item_service import delete_item_usage
@@ -12,19 +12,64 @@ from src.services.player_service import (
     get_player_history, get_player_location
 )
 from src.services.config_service import get_rcon_config
-from src.rcon_client import run_command, get_online_players
+from src.services.inventory_service import get_inventory_changes
+from src.services.command_service import complete_command
+from src.services.world_service import get_map_info, get_map_tile, get_log_path
+from src.services.stats_service import get_leaderboard, compare_players
+from src.server_status import get_server_status, players_from_status
+from src.log_follower import get_follower
+from src.rcon_client import (
+    run_command, get_server_health, get_timeout_estimates, get_scheduler_stats,
+    get_singleflight_stats, get_cache_stats, get_rate_limit_stats, is_busy_response, parse_online_players,
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+)
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 
+def _request_priority():
+    """Polling loops in the UI mark their requests with ``X-Mineboard-Poll``."""
+    if request.headers.get("X-Mineboard-Poll"):
+        return PRIORITY_BACKGROUND
+    return PRIORITY_INTERACTIVE
+
+
+def _status_for(user_id):
+    cfg = get_rcon_config(user_id)
+    return get_server_status(cfg["host"], cfg["game_port"])
+
+
 @api_bp.route('/players')
 @login_required
 def api_players():
     """API endpoint to refresh player list."""
-    players = get_online_players(current_user.id)
+    # A status ping lists everyone when the server shares its full player sample
+    players = players_from_status(_status_for(current_user.id))
+    if players is not None:
+        return jsonify({"players": players, "count": len(players)})
+
+    response = run_command("list", current_user.id, _request_priority())
+    if is_busy_response(response):
+        # Shed under load; the poller keeps showing its last result
+        return jsonify({"success": False, "busy": True, "error": response}), 503
+    players = parse_online_players(response)
     return jsonify({"players": players, "count": len(players)})
 
 
+@api_bp.route('/server-status')
+@login_required
+def api_server_status():
+    """Online state, version, MOTD and player counts via Server List Ping (no RCON)."""
+    return jsonify({"success": True, **_status_for(current_user.id)})
+
+
+@api_bp.route('/command-complete')
+@login_required
+def api_command_complete():
+    """Complete a partially typed console command from the server's cached command tree."""
+    return jsonify({"success": True, **complete_command(current_user.id, request.args.get("q", ""))})
+
+
 @api_bp.route('/test-connection')
 @login_required
 def test_connection():
@@ -32,7 +77,7 @@ def test_connection():
     user_id = current_user.id
     cfg = get_rcon_config(user_id)
 
-    result = run_command("list", user_id)
+    result = run_command("list", user_id, _request_priority())
     
     diagnostics = {
         "host": cfg["host"],
@@ -41,12 +86,32 @@ def test_connection():
         "password_length": len(cfg["password"]) if cfg.get("password") else 0,
         "source": cfg.get("source"),
         "response": result,
-        "connected": not str(result).startswith("Error")
+        "connected": not str(result).startswith("Error"),
+        "breaker": get_server_health(user_id),
+        "timeouts": get_timeout_estimates(user_id),
     }
+    if is_busy_response(result):
+        # Same fields as a normal reply, so the diagnostics pages can render it
+        return jsonify({**diagnostics, "success": False, "busy": True, "error": result}), 503
     
     return jsonify(diagnostics)
 
 
+@api_bp.route('/rcon-stats')
+@login_required
+def api_rcon_stats():
+    """RCON scheduler queue depth (all tenants for admins), coalescing and cache hit rates."""
+    user_id = current_user.id if current_user.role != 'admin' else None
+    scheduler = get_scheduler_stats(user_id)
+    return jsonify({
+        "success": True,
+        "scheduler": {str(tenant): stats for tenant, stats in scheduler.items()},
+        "singleflight": get_singleflight_stats(),
+        "cache": get_cache_stats(),
+        "rate_limit": get_rate_limit_stats(),
+    })
+
+
 @api_bp.route('/app-info')
 @login_required
 def app_info():
@@ -130,20 +195,39 @@ def api_player_stats():
     if not player:
         return jsonify({"success": False, "error": "Player is required"}), 400
 
-    stats = get_player_stats(player, current_user.id)
+    stats = get_player_stats(player, current_user.id, _request_priority())
     return jsonify({"success": True, "stats": stats})
 
 
 @api_bp.route('/player-inventory', methods=['POST'])
 @login_required
 def api_player_inventory():
-    """Get player inventory items (simplified version)."""
-    player = request.form.get("player") if request.form else (request.json or {}).get("player")
+    """Snapshot a player's inventory; pass ``since`` (a snapshot id) to get changes."""
+    payload = request.form if request.form else (request.json or {})
+    player = payload.get("player")
     if not player:
         return jsonify({"success": False, "error": "Player is required"}), 400
-    
-    inventory = get_player_inventory(player, current_user.id)
-    return jsonify({"success": True, "inventory": inventory})
+    try:
+        since = int(payload.get("since")) if payload.get("since") else None
+    except (TypeError, ValueError):
+        since = None
+
+    result, error = get_player_inventory(player, current_user.id, since, _request_priority())
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    return jsonify({"success": True, **result})
+
+
+@api_bp.route('/player-inventory/changes')
+@login_required
+def api_player_inventory_changes():
+    """What changed in a player's stored inventory since snapshot ``since`` (no RCON)."""
+    player = request.args.get("player")
+    if not player:
+        return jsonify({"success": False, "error": "Player is required"}), 400
+
+    changes = get_inventory_changes(current_user.id, player, request.args.get("since", type=int))
+    return jsonify({"success": True, **changes})
 
 
 @api_bp.route('/player-history', methods=['POST'])
@@ -166,13 +250,94 @@ def api_player_location():
     if not player:
         return jsonify({"success": False, "error": "Player is required"}), 400
 
-    coordinates, error = get_player_location(player, current_user.id)
+    coordinates, error = get_player_location(player, current_user.id, _request_priority())
     if error:
         return jsonify({"success": False, "error": error}), 400
 
     return jsonify({"success": True, "coordinates": coordinates})
 
 
+@api_bp.route('/map/info')
+@login_required
+def api_map_info():
+    """Dimensions with a rendered map and the world spawn (needs the server directory)."""
+    return jsonify({"success": True, **get_map_info(current_user.id)})
+
+
+@api_bp.route('/map/tile/<dimension>/<int(signed=True):zoom>/<int(signed=True):x>/<int(signed=True):z>.png')
+@login_required
+def api_map_tile(dimension, zoom, x, z):
+    """A 256px top-down map tile; zoom 0 is one pixel per block, each step out halves it."""
+    tile = get_map_tile(current_user.id, dimension, -zoom, x, z)
+    if tile is None:
+        return jsonify({"success": False, "error": "Map not available"}), 404
+    png, current = tile
+    if not current:
+        # Being rendered in the background: a placeholder (or the previous render) for now
+        response = Response(png, status=202, mimetype="image/png")
+        response.headers["Cache-Control"] = "no-store"
+        response.headers["Retry-After"] = "2"
+        return response
+    response = Response(png, mimetype="image/png")
+    # Chunks change as players build; let the browser revalidate soon
+    response.headers["Cache-Control"] = "private, max-age=30"
+    return response
+
+
+@api_bp.route('/leaderboard')
+@login_required
+def api_leaderboard():
+    """Top players for one stat (``?stat=custom:play_time``) from the stored stats files."""
+    stat = request.args.get("stat", "custom:play_time")
+    limit = max(1, min(request.args.get("limit", 10, type=int), 100))
+    board = get_leaderboard(current_user.id, stat, limit, request.args.get("player"))
+    if not board["available"]:
+        return jsonify({"success": False, "error": "Stats need the server directory in settings"}), 404
+    return jsonify({"success": True, **board})
+
+
+@api_bp.route('/players/compare')
+@login_required
+def api_compare_players():
+    """Stats of several players side by side (``?players=Steve,Alex&category=mined``)."""
+    players = [p.strip() for p in request.args.get("players", "").split(",") if p.strip()][:10]
+    if not players:
+        return jsonify({"success": False, "error": "Players are required"}), 400
+    comparison = compare_players(current_user.id, players, request.args.get("category"))
+    if not comparison["available"]:
+        return jsonify({"success": False, "error": "Stats need the server directory in settings"}), 404
+    return jsonify({"success": True, **comparison})
+
+
+@api_bp.route('/console/lines')
+@login_required
+def api_console_lines():
+    """New server log lines since the line id ``?since=``, from the shared follower of ``logs/latest.log``.
+
+    Returns at once; the console polls with the ``next`` id of the previous reply.
+    Line ids are the same in every worker, so polls may land on any of them.
+    """
+    path = get_log_path(current_user.id)
+    if path is None:
+        return jsonify({"success": False, "error": "The console needs the server directory in settings"}), 404
+    follower = get_follower(path)
+    follower.touch()
+
+    # An id from a log this worker has no lines of (server restart) starts over from the backlog
+    since = request.args.get("since", "")
+    lines, skipped, reset = follower.lines_after(since)
+    if lines:
+        since = lines[-1][0]
+    return jsonify({
+        "success": True,
+        "lines": [text for _, text in lines],
+        "skipped": skipped,
+        "reset": reset,
+        # Until the follower has read anything, the next poll asks for the backlog again
+        "next": "" if reset and not lines else since,
+    })
+
+
 @api_bp.route('/error-logs')
 @login_required
 def api_error_logs():
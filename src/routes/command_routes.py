@@ -1,10 +1,11 @@
 """Command execution routes."""
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from src.rcon_client import run_command, is_rcon_error
+from src.rcon_client import run_command, run_commands, is_rcon_error
 from src.services.item_service import record_item_usage
 from src.services.location_service import fetch_locations
 from src.services.error_service import log_error
+from src.services.command_service import validate_command
 from src.commands import VILLAGE_TYPES
 from src.config_loader import get_kits
 
@@ -15,8 +16,10 @@ command_bp = Blueprint('command', __name__)
 @login_required
 def execute_command():
     """Execute any Minecraft command."""
-    cmd = request.form.get("command")
+    cmd = (request.form.get("command") or "").strip()
     player = request.form.get("player")
+    if not cmd:
+        return jsonify({"success": False, "error": "Command is required"}), 400
     
     if player and "@p" in cmd:
         cmd = cmd.replace("@p", player)
@@ -25,6 +28,11 @@ def execute_command():
         if cmd.startswith("/"):
             cmd = f"{cmd} {player}"
     
+    # Typos and wrong subcommands are caught against the cached command tree
+    invalid = validate_command(current_user.id, cmd)
+    if invalid:
+        return jsonify({"success": False, "error": invalid, "command": cmd})
+    
     result = run_command(cmd, current_user.id)
     return jsonify({"success": True, "result": result})
 
@@ -243,7 +251,7 @@ def quick_command():
         
         # Mob Control
         "kill_hostile_mobs": "/kill @e[type=!player,type=!item,type=!villager,type=!iron_golem,type=!horse,type=!cat,type=!wolf,type=!parrot,type=!donkey,type=!mule,type=!llama,type=!trader_llama]",
-        "kill_passive_mobs": "/kill @e[type=cow] /kill @e[type=sheep] /kill @e[type=pig] /kill @e[type=chicken]",
+        "kill_passive_mobs": ["/kill @e[type=cow]", "/kill @e[type=sheep]", "/kill @e[type=pig]", "/kill @e[type=chicken]"],
         "kill_all_entities": "/kill @e[type=!player]",
         "kill_item_entities": "/kill @e[type=item]",
         "clear_ground_items": "/kill @e[type=item]",
@@ -261,7 +269,14 @@ def quick_command():
     cmd = commands_map.get(command_type)
     if cmd:
         print(f"Executing command: {cmd}")
-        result = run_command(cmd, current_user.id)
+        if isinstance(cmd, list):
+            # Multi-command actions share one pipelined connection
+            results = run_commands(cmd, current_user.id)
+            errors = [r for r in results if is_rcon_error(r)]
+            result = errors[0] if errors else "\n".join(r for r in results if r)
+            cmd = "; ".join(cmd)
+        else:
+            result = run_command(cmd, current_user.id)
         print(f"RCON result: {result}")
         
         if is_rcon_error(result):
@@ -313,13 +328,14 @@ def give_kit(kit_id):
     
     if kit:
         print(f"Found kit: {kit['name']}")
-        results = []
-        for item_data in kit['items']:
-            cmd = f"/give {player} minecraft:{item_data['item']} {item_data['amount']}"
-            print(f"Executing: {cmd}")
-            result = run_command(cmd, current_user.id)
+        cmds = [
+            f"/give {player} minecraft:{item_data['item']} {item_data['amount']}"
+            for item_data in kit['items']
+        ]
+        print(f"Executing {len(cmds)} commands")
+        results = run_commands(cmds, current_user.id)
+        for item_data, cmd, result in zip(kit['items'], cmds, results):
             print(f"Result: {result}")
-            results.append(result)
             
             if is_rcon_error(result):
                 log_error(
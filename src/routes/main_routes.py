@@ -7,7 +7,7 @@ from src.services.location_service import fetch_locations
 from src.commands import VILLAGE_TYPES
 from src.config_loader import get_kits, get_quick_commands
 from src.services.config_service import get_rcon_config, save_rcon_config
-from src.rcon_client import reset_rcon_client
+from src.services.world_service import local_files_enabled, resolve_server_dir, get_log_path
 
 main_bp = Blueprint('main', __name__)
 
@@ -29,6 +29,7 @@ def dashboard():
         locations=fetch_locations(user_id),
         kits=kits_config.get("kits", []),
         quick_commands=quick_commands if isinstance(quick_commands, list) else [],
+        console_available=get_log_path(user_id) is not None,
     )
 
 
@@ -37,7 +38,7 @@ def dashboard():
 def settings():
     """RCON settings page."""
     rcon_config = get_rcon_config(current_user.id)
-    return render_template("settings.html", rcon_config=rcon_config)
+    return render_template("settings.html", rcon_config=rcon_config, local_files_enabled=local_files_enabled())
 
 
 @main_bp.route('/rcon-config', methods=['POST'])
@@ -49,6 +50,12 @@ def update_rcon_config():
     host = (request.form.get('host') or '').strip()
     port_raw = (request.form.get('port') or '').strip()
     password = (request.form.get('password') or '').strip()
+    game_port_raw = (request.form.get('game_port') or '').strip()
+    if 'server_dir' in request.form:
+        server_dir = request.form['server_dir'].strip() or None
+    else:
+        # The field is hidden while local file access is off; keep what was saved
+        server_dir = get_rcon_config(user_id).get("server_dir")
 
     errors = []
     if not host:
@@ -62,14 +69,21 @@ def update_rcon_config():
         port_val = None
     if not password:
         errors.append("Password is required")
+    game_port_val = None
+    if game_port_raw:
+        try:
+            game_port_val = int(game_port_raw)
+        except ValueError:
+            errors.append("Game port must be a number")
+    if server_dir and local_files_enabled() and not resolve_server_dir(server_dir):
+        errors.append("Server directory must be an existing directory under LOCAL_SERVERS_ROOT")
 
     if errors:
         for err in errors:
             flash(err)
         return redirect(url_for('main.settings'))
 
-    save_rcon_config(user_id, host, port_val, password)
-    reset_rcon_client(user_id)
+    save_rcon_config(user_id, host, port_val, password, game_port_val, server_dir)
     flash("RCON settings saved. New connections will use these values.")
     return redirect(url_for('main.settings', test_connection='true'))
 
@@ -0,0 +1,176 @@
+"""Minecraft Server List Ping status probe.
+
+The same handshake the multiplayer server list uses: connect to the game
+port, send a handshake and a status request, and read back a JSON status
+(version, MOTD, online/max players and a sample of names). No login and
+no RCON authentication are involved, so this is much cheaper than an
+RCON ``list`` for status polling. Results are cached briefly per server
+so every open tab shares one probe.
+"""
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_GAME_PORT = 25565
+
+# Any protocol number works for a status request; -1 means "not logging in"
+_STATUS_PROTOCOL = -1
+_NEXT_STATE_STATUS = 1
+_ANONYMOUS_UUID = "00000000-0000-0000-0000-000000000000"
+
+# Seconds a status ping is reused across tabs and users of the same server
+STATUS_CACHE_TTL = float(os.environ.get("SERVER_STATUS_CACHE_TTL", 5))
+
+_cache_lock = threading.Lock()
+_cache: Dict[Tuple[str, int], Tuple[float, Dict[str, Any]]] = {}
+
+
+def _varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return _varint(len(data)) + data
+
+
+def _packet(packet_id: int, payload: bytes = b"") -> bytes:
+    body = _varint(packet_id) + payload
+    return _varint(len(body)) + body
+
+
+class _Reader:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+
+    def exact(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise Exception("Connection closed by server")
+            data += chunk
+        return bytes(data)
+
+    def varint(self) -> int:
+        value = 0
+        for shift in range(0, 35, 7):
+            byte = self.exact(1)[0]
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value - (1 << 32) if value & (1 << 31) else value
+        raise Exception("VarInt too long")
+
+    def packet_length(self) -> int:
+        length = self.varint()
+        if length <= 0 or length > 1 << 21:
+            raise Exception(f"Invalid status packet length {length}")
+        return length
+
+
+def _flatten_motd(description: Any) -> str:
+    """Plain text of a MOTD, which may be a string or a chat component."""
+    if isinstance(description, str):
+        return description
+    if isinstance(description, dict):
+        text = description.get("text", "")
+        return text + "".join(_flatten_motd(part) for part in description.get("extra", []))
+    if isinstance(description, list):
+        return "".join(_flatten_motd(part) for part in description)
+    return ""
+
+
+def ping_server(host: str, port: int = DEFAULT_GAME_PORT, timeout: float = 3) -> Dict[str, Any]:
+    """Query a server's status; raises on connection or protocol errors."""
+    started = time.monotonic()
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.settimeout(timeout)
+        handshake = (
+            _varint(_STATUS_PROTOCOL)
+            + _string(host)
+            + struct.pack(">H", port)
+            + _varint(_NEXT_STATE_STATUS)
+        )
+        sock.sendall(_packet(0x00, handshake) + _packet(0x00))
+
+        reader = _Reader(sock)
+        reader.packet_length()
+        if reader.varint() != 0x00:
+            raise Exception("Unexpected status response")
+        status = json.loads(reader.exact(reader.varint()).decode("utf-8"))
+
+        # Ping/pong for the round-trip time; older servers may just close
+        token = int(time.time() * 1000)
+        ping_sent = time.monotonic()
+        latency_ms = None
+        try:
+            sock.sendall(_packet(0x01, struct.pack(">q", token)))
+            reader.packet_length()
+            if reader.varint() == 0x01 and struct.unpack(">q", reader.exact(8))[0] == token:
+                latency_ms = round(1000 * (time.monotonic() - ping_sent), 1)
+        except Exception:
+            pass
+
+    players = status.get("players") or {}
+    sample: List[str] = [
+        entry.get("name", "") for entry in players.get("sample") or []
+        if entry.get("id") != _ANONYMOUS_UUID and entry.get("name")
+    ]
+    version = status.get("version") or {}
+    return {
+        "online": True,
+        "version": version.get("name"),
+        "protocol": version.get("protocol"),
+        "motd": _flatten_motd(status.get("description", "")),
+        "players_online": int(players.get("online", 0)),
+        "players_max": int(players.get("max", 0)),
+        "sample": sample,
+        "latency_ms": latency_ms if latency_ms is not None else round(1000 * (time.monotonic() - started), 1),
+    }
+
+
+def get_server_status(host: str, port: int = DEFAULT_GAME_PORT, ttl: Optional[float] = None,
+                      timeout: float = 3) -> Dict[str, Any]:
+    """Cached ``ping_server``; an unreachable server reports ``online: False``.
+
+    Results are kept for ``ttl`` seconds (default ``SERVER_STATUS_CACHE_TTL``).
+    """
+    if ttl is None:
+        ttl = STATUS_CACHE_TTL
+    key = (host, port)
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry and entry[0] > now:
+        return dict(entry[1])
+
+    try:
+        status = ping_server(host, port, timeout)
+    except Exception as e:
+        status = {"online": False, "error": str(e) or type(e).__name__}
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + ttl, status)
+    return dict(status)
+
+
+def players_from_status(status: Dict[str, Any]) -> Optional[List[str]]:
+    """Full player list from a status reply, or None if the sample is partial or hidden."""
+    if not status.get("online"):
+        return None
+    sample = status.get("sample") or []
+    if len(sample) != status.get("players_online"):
+        return None
+    return sample
@@ -0,0 +1,71 @@
+"""Command tree service: local validation and completion of console commands."""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from src.command_tree import CommandTree, parse_help
+from src.rcon_client import run_command, is_rcon_error
+from src.server_status import get_server_status
+from src.services.config_service import get_rcon_config
+
+# Seconds a tree is kept when the server version is unknown (status ping failed)
+UNVERSIONED_TTL = float(os.environ.get("COMMAND_TREE_UNVERSIONED_TTL", 3600))
+# Seconds before retrying a server whose help output could not be read or parsed
+RETRY_AFTER = float(os.environ.get("COMMAND_TREE_RETRY", 60))
+# Fewer root commands than this means help was not vanilla-style (e.g. a paged plugin help)
+MIN_COMMANDS = 10
+
+_lock = threading.Lock()
+# (host, port, version) -> (expires, tree or None)
+_trees: Dict[Tuple[str, int, Optional[str]], Tuple[float, Optional[CommandTree]]] = {}
+
+
+def get_command_tree(user_id: int) -> Optional[CommandTree]:
+    """The user's server command tree, fetched once per server version; None if unavailable."""
+    cfg = get_rcon_config(user_id)
+    version = get_server_status(cfg["host"], cfg["game_port"]).get("version")
+    key = (cfg["host"], cfg["port"], version)
+    now = time.monotonic()
+    with _lock:
+        entry = _trees.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    response = run_command("help", user_id)
+    tree = None if is_rcon_error(response) else parse_help(response)
+    if tree is not None and len(tree) < MIN_COMMANDS:
+        tree = None
+    if tree is None:
+        expires = now + RETRY_AFTER
+    elif version is None:
+        expires = now + UNVERSIONED_TTL
+    else:
+        expires = float("inf")
+    with _lock:
+        # An upgraded server reports a new version; drop its old trees
+        for stale in [k for k in _trees if k[:2] == key[:2] and k != key]:
+            del _trees[stale]
+        _trees[key] = (expires, tree)
+    return tree
+
+
+def validate_command(user_id: int, command: str) -> Optional[str]:
+    """Error message for a command that would certainly fail, or None."""
+    tree = get_command_tree(user_id)
+    if tree is None:
+        return None
+    return tree.validate(command)
+
+
+def complete_command(user_id: int, text: str) -> Dict[str, Any]:
+    """Completions and the usage line for partially typed ``text``."""
+    tree = get_command_tree(user_id)
+    if tree is None:
+        return {"available": False, "suggestions": [], "usage": None}
+    name = text.strip().lstrip("/").split(" ")[0]
+    return {
+        "available": True,
+        "suggestions": tree.complete(text),
+        "usage": tree.usage(name) if " " in text.lstrip() else None,
+    }
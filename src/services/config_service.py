@@ -1,14 +1,29 @@
 """RCON configuration helpers with database persistence."""
 import os
+import threading
+import time
 from typing import Dict, Any, Optional
 from src.database import get_db
+from src.server_status import DEFAULT_GAME_PORT
 
 DEFAULT_RCON_HOST = "localhost"
 DEFAULT_RCON_PORT = 25575
 
+# Cached configs are re-read after this many seconds so that changes saved
+# by another worker process are picked up; saves in this process apply at once.
+CONFIG_CACHE_TTL = float(os.environ.get("RCON_CONFIG_CACHE_TTL", 30))
+
+_cache_lock = threading.Lock()
+_config_cache: Dict[int, Any] = {}   # user_id -> (expires_at, config)
+_generations: Dict[int, int] = {}    # user_id -> credentials generation
+
 
 def get_rcon_config(user_id: Optional[int] = None) -> Dict[str, Any]:
-    """Return RCON config for a user from database.
+    """Return RCON config for a user, from the process cache or the database.
+    
+    The returned dict carries a ``generation`` number that changes whenever
+    the user's host, port or password change, so callers holding
+    connections can spot stale credentials without querying again.
     
     Args:
         user_id: User ID to get config for. If None, returns defaults.
@@ -18,13 +33,25 @@ def get_rcon_config(user_id: Optional[int] = None) -> Dict[str, Any]:
             "host": DEFAULT_RCON_HOST,
             "port": DEFAULT_RCON_PORT,
             "password": "",
+            "game_port": DEFAULT_GAME_PORT,
+            "server_dir": None,
             "source": "default",
             "user_id": None,
+            "generation": 0,
         }
 
+    with _cache_lock:
+        entry = _config_cache.get(user_id)
+    if entry and entry[0] > time.monotonic():
+        return dict(entry[1])
+
+    return dict(_cache_config(user_id, _load_rcon_config(user_id)))
+
+
+def _load_rcon_config(user_id: int) -> Dict[str, Any]:
     db = get_db()
     row = db.execute(
-        "SELECT host, port, password FROM rcon_config WHERE user_id = ?", 
+        "SELECT host, port, password, game_port, server_dir FROM rcon_config WHERE user_id = ?", 
         (user_id,)
     ).fetchone()
     
@@ -34,6 +61,8 @@ def get_rcon_config(user_id: Optional[int] = None) -> Dict[str, Any]:
             "host": row["host"] or DEFAULT_RCON_HOST,
             "port": int(port_val),
             "password": row["password"] or "",
+            "game_port": int(row["game_port"] or DEFAULT_GAME_PORT),
+            "server_dir": row["server_dir"],
             "source": "db",
             "user_id": user_id,
         }
@@ -42,27 +71,62 @@ def get_rcon_config(user_id: Optional[int] = None) -> Dict[str, Any]:
         "host": DEFAULT_RCON_HOST,
         "port": DEFAULT_RCON_PORT,
         "password": "",
+        "game_port": DEFAULT_GAME_PORT,
+        "server_dir": None,
         "source": "default",
         "user_id": user_id,
     }
 
 
-def save_rcon_config(user_id: int, host: str, port: int, password: str) -> None:
-    """Persist RCON config into the database for a specific user."""
+def _cache_config(user_id: int, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a freshly loaded config, bumping the generation if credentials changed."""
+    credentials = (config["host"], config["port"], config["password"])
+    with _cache_lock:
+        entry = _config_cache.get(user_id)
+        generation = _generations.get(user_id, 0)
+        if entry is None or (entry[1]["host"], entry[1]["port"], entry[1]["password"]) != credentials:
+            generation += 1
+        _generations[user_id] = generation
+        config["generation"] = generation
+        _config_cache[user_id] = (time.monotonic() + CONFIG_CACHE_TTL, config)
+    return config
+
+
+def save_rcon_config(user_id: int, host: str, port: int, password: str,
+                     game_port: Optional[int] = None, server_dir: Optional[str] = None) -> None:
+    """Persist RCON config into the database for a specific user.
+
+    The process cache is updated in place (write-through); a credential
+    change bumps the generation, which retires pooled connections.
+    ``game_port`` is the server's player port, used for status pings;
+    ``server_dir`` is the server's directory when it runs on this host.
+    """
     db = get_db()
     db.execute(
         """
-        INSERT INTO rcon_config (user_id, host, port, password)
-        VALUES (?, ?, ?, ?)
+        INSERT INTO rcon_config (user_id, host, port, password, game_port, server_dir)
+        VALUES (?, ?, ?, ?, ?, ?)
         ON CONFLICT(user_id) DO UPDATE SET
             host = excluded.host,
             port = excluded.port,
-            password = excluded.password
+            password = excluded.password,
+            game_port = excluded.game_port,
+            server_dir = excluded.server_dir
         """,
-        (user_id, host, port, password),
+        (user_id, host, port, password, game_port, server_dir),
     )
     db.commit()
 
+    _cache_config(user_id, {
+        "host": host,
+        "port": int(port),
+        "password": password,
+        "game_port": int(game_port or DEFAULT_GAME_PORT),
+        "server_dir": server_dir,
+        "source": "db",
+        "user_id": user_id,
+    })
+
 
 def rcon_config_source_label(config: Dict[str, Any]) -> str:
     """Human-friendly label for template use."""
@@ -0,0 +1,209 @@
+"""Player inventory snapshots stored as a baseline plus per-slot deltas.
+
+Each snapshot row is either a baseline, whose slot rows hold the whole
+inventory, or a delta on the baseline before it, whose slot rows hold
+only the slots that changed since the previous snapshot (an empty item
+marks a slot that was emptied). A snapshot is rebuilt by replaying its
+baseline's deltas in order. Polling a player whose inventory has not
+changed writes nothing, except that ``checked_at`` on the latest
+snapshot (found by the inventory's digest) is moved forward once it is
+``INVENTORY_CHECK_INTERVAL`` seconds old.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.database import get_db
+
+# Start a new baseline after this many deltas, so rebuilding stays cheap
+BASELINE_EVERY = int(os.environ.get("INVENTORY_BASELINE_EVERY", 50))
+# Seconds between updates of checked_at while the inventory stays the same
+CHECK_INTERVAL = float(os.environ.get("INVENTORY_CHECK_INTERVAL", 60))
+
+INVENTORY = "inventory"
+ENDER_CHEST = "ender"
+
+# 1.21.5+ keeps worn items in an "equipment" compound; map them to the old slot numbers
+_EQUIPMENT_SLOTS = {"feet": 100, "legs": 101, "chest": 102, "head": 103, "offhand": -106}
+
+_SlotKey = Tuple[str, int]
+_Stack = Tuple[str, int, Optional[str]]   # item, count, components as JSON
+
+
+def _stack(entry: Dict[str, Any]) -> _Stack:
+    # Item components since 1.20.5, the "tag" compound before
+    components = entry.get("components", entry.get("tag"))
+    count = entry.get("count", entry.get("Count", 1))
+    return (str(entry["id"]), int(count), json.dumps(components, sort_keys=True) if components else None)
+
+
+def inventory_from_nbt(data: Dict[str, Any]) -> Dict[_SlotKey, _Stack]:
+    """Slots of a player's ``Inventory``, equipment and ``EnderItems`` from entity NBT."""
+    slots = {}
+    for container, tag in ((INVENTORY, "Inventory"), (ENDER_CHEST, "EnderItems")):
+        for entry in data.get(tag) or []:
+            if "Slot" in entry and entry.get("id"):
+                slots[(container, int(entry["Slot"]))] = _stack(entry)
+    for name, entry in (data.get("equipment") or {}).items():
+        if name in _EQUIPMENT_SLOTS and entry.get("id"):
+            slots[(INVENTORY, _EQUIPMENT_SLOTS[name])] = _stack(entry)
+    return slots
+
+
+def _digest(slots: Dict[_SlotKey, _Stack]) -> str:
+    canonical = json.dumps(sorted((list(k), list(v)) for k, v in slots.items()), separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _latest_snapshot(db, user_id: int, player: str):
+    return db.execute(
+        """
+        SELECT id, baseline_id, digest, taken_at, checked_at FROM inventory_snapshots
+        WHERE user_id = ? AND player = ? ORDER BY id DESC LIMIT 1
+        """,
+        (user_id, player.lower()),
+    ).fetchone()
+
+
+def _load_slots(db, snapshot) -> Dict[_SlotKey, _Stack]:
+    """Rebuild a snapshot from its baseline and the deltas up to it."""
+    baseline_id = snapshot["baseline_id"] or snapshot["id"]
+    rows = db.execute(
+        """
+        SELECT container, slot, item, count, components FROM inventory_slots
+        WHERE snapshot_id IN (
+            SELECT id FROM inventory_snapshots
+            WHERE id = ? OR (baseline_id = ? AND id <= ?)
+        )
+        ORDER BY snapshot_id
+        """,
+        (baseline_id, baseline_id, snapshot["id"]),
+    ).fetchall()
+    slots = {}
+    for row in rows:
+        key = (row["container"], row["slot"])
+        if row["item"] is None:
+            slots.pop(key, None)
+        else:
+            slots[key] = (row["item"], row["count"], row["components"])
+    return slots
+
+
+def _check_due(checked_at: Optional[str]) -> bool:
+    try:
+        # SQLite's CURRENT_TIMESTAMP is UTC
+        checked = datetime.strptime(checked_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return True
+    return datetime.now(timezone.utc) - checked >= timedelta(seconds=CHECK_INTERVAL)
+
+
+def record_inventory(user_id: int, player: str, slots: Dict[_SlotKey, _Stack]) -> int:
+    """Store a snapshot if the inventory changed; return the id of the current snapshot."""
+    db = get_db()
+    digest = _digest(slots)
+    latest = _latest_snapshot(db, user_id, player)
+    if latest is not None and latest["digest"] == digest:
+        if _check_due(latest["checked_at"]):
+            db.execute("UPDATE inventory_snapshots SET checked_at = CURRENT_TIMESTAMP WHERE id = ?", (latest["id"],))
+            db.commit()
+        return latest["id"]
+
+    # Take the write lock before reading the latest snapshot again, so a
+    # concurrent poll (another thread or worker) cannot base a delta on
+    # the same snapshot
+    if db.in_transaction:
+        db.commit()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        snapshot_id = _record_snapshot(db, user_id, player, slots, digest)
+    except BaseException:
+        db.rollback()
+        raise
+    db.commit()
+    return snapshot_id
+
+
+def _record_snapshot(db, user_id: int, player: str, slots: Dict[_SlotKey, _Stack], digest: str) -> int:
+    latest = _latest_snapshot(db, user_id, player)
+    if latest is not None and latest["digest"] == digest:
+        return latest["id"]   # stored by the concurrent poll
+
+    baseline_id = None
+    rows = list(slots.items())
+    if latest is not None:
+        baseline_id = latest["baseline_id"] or latest["id"]
+        deltas = db.execute(
+            "SELECT COUNT(*) FROM inventory_snapshots WHERE baseline_id = ?", (baseline_id,)
+        ).fetchone()[0]
+        previous = _load_slots(db, latest)
+        changed = [(key, slots.get(key)) for key in previous.keys() | slots.keys()
+                   if previous.get(key) != slots.get(key)]
+        if deltas < BASELINE_EVERY and len(changed) < max(len(slots), 1):
+            rows = changed
+        else:
+            baseline_id = None
+
+    cursor = db.execute(
+        "INSERT INTO inventory_snapshots (user_id, player, baseline_id, digest) VALUES (?, ?, ?, ?)",
+        (user_id, player.lower(), baseline_id, digest),
+    )
+    snapshot_id = cursor.lastrowid
+    db.executemany(
+        "INSERT INTO inventory_slots (snapshot_id, container, slot, item, count, components) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (snapshot_id, container, slot, *(stack if stack else (None, 0, None)))
+            for (container, slot), stack in rows
+        ],
+    )
+    return snapshot_id
+
+
+def _as_item(key: _SlotKey, stack: Optional[_Stack]) -> Optional[Dict[str, Any]]:
+    if stack is None:
+        return None
+    return {"container": key[0], "slot": key[1], "item": stack[0], "count": stack[1],
+            "components": json.loads(stack[2]) if stack[2] else None}
+
+
+def inventory_items(slots: Dict[_SlotKey, _Stack]) -> List[Dict[str, Any]]:
+    """Slots as JSON-ready dicts, inventory first, in slot order."""
+    return [_as_item(key, slots[key]) for key in sorted(slots, key=lambda k: (k[0] != INVENTORY, k))]
+
+
+def get_inventory_changes(user_id: int, player: str, since: Optional[int] = None) -> Dict[str, Any]:
+    """Per-slot changes from snapshot ``since`` to the latest one.
+
+    Without ``since`` (or for a snapshot of another player) every slot of
+    the latest snapshot is reported as added.
+    """
+    db = get_db()
+    latest = _latest_snapshot(db, user_id, player)
+    if latest is None:
+        return {"snapshot_id": None, "checked_at": None, "changes": []}
+    result = {"snapshot_id": latest["id"], "checked_at": latest["checked_at"], "changes": []}
+    if since == latest["id"]:
+        return result
+
+    before = {}
+    if since:
+        earlier = db.execute(
+            "SELECT id, baseline_id FROM inventory_snapshots WHERE id = ? AND user_id = ? AND player = ?",
+            (since, user_id, player.lower()),
+        ).fetchone()
+        if earlier is not None:
+            before = _load_slots(db, earlier)
+    after = _load_slots(db, latest)
+    result["changes"] = [
+        {
+            "container": key[0],
+            "slot": key[1],
+            "before": _as_item(key, before.get(key)),
+            "after": _as_item(key, after.get(key)),
+        }
+        for key in sorted(before.keys() | after.keys(), key=lambda k: (k[0] != INVENTORY, k))
+        if before.get(key) != after.get(key)
+    ]
+    return result
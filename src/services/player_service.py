@@ -1,60 +1,123 @@
 """Player-related service functions."""
-import re
-from src.rcon_client import run_command, get_online_players
+import os
+from functools import lru_cache
+from src.rcon_client import run_command, PRIORITY_INTERACTIVE
 from src.database import get_db
+from src.server_status import get_server_status, players_from_status
+from src.services.config_service import get_rcon_config
+from src.services.world_service import get_server_dir, read_player_file
+from src.snbt import parse_entity_data, SnbtError
+from src.services.inventory_service import (
+    inventory_from_nbt, inventory_items, record_inventory, get_inventory_changes
+)
 
 
-def get_player_stats(player, user_id):
-    """Get player statistics like health, food, XP, etc."""
-    stats = {}
-    
-    # Get Health
-    result = run_command(f"/data get entity {player} Health", user_id)
-    if not str(result).startswith("Error"):
-        match = re.search(r'(\d+\.?\d*)f?', str(result))
-        if match:
-            stats["health"] = float(match.group(1))
-    
-    # Get Food Level
-    result = run_command(f"/data get entity {player} foodLevel", user_id)
-    if not str(result).startswith("Error"):
-        match = re.search(r'(\d+)', str(result))
-        if match:
-            stats["food"] = int(match.group(1))
-    
-    # Get XP Level
-    result = run_command(f"/data get entity {player} XpLevel", user_id)
-    if not str(result).startswith("Error"):
-        match = re.search(r'(\d+)', str(result))
-        if match:
-            stats["xp_level"] = int(match.group(1))
-    
-    # Get Game Mode
-    result = run_command(f"/data get entity {player} playerGameType", user_id)
-    if not str(result).startswith("Error"):
-        match = re.search(r'(\d+)', str(result))
-        if match:
-            game_modes = {0: "Survival", 1: "Creative", 2: "Adventure", 3: "Spectator"}
-            stats["game_mode"] = game_modes.get(int(match.group(1)), "Unknown")
+GAME_MODES = {0: "Survival", 1: "Creative", 2: "Adventure", 3: "Spectator"}
+
+# Serve online players from their (autosaved) playerdata files too, for zero RCON load
+PREFER_PLAYER_FILES = os.environ.get("PLAYERDATA_PREFER_FILES", "0") != "0"
+
+
+@lru_cache(maxsize=64)
+def _parse_entity_dump(response):
+    """Parsed dump, shared by every caller that got the same (cached) response; do not mutate."""
+    try:
+        return parse_entity_data(response)
+    except SnbtError:
+        return None
+
+
+def _known_offline(player, user_id):
+    """True if the status ping lists every online player and ``player`` is not among them."""
+    cfg = get_rcon_config(user_id)
+    online = players_from_status(get_server_status(cfg["host"], cfg["game_port"]))
+    return online is not None and player.lower() not in {name.lower() for name in online}
+
+
+def get_player_data(player, user_id, priority=PRIORITY_INTERACTIVE):
+    """Full entity NBT for a player from one ``data get entity``, as (data, error).
     
+    The response is cached briefly by the RCON client, so stats, location
+    and effects requested together cost a single round trip. When the
+    server runs on this host, offline players (and, with
+    ``PLAYERDATA_PREFER_FILES``, everyone) are read from their
+    ``playerdata`` file instead, without touching RCON.
+    """
+    local = get_server_dir(user_id) is not None
+    if local and (PREFER_PLAYER_FILES or _known_offline(player, user_id)):
+        data = read_player_file(user_id, player)
+        if data is not None:
+            return data, None
+
+    result = run_command(f"/data get entity {player}", user_id, priority)
+    data = None if str(result).startswith("Error") else _parse_entity_dump(result)
+    if not isinstance(data, dict):
+        # Offline, or the server is down: the last saved data is better than nothing
+        saved = read_player_file(user_id, player) if local else None
+        if saved is not None:
+            return saved, None
+        if str(result).startswith("Error"):
+            return None, result
+        return None, result or "Could not parse player data"
+    return data, None
+
+
+def _effects(data):
+    """Active effects from the 1.20.2+ ``active_effects`` list or the older ``ActiveEffects``."""
+    effects = []
+    for effect in data.get("active_effects") or data.get("ActiveEffects") or []:
+        effect_id = effect.get("id", effect.get("Id"))
+        duration = effect.get("duration", effect.get("Duration", 0))
+        effects.append({
+            "id": str(effect_id).replace("minecraft:", ""),
+            "level": effect.get("amplifier", effect.get("Amplifier", 0)) + 1,
+            # -1 means infinite
+            "seconds": None if duration == -1 else duration // 20,
+        })
+    return effects
+
+
+def get_player_stats(player, user_id, priority=PRIORITY_INTERACTIVE):
+    """Get player statistics like health, food, XP, game mode and effects."""
+    data, _ = get_player_data(player, user_id, priority)
+    if data is None:
+        return {}
+
+    stats = {}
+    if "Health" in data:
+        stats["health"] = float(data["Health"])
+    if "foodLevel" in data:
+        stats["food"] = int(data["foodLevel"])
+    if "XpLevel" in data:
+        stats["xp_level"] = int(data["XpLevel"])
+        stats["xp_progress"] = float(data.get("XpP", 0.0))
+        stats["xp_total"] = int(data.get("XpTotal", 0))
+    if "playerGameType" in data:
+        stats["game_mode"] = GAME_MODES.get(data["playerGameType"], "Unknown")
+    if "Dimension" in data:
+        stats["dimension"] = str(data["Dimension"]).replace("minecraft:", "")
+    stats["effects"] = _effects(data)
     return stats
 
 
-def get_player_inventory(player, user_id):
-    """Get player inventory items (simplified version using recent items)."""
-    db = get_db()
-    recent_items = db.execute(
-        "SELECT item, used_count, last_used FROM item_usage WHERE user_id = ? ORDER BY last_used DESC LIMIT 20",
-        [user_id]
-    ).fetchall()
-    
-    inventory = [{
-        "item": row["item"],
-        "count": row["used_count"],
-        "last_used": row["last_used"]
-    } for row in recent_items]
+def get_player_inventory(player, user_id, since=None, priority=PRIORITY_INTERACTIVE):
+    """Snapshot the player's inventory and ender chest, as (result, error).
     
-    return inventory
+    ``result`` holds the current ``inventory`` slots, the ``snapshot_id``
+    to pass back as ``since`` next time, and the ``changes`` since then.
+    """
+    data, error = get_player_data(player, user_id, priority)
+    if data is None:
+        return None, error
+
+    slots = inventory_from_nbt(data)
+    snapshot_id = record_inventory(user_id, player, slots)
+    changes = get_inventory_changes(user_id, player, since) if since else {"changes": []}
+    return {
+        "inventory": inventory_items(slots),
+        "snapshot_id": snapshot_id,
+        "changes": changes["changes"],
+    }, None
 
 
 def get_player_history(player, user_id):
@@ -74,19 +137,15 @@ def get_player_history(player, user_id):
     return actions
 
 
-def get_player_location(player, user_id):
+def get_player_location(player, user_id, priority=PRIORITY_INTERACTIVE):
     """Get player's current coordinates."""
-    result = run_command(f"/data get entity {player} Pos", user_id)
-    if str(result).startswith("Error"):
-        return None, result
-
-    match = re.search(r"\[(.*?)\]", str(result))
-    if not match:
-        return None, "Could not parse position"
+    data, error = get_player_data(player, user_id, priority)
+    if data is None:
+        return None, error
 
     try:
-        parts = [p.strip().rstrip('d') for p in match.group(1).split(',')]
-        x, y, z = (int(float(p)) for p in parts[:3])
-        return {"x": x, "y": y, "z": z}, None
+        x, y, z = (int(float(v)) for v in data["Pos"][:3])
+        dimension = str(data.get("Dimension", "minecraft:overworld")).split(":")[-1]
+        return {"x": x, "y": y, "z": z, "dimension": dimension}, None
     except Exception:
         return None, "Could not parse position"
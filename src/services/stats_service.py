@@ -0,0 +1,301 @@
+"""Leaderboards from the server's ``world/stats/<uuid>.json`` files.
+
+The server writes each player's statistics to a JSON file when it saves
+them. A background job lists the stats directory of every tenant that
+asked for stats recently, compares each file's mtime and size with what
+was loaded last time, and parses only files that changed; within a file
+only stats whose value changed are written. Player names follow the
+server's ``usercache.json`` on every scan, whether or not stats changed.
+Leaderboards and comparisons are plain indexed queries on
+``player_stats`` and never touch RCON or the files; a tenant's first
+request starts its scans and sees its stats once the first one is done.
+
+Stats are named ``<category>:<stat>`` with the ``minecraft:`` namespace
+dropped (``custom:play_time``, ``mined:stone``). Per-category totals
+(``total:mined``) and the total distance travelled
+(``total:distance_cm``) are stored alongside, so they rank the same way.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from src.database import get_db
+from src.services.world_service import get_player_names, get_world_dir
+
+# Seconds between two scans of a tenant's stats directory
+STATS_INGEST_INTERVAL = float(os.environ.get("STATS_INGEST_INTERVAL", 30))
+# Seconds a tenant keeps being scanned after its last stats request
+STATS_INGEST_IDLE = float(os.environ.get("STATS_INGEST_IDLE", 600))
+
+TOTAL = "total"
+DISTANCE = "distance_cm"
+
+_StatKey = Tuple[str, str]
+
+logger = logging.getLogger(__name__)
+
+_watched: Dict[int, float] = {}   # tenant -> monotonic time of its last stats request
+_watch_lock = threading.Lock()
+_wake = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _short(name: str) -> str:
+    return name[len("minecraft:"):] if name.startswith("minecraft:") else name
+
+
+def parse_stats(document: Dict[str, Any]) -> Dict[_StatKey, int]:
+    """Flatten a stats file into ``{(category, stat): value}``, with totals added."""
+    values: Dict[_StatKey, int] = {}
+    totals: Dict[str, int] = {}
+    distance = 0
+    for category, stats in (document.get("stats") or {}).items():
+        if not isinstance(stats, dict):
+            continue
+        category = _short(category)
+        for stat, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            stat = _short(stat)
+            values[(category, stat)] = int(value)
+            totals[category] = totals.get(category, 0) + int(value)
+            if category == "custom" and stat.endswith("_one_cm"):
+                distance += int(value)
+    for category, total in totals.items():
+        if category != "custom":
+            values[(TOTAL, category)] = total
+    values[(TOTAL, DISTANCE)] = distance
+    return values
+
+
+def watch_stats(user_id: int) -> bool:
+    """Keep ``user_id``'s stats loaded in the background; False if there is no local world."""
+    global _thread
+    if get_world_dir(user_id) is None:
+        return False
+    with _watch_lock:
+        if user_id not in _watched:
+            _wake.set()   # scan the new tenant now rather than after the current pause
+        _watched[user_id] = time.monotonic()
+        if _thread is None or not _thread.is_alive():
+            app = current_app._get_current_object()
+            _thread = threading.Thread(target=_ingest_loop, args=(app,), name="stats-ingest", daemon=True)
+            _thread.start()
+    return True
+
+
+def _ingest_loop(app):
+    global _thread
+    while True:
+        _wake.clear()
+        with _watch_lock:
+            now = time.monotonic()
+            for user_id, requested in list(_watched.items()):
+                if now - requested > STATS_INGEST_IDLE:
+                    del _watched[user_id]
+            if not _watched:
+                _thread = None
+                return
+            tenants = list(_watched)
+        for user_id in tenants:
+            try:
+                with app.app_context():
+                    ingest_stats(user_id)
+            except Exception:
+                logger.exception(f"Loading stats files of tenant {user_id} failed")
+        _wake.wait(STATS_INGEST_INTERVAL)
+
+
+def _forget_watches():
+    """After fork the job thread is gone; let the child start its own."""
+    global _thread, _watch_lock, _wake
+    _watched.clear()
+    _watch_lock = threading.Lock()
+    _wake = threading.Event()
+    _thread = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_watches)
+
+
+def ingest_stats(user_id: int) -> Optional[Dict[str, int]]:
+    """Load stats files that changed since the last scan; None if there is no local world.
+
+    Also updates the stored names of players renamed in ``usercache.json``.
+    """
+    world_dir = get_world_dir(user_id)
+    if world_dir is None:
+        return None
+    stats_dir = os.path.join(world_dir, "stats")
+    result = {"scanned": 0, "loaded": 0, "removed": 0, "renamed": 0}
+    files = {}
+    try:
+        with os.scandir(stats_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name[:-5].lower()] = (entry.path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        pass
+    result["scanned"] = len(files)
+
+    db = get_db()
+    known = {
+        row["uuid"]: (row["mtime_ns"], row["size"], row["name"])
+        for row in db.execute("SELECT uuid, mtime_ns, size, name FROM stats_files WHERE user_id = ?", (user_id,))
+    }
+    names = get_player_names(user_id)
+    loaded = set()
+    for uuid, (path, mtime_ns, size) in files.items():
+        if known.get(uuid, ())[:2] == (mtime_ns, size):
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                values = parse_stats(json.load(f))
+        except (OSError, ValueError):
+            continue   # being rewritten; picked up on the next scan
+        db.execute(
+            """
+            INSERT INTO stats_files (user_id, uuid, name, mtime_ns, size) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, uuid) DO UPDATE SET
+                name = COALESCE(excluded.name, name), mtime_ns = excluded.mtime_ns,
+                size = excluded.size, loaded_at = CURRENT_TIMESTAMP
+            """,
+            (user_id, uuid, names.get(uuid), mtime_ns, size),
+        )
+        _store(db, user_id, uuid, values, new=uuid not in known)
+        loaded.add(uuid)
+    result["loaded"] = len(loaded)
+
+    renamed = [
+        (names[uuid], user_id, uuid)
+        for uuid, (_, _, name) in known.items()
+        if uuid in files and uuid not in loaded and names.get(uuid) not in (None, name)
+    ]
+    db.executemany("UPDATE stats_files SET name = ? WHERE user_id = ? AND uuid = ?", renamed)
+    result["renamed"] = len(renamed)
+
+    removed = [(user_id, uuid) for uuid in known.keys() - files.keys()]
+    # Foreign keys are not enforced on these connections, so the stats go first
+    db.executemany("DELETE FROM player_stats WHERE user_id = ? AND uuid = ?", removed)
+    db.executemany("DELETE FROM stats_files WHERE user_id = ? AND uuid = ?", removed)
+    result["removed"] = len(removed)
+    db.commit()
+    return result
+
+
+def _store(db, user_id: int, uuid: str, values: Dict[_StatKey, int], new: bool = False):
+    """Write only the stats of one player that changed."""
+    stored = {} if new else {
+        (row["category"], row["stat"]): row["value"]
+        for row in db.execute(
+            "SELECT category, stat, value FROM player_stats WHERE user_id = ? AND uuid = ?", (user_id, uuid)
+        )
+    }
+    db.executemany(
+        """
+        INSERT INTO player_stats (user_id, uuid, category, stat, value) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, uuid, category, stat) DO UPDATE SET value = excluded.value
+        """,
+        [(user_id, uuid, category, stat, value)
+         for (category, stat), value in values.items() if stored.get((category, stat)) != value],
+    )
+    db.executemany(
+        "DELETE FROM player_stats WHERE user_id = ? AND uuid = ? AND category = ? AND stat = ?",
+        [(user_id, uuid, category, stat) for category, stat in stored.keys() - values.keys()],
+    )
+
+
+def _split(name: str) -> Optional[_StatKey]:
+    category, _, stat = _short(name).partition(":")
+    return (_short(category), _short(stat)) if category and stat else None
+
+
+def _resolve_uuids(db, user_id: int, players: List[str]) -> Dict[str, str]:
+    """Requested player names (or UUIDs) -> UUIDs with stored stats."""
+    wanted = {player.lower(): player for player in players}
+    rows = db.execute(
+        f"""
+        SELECT uuid, name FROM stats_files
+        WHERE user_id = ? AND (LOWER(name) IN ({",".join("?" * len(wanted))}) OR uuid IN ({",".join("?" * len(wanted))}))
+        """,
+        (user_id, *wanted, *wanted),
+    ).fetchall()
+    found = {}
+    for row in rows:
+        key = row["uuid"] if row["uuid"] in wanted else (row["name"] or "").lower()
+        if key in wanted:
+            found[wanted[key]] = row["uuid"]
+    return found
+
+
+def get_leaderboard(user_id: int, stat: str, limit: int = 10, player: Optional[str] = None) -> Dict[str, Any]:
+    """Top ``limit`` players for ``stat`` (e.g. ``custom:play_time``), plus ``player``'s rank if given."""
+    key = _split(stat)
+    if key is None:
+        return {"available": True, "stat": stat, "entries": [], "player": None}
+    available = watch_stats(user_id)
+    db = get_db()
+    rows = db.execute(
+        """
+        SELECT s.uuid, f.name, s.value FROM player_stats s
+        JOIN stats_files f ON f.user_id = s.user_id AND f.uuid = s.uuid
+        WHERE s.user_id = ? AND s.category = ? AND s.stat = ?
+        ORDER BY s.value DESC LIMIT ?
+        """,
+        (user_id, *key, limit),
+    ).fetchall()
+    result = {
+        "available": available,
+        "stat": f"{key[0]}:{key[1]}",
+        "entries": [
+            {"rank": rank, "uuid": row["uuid"], "player": row["name"] or row["uuid"], "value": row["value"]}
+            for rank, row in enumerate(rows, 1)
+        ],
+        "player": None,
+    }
+    uuid = _resolve_uuids(db, user_id, [player]).get(player) if player else None
+    if uuid is not None:
+        row = db.execute(
+            "SELECT value FROM player_stats WHERE user_id = ? AND uuid = ? AND category = ? AND stat = ?",
+            (user_id, uuid, *key),
+        ).fetchone()
+        if row is not None:
+            ahead = db.execute(
+                "SELECT COUNT(*) FROM player_stats WHERE user_id = ? AND category = ? AND stat = ? AND value > ?",
+                (user_id, *key, row["value"]),
+            ).fetchone()[0]
+            result["player"] = {"player": player, "uuid": uuid, "value": row["value"], "rank": ahead + 1}
+    return result
+
+
+def compare_players(user_id: int, players: List[str], category: Optional[str] = None) -> Dict[str, Any]:
+    """Side-by-side stats of ``players`` (names or UUIDs), optionally one category only."""
+    available = watch_stats(user_id)
+    db = get_db()
+    uuids = _resolve_uuids(db, user_id, players) if players else {}
+    stats: Dict[str, Dict[str, int]] = {}
+    if uuids:
+        by_uuid = {uuid: player for player, uuid in uuids.items()}
+        query = f"""
+            SELECT uuid, category, stat, value FROM player_stats
+            WHERE user_id = ? AND uuid IN ({",".join("?" * len(by_uuid))})
+        """
+        params = [user_id, *by_uuid]
+        if category:
+            query += " AND category = ?"
+            params.append(_short(category))
+        for row in db.execute(query, params):
+            stats.setdefault(f"{row['category']}:{row['stat']}", {})[by_uuid[row["uuid"]]] = row["value"]
+    return {
+        "available": available,
+        "players": [player for player in players if player in uuids],
+        "missing": [player for player in players if player not in uuids],
+        "stats": dict(sorted(stats.items())),
+    }
@@ -0,0 +1,229 @@
+"""Read a Minecraft server's files directly when it runs on the same host.
+
+A tenant may set the server's directory (the one holding
+``server.properties``, ``usercache.json``, the world and ``logs/``) in
+settings. It is only honoured inside ``LOCAL_SERVERS_ROOT``, so tenants
+cannot point Mineboard at arbitrary paths; without that variable, local
+file access is off. Parsed files are cached until their mtime or size
+changes; map tiles are re-rendered only for chunks the server saved since.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from src.anvil import RegionCache
+from src.database import DB_PATH
+from src.nbt import NbtError, read_nbt_file
+from src.services.config_service import get_rcon_config
+from src.world_map import MAX_LEVEL, TileRenderer
+
+LOCAL_SERVERS_ROOT = os.environ.get("LOCAL_SERVERS_ROOT")
+# Rendered map tiles and the chunk timestamps they were drawn from
+MAP_TILE_CACHE_DIR = os.environ.get("MAP_TILE_CACHE_DIR", os.path.join(os.path.dirname(DB_PATH), "tiles"))
+
+# Region directory of each dimension, relative to the world
+DIMENSION_REGIONS = {
+    "overworld": "region",
+    "the_nether": os.path.join("DIM-1", "region"),
+    "the_end": os.path.join("DIM1", "region"),
+}
+
+# Tags the player pages use; everything else in a .dat (recipe book, brain...) is skipped
+PLAYER_TAGS = (
+    "Pos", "Dimension", "Health", "foodLevel", "XpLevel", "XpP", "XpTotal", "playerGameType",
+    "Inventory", "EnderItems", "equipment", "active_effects", "ActiveEffects",
+)
+
+_UUID = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+class MtimeCache:
+    """Values computed from files, recomputed only when a file's mtime or size changes."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[Tuple[int, int], Any]] = {}
+
+    def get(self, path: str, loader: Callable[[str], Any], key: Any = None) -> Any:
+        """``loader(path)``, cached under ``(path, key)``; raises ``OSError`` if the file is gone."""
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        cache_key = (path, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = loader(path)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[cache_key] = (version, value)
+        return value
+
+
+_files = MtimeCache()
+
+
+def local_files_enabled() -> bool:
+    return bool(LOCAL_SERVERS_ROOT)
+
+
+def resolve_server_dir(path: Optional[str]) -> Optional[str]:
+    """The real path of ``path`` if it is a directory inside ``LOCAL_SERVERS_ROOT``."""
+    if not path or not LOCAL_SERVERS_ROOT:
+        return None
+    root = os.path.realpath(LOCAL_SERVERS_ROOT)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root or not os.path.isdir(resolved):
+        return None
+    return resolved
+
+
+def get_server_dir(user_id: int) -> Optional[str]:
+    """The tenant's local server directory, or None if not configured or not allowed."""
+    return resolve_server_dir(get_rcon_config(user_id).get("server_dir"))
+
+
+def _read_properties(path: str) -> Dict[str, str]:
+    properties = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith(("#", "!")) and "=" in line:
+                key, value = line.split("=", 1)
+                properties[key.strip()] = value.strip()
+    return properties
+
+
+def get_world_dir(user_id: int) -> Optional[str]:
+    """The tenant's world directory (``level-name`` from server.properties, default ``world``)."""
+    server_dir = get_server_dir(user_id)
+    if server_dir is None:
+        return None
+    try:
+        level_name = _files.get(os.path.join(server_dir, "server.properties"), _read_properties).get("level-name")
+    except OSError:
+        level_name = None
+    return resolve_server_dir(os.path.join(server_dir, level_name or "world"))
+
+
+def get_log_path(user_id: int) -> Optional[str]:
+    """The server's ``logs/latest.log`` (it may not exist yet), or None without a server directory."""
+    server_dir = get_server_dir(user_id)
+    return os.path.join(server_dir, "logs", "latest.log") if server_dir else None
+
+
+def _read_usercache(path: str) -> Dict[str, str]:
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    return {
+        entry["name"].lower(): entry["uuid"].lower()
+        for entry in entries if entry.get("name") and _UUID.match(str(entry.get("uuid", "")).lower())
+    }
+
+
+def _read_usercache_names(path: str) -> Dict[str, str]:
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    return {
+        entry["uuid"].lower(): entry["name"]
+        for entry in entries if entry.get("name") and _UUID.match(str(entry.get("uuid", "")).lower())
+    }
+
+
+def find_player_uuid(user_id: int, player: str) -> Optional[str]:
+    """A player's UUID from the server's ``usercache.json`` (or ``player`` itself if it is one)."""
+    if _UUID.match(player.lower()):
+        return player.lower()
+    server_dir = get_server_dir(user_id)
+    if server_dir is None:
+        return None
+    try:
+        return _files.get(os.path.join(server_dir, "usercache.json"), _read_usercache).get(player.lower())
+    except (OSError, ValueError):
+        return None
+
+
+def get_player_names(user_id: int) -> Dict[str, str]:
+    """UUID -> last known name, from the server's ``usercache.json``."""
+    server_dir = get_server_dir(user_id)
+    if server_dir is None:
+        return {}
+    try:
+        return _files.get(os.path.join(server_dir, "usercache.json"), _read_usercache_names, key="names")
+    except (OSError, ValueError):
+        return {}
+
+
+def read_player_file(user_id: int, player: str, tags: Iterable[str] = PLAYER_TAGS) -> Optional[Dict[str, Any]]:
+    """Selected tags of ``playerdata/<uuid>.dat`` for an online or offline player.
+
+    Returns None if local files are not configured or the player has no
+    data file. The file is re-read only when it changes (the server saves
+    online players on autosave and when they leave).
+    """
+    world_dir = get_world_dir(user_id)
+    uuid = find_player_uuid(user_id, player) if world_dir else None
+    if uuid is None:
+        return None
+    tags = tuple(tags)
+    path = os.path.join(world_dir, "playerdata", f"{uuid}.dat")
+    try:
+        return _files.get(path, lambda p: read_nbt_file(p, tags), key=tags)
+    except (OSError, NbtError):
+        return None
+
+
+_regions = RegionCache()
+_renderers: Dict[str, TileRenderer] = {}
+_renderers_lock = threading.Lock()
+
+
+def _renderer(world_dir: str, dimension: str) -> Optional[TileRenderer]:
+    region_dir = os.path.join(world_dir, DIMENSION_REGIONS[dimension])
+    if not os.path.isdir(region_dir):
+        return None
+    with _renderers_lock:
+        renderer = _renderers.get(region_dir)
+        if renderer is None:
+            # Several tenants may share a server directory, and so its tiles
+            name = hashlib.blake2b(region_dir.encode("utf-8"), digest_size=8).hexdigest()
+            renderer = TileRenderer(region_dir, os.path.join(MAP_TILE_CACHE_DIR, name), _regions)
+            _renderers[region_dir] = renderer
+        return renderer
+
+
+def get_map_info(user_id: int) -> Dict[str, Any]:
+    """Which dimensions have a map, and the world spawn, for the map view."""
+    world_dir = get_world_dir(user_id)
+    if world_dir is None:
+        return {"available": False, "dimensions": [], "spawn": None, "max_level": MAX_LEVEL}
+    dimensions = [name for name, path in DIMENSION_REGIONS.items() if os.path.isdir(os.path.join(world_dir, path))]
+    try:
+        level = _files.get(
+            os.path.join(world_dir, "level.dat"),
+            lambda p: read_nbt_file(p, ("Data.SpawnX", "Data.SpawnZ")),
+        ).get("Data", {})
+        spawn = {"x": level["SpawnX"], "z": level["SpawnZ"]} if "SpawnX" in level else None
+    except (OSError, NbtError):
+        spawn = None
+    return {"available": bool(dimensions), "dimensions": dimensions, "spawn": spawn, "max_level": MAX_LEVEL}
+
+
+def get_map_tile(user_id: int, dimension: str, level: int, x: int, z: int) -> Optional[Tuple[bytes, bool]]:
+    """PNG of map tile ``(x, z)`` at ``level`` (0 = one pixel per block) and whether it is up to date.
+
+    None if the map is unavailable. A stale tile is re-rendered in the
+    background; see ``TileRenderer.tile``.
+    """
+    if dimension not in DIMENSION_REGIONS or not 0 <= level <= MAX_LEVEL:
+        return None
+    world_dir = get_world_dir(user_id)
+    renderer = _renderer(world_dir, dimension) if world_dir else None
+    if renderer is None:
+        return None
+    return renderer.tile(level, x, z)
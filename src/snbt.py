@@ -0,0 +1,90 @@
+"""Parser for SNBT, the stringified NBT that ``data get`` prints.
+
+    >>> parse('{Health: 20.0f, Pos: [0.5d, 64.0d, 0.5d], Inventory: [{Slot: 0b, id: "minecraft:stone", count: 3}]}')
+    {'Health': 20.0, 'Pos': [0.5, 64.0, 0.5], 'Inventory': [{'Slot': 0, 'id': 'minecraft:stone', 'count': 3}]}
+
+Byte, short, int and long tags become ``int``; float and double tags
+become ``float``, except that values beyond the double range
+(``1.0E400d``) become None, as JSON has no infinity; typed arrays
+(``[I; 1, 2]``) become lists of ints; compounds become dicts and quoted
+or bare strings become ``str``.
+
+SNBT differs from JSON only in its scalars, so one regex pass rewrites
+keys, numbers and single-quoted strings into JSON and the C JSON decoder
+builds the structure. ``python -m benchmarks.bench_snbt`` compares this
+with walking the text in Python, which matters for full entity dumps
+with large inventories.
+"""
+import json
+import math
+import re
+from typing import Any, Optional
+
+# Prefix of a successful ``data get entity <name> [<path>]`` response
+ENTITY_DATA_MARKER = " has the following entity data: "
+
+_TOKEN = re.compile(
+    r'("(?:[^"\\]|\\.)*")'            # 1: double-quoted string, already JSON
+    r"|'((?:[^'\\]|\\.)*)'"           # 2: single-quoted string body
+    r"|([A-Za-z0-9_.+-]+)(\s*:)?"     # 3: bare word, 4: followed by ':' (a key)
+    r"|\[\s*[BIL]\s*;",               # typed array prefix
+    re.S,
+)
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?([bBsSlLfFdD]?)")
+_ESCAPE = re.compile(r"\\(.)", re.S)
+_FLOAT_SUFFIXES = frozenset("fFdD")
+_BOOLEANS = {"true": "1", "false": "0"}
+_decode = json.JSONDecoder(strict=False).decode
+
+
+class SnbtError(ValueError):
+    """Raised for text that is not valid SNBT."""
+
+
+def _unescape(body: str) -> str:
+    return _ESCAPE.sub(r"\1", body) if "\\" in body else body
+
+
+def _to_json(match) -> str:
+    quoted = match.group(1)
+    if quoted is not None:
+        # SNBT only escapes quotes and backslashes, but may escape a single quote
+        return quoted if "\\'" not in quoted else json.dumps(_unescape(quoted[1:-1]))
+    word = match.group(3)
+    if word is None:
+        single = match.group(2)
+        return "[" if single is None else json.dumps(_unescape(single))
+    # Bare words never contain characters JSON would escape
+    if match.group(4):
+        return f'"{word}":'
+    if word.isdigit() and (word[0] != "0" or word == "0"):
+        return word   # the common plain int, already valid JSON
+
+    number = _NUMBER.fullmatch(word)
+    if number is None:
+        return _BOOLEANS.get(word) or f'"{word}"'
+    suffix = number.group(1)
+    digits = word[:-1] if suffix else word
+    fractional = "." in digits or "e" in digits or "E" in digits
+    if suffix in _FLOAT_SUFFIXES or (not suffix and fractional):
+        value = float(digits)
+        return repr(value) if math.isfinite(value) else "null"
+    if fractional:
+        return f'"{word}"'   # e.g. "1.5b" is a string in SNBT
+    return str(int(digits))
+
+
+def parse(text: str) -> Any:
+    """Parse one SNBT value; raises ``SnbtError`` on malformed input."""
+    try:
+        return _decode(_TOKEN.sub(_to_json, text))
+    except ValueError as e:
+        raise SnbtError(f"Invalid SNBT: {e}") from None
+
+
+def parse_entity_data(response: str) -> Optional[Any]:
+    """The value in a ``data get entity`` response, or None if it is an error message."""
+    _, marker, body = str(response).partition(ENTITY_DATA_MARKER)
+    if not marker:
+        return None
+    return parse(body)
@@ -0,0 +1,459 @@
+"""Top-down map tiles rendered from Anvil region files.
+
+Tiles are 256x256 PNGs addressed by ``(level, x, z)``. At level 0 a pixel
+is one block, so a tile covers 16x16 chunks (a quarter region); each
+further level halves the resolution and is built from the four tiles
+below it. A column's colour comes from its surface block (the
+``WORLD_SURFACE`` heightmap) and is shaded against the column to its
+north, like in-game maps.
+
+Every tile has a version: a digest of the chunk timestamps it covers
+(level 0) or of its four children's versions. Finding a tile's version
+reads only region headers, so a request answers straight away from the
+in-memory LRU or the PNG on disk (which carries its version) when that
+is current. Otherwise the tile is queued for a background thread and the
+request gets the previous render, or a blank placeholder, meanwhile.
+
+A level-0 tile also keeps the chunk timestamps it was rendered from and
+its unshaded colours and heights. When it is rendered again, only chunks
+whose region timestamp changed are decoded and redrawn. Higher levels
+are rebuilt from their children, re-rendering only the stale ones.
+"""
+import array
+import collections
+import hashlib
+import logging
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.anvil import CHUNKS, RegionCache
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+MAX_LEVEL = 4
+_TILE_CHUNKS = TILE_SIZE // 16
+_NO_HEIGHT = -32768
+
+# Version of a tile with nothing on it; such tiles are never rendered or stored
+EMPTY_VERSION = bytes(16)
+_VERSION_KEY = b"Mineboard-Version"
+# Tiles waiting for the background renderer beyond this are dropped, oldest first
+_MAX_QUEUED = 256
+
+# Only the parts of a chunk the renderer looks at; lighting, biomes and entities are skipped
+CHUNK_TAGS = (
+    "Status", "yPos", "sections.Y", "sections.block_states", "Heightmaps.WORLD_SURFACE",
+    # Before 1.18 everything sits under "Level"
+    "Level.Status", "Level.Sections.Y", "Level.Sections.Palette", "Level.Sections.BlockStates",
+    "Level.Heightmaps.WORLD_SURFACE",
+)
+
+BLOCK_COLORS = {
+    "grass_block": (109, 153, 48), "dirt": (134, 96, 67), "coarse_dirt": (119, 85, 59),
+    "podzol": (91, 63, 24), "mycelium": (111, 99, 107), "dirt_path": (148, 121, 65),
+    "farmland": (81, 44, 15), "mud": (60, 57, 60), "moss_block": (89, 109, 45),
+    "sand": (219, 207, 163), "red_sand": (190, 102, 33), "gravel": (131, 127, 126), "clay": (160, 166, 179),
+    "stone": (125, 125, 125), "andesite": (136, 136, 137), "diorite": (188, 188, 188),
+    "granite": (149, 103, 85), "deepslate": (80, 80, 82), "tuff": (108, 109, 102),
+    "calcite": (223, 224, 220), "bedrock": (85, 85, 85), "cobblestone": (127, 127, 127),
+    "water": (63, 118, 228), "lava": (207, 92, 20), "ice": (145, 183, 253),
+    "packed_ice": (141, 180, 250), "blue_ice": (116, 167, 253), "snow": (249, 254, 254),
+    "snow_block": (249, 254, 254), "powder_snow": (248, 253, 253),
+    "netherrack": (97, 38, 38), "soul_sand": (81, 62, 50), "soul_soil": (75, 57, 46),
+    "basalt": (73, 72, 77), "blackstone": (42, 36, 41), "crimson_nylium": (130, 31, 31),
+    "warped_nylium": (43, 114, 101), "magma_block": (142, 63, 31), "glowstone": (171, 131, 84),
+    "end_stone": (219, 222, 158), "obsidian": (15, 10, 24), "terracotta": (152, 94, 67),
+    "sandstone": (216, 203, 155), "red_sandstone": (186, 99, 29),
+    "oak_leaves": (60, 120, 30), "spruce_leaves": (52, 86, 52), "birch_leaves": (98, 128, 57),
+    "jungle_leaves": (48, 132, 22), "acacia_leaves": (74, 112, 27), "dark_oak_leaves": (52, 102, 22),
+    "mangrove_leaves": (72, 114, 34), "cherry_leaves": (228, 177, 199), "azalea_leaves": (90, 115, 44),
+    "lily_pad": (32, 128, 48), "seagrass": (32, 100, 140), "kelp": (40, 110, 120),
+    "short_grass": (109, 153, 48), "grass": (109, 153, 48), "tall_grass": (109, 153, 48),
+    "fern": (96, 140, 45), "large_fern": (96, 140, 45), "sugar_cane": (148, 192, 101),
+    "pumpkin": (198, 118, 24), "melon": (111, 145, 30), "cactus": (85, 127, 43),
+}
+
+# Fallbacks by name fragment, checked in order
+_KEYWORD_COLORS = (
+    ("leaves", (60, 120, 30)), ("water", (63, 118, 228)), ("log", (102, 81, 51)), ("wood", (102, 81, 51)),
+    ("planks", (162, 130, 78)), ("stairs", (150, 120, 80)), ("slab", (150, 120, 80)), ("fence", (140, 110, 70)),
+    ("door", (140, 110, 70)), ("glass", (200, 220, 230)), ("wool", (220, 220, 220)), ("concrete", (170, 170, 170)),
+    ("terracotta", (152, 94, 67)), ("brick", (150, 97, 83)), ("deepslate", (80, 80, 82)), ("stone", (125, 125, 125)),
+    ("ore", (125, 125, 125)), ("sand", (219, 207, 163)), ("snow", (249, 254, 254)), ("ice", (145, 183, 253)),
+    ("coral", (200, 90, 120)), ("flower", (180, 60, 60)), ("tulip", (180, 60, 60)), ("mushroom", (150, 110, 90)),
+    ("crimson", (130, 31, 31)), ("warped", (43, 114, 101)), ("nether", (97, 38, 38)), ("copper", (192, 107, 79)),
+    ("rail", (130, 120, 100)), ("carpet", (200, 200, 200)), ("bed", (160, 40, 40)), ("crop", (120, 160, 50)),
+    ("wheat", (180, 160, 60)), ("carrots", (120, 160, 50)), ("potatoes", (120, 160, 50)), ("vine", (60, 110, 30)),
+)
+_DEFAULT_COLOR = (140, 140, 140)
+# Brighter when higher than the block to the north, darker when lower
+_SHADE_UP, _SHADE_FLAT, _SHADE_DOWN = 255, 220, 180
+
+_color_cache: Dict[str, Tuple[int, int, int]] = {}
+
+
+def block_color(name: str) -> Tuple[int, int, int]:
+    color = _color_cache.get(name)
+    if color is None:
+        short = name.split(":", 1)[-1]
+        color = BLOCK_COLORS.get(short)
+        if color is None:
+            color = next((c for keyword, c in _KEYWORD_COLORS if keyword in short), _DEFAULT_COLOR)
+        _color_cache[name] = color
+    return color
+
+
+def _unpack(longs: List[int], bits: int, count: int) -> List[int]:
+    """Values packed ``bits`` wide into longs without spanning (1.16+)."""
+    per_long = 64 // bits
+    mask = (1 << bits) - 1
+    values = []
+    for word in longs:
+        for i in range(per_long):
+            values.append((word >> (i * bits)) & mask)
+            if len(values) == count:
+                return values
+    return values + [0] * (count - len(values))
+
+
+def _heightmap_bits(longs: List[int]) -> int:
+    for bits in range(1, 33):
+        if -(-256 // (64 // bits)) == len(longs):
+            return bits
+    return 9
+
+
+def render_chunk(chunk: Dict) -> Optional[Tuple[List[Tuple[int, int, int]], List[int]]]:
+    """Surface colours and heights of a chunk's 256 columns (index ``z * 16 + x``)."""
+    level = chunk.get("Level", chunk)
+    status = str(level.get("Status", "full")).split(":")[-1]
+    if status not in ("full", "postprocessed", "fullchunk"):
+        return None   # still being generated
+    heightmap = (level.get("Heightmaps") or {}).get("WORLD_SURFACE")
+    if not heightmap:
+        return None
+    heights = _unpack(heightmap, _heightmap_bits(heightmap), 256)
+    min_y = chunk.get("yPos", 0) * 16
+
+    sections = {}
+    for section in level.get("sections") or level.get("Sections") or []:
+        states = section.get("block_states")
+        palette = states.get("palette") if states else section.get("Palette")
+        data = states.get("data") if states else section.get("BlockStates")
+        if palette:
+            sections[section.get("Y", 0)] = (palette, data)
+
+    decoded: Dict[int, Tuple[list, Optional[List[int]]]] = {}
+    colors, surface = [], []
+    for index, height in enumerate(heights):
+        if height == 0:
+            colors.append(None)
+            surface.append(_NO_HEIGHT)
+            continue
+        y = min_y + height - 1
+        section_y = y >> 4
+        if section_y not in decoded:
+            palette, data = sections.get(section_y, (None, None))
+            bits = max(4, (len(palette) - 1).bit_length()) if palette else 4
+            decoded[section_y] = (palette, _unpack(data, bits, 4096) if data and palette and len(palette) > 1 else None)
+        palette, states = decoded[section_y]
+        if not palette:
+            colors.append(_DEFAULT_COLOR)
+        else:
+            state = states[((y & 15) << 8) | index] if states else 0
+            colors.append(block_color(palette[state].get("Name", "") if state < len(palette) else ""))
+        surface.append(y)
+    return colors, surface
+
+
+def encode_png(width: int, height: int, rgba: bytes, version: Optional[bytes] = None) -> bytes:
+    """A minimal 8-bit RGBA PNG, with the tile ``version`` in a ``tEXt`` chunk if given."""
+    stride = width * 4
+    raw = b"".join(b"\x00" + rgba[row * stride:(row + 1) * stride] for row in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + (chunk(b"tEXt", _VERSION_KEY + b"\x00" + version.hex().encode("ascii")) if version else b"")
+        + chunk(b"IDAT", zlib.compress(raw, 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def png_version(png: bytes) -> Optional[bytes]:
+    """The tile version stored by ``encode_png``, or None."""
+    offset = 8
+    while offset + 8 <= len(png):
+        length = struct.unpack_from(">I", png, offset)[0]
+        kind = png[offset + 4:offset + 8]
+        if kind == b"tEXt":
+            keyword, _, value = png[offset + 8:offset + 8 + length].partition(b"\x00")
+            if keyword == _VERSION_KEY:
+                try:
+                    return bytes.fromhex(value.decode("ascii"))
+                except ValueError:
+                    return None
+        elif kind == b"IDAT":
+            return None   # written before the image data
+        offset += 12 + length
+    return None
+
+
+EMPTY_TILE = encode_png(TILE_SIZE, TILE_SIZE, bytes(TILE_SIZE * TILE_SIZE * 4))
+
+
+def _shade(base: bytearray, heights: "array.array") -> bytes:
+    rgba = bytearray(TILE_SIZE * TILE_SIZE * 4)
+    for i, height in enumerate(heights):
+        if height == _NO_HEIGHT:
+            continue
+        north = heights[i - TILE_SIZE] if i >= TILE_SIZE else height
+        if north == _NO_HEIGHT or north == height:
+            shade = _SHADE_FLAT
+        else:
+            shade = _SHADE_UP if height > north else _SHADE_DOWN
+        o = i * 4
+        rgba[o] = base[i * 3] * shade // 255
+        rgba[o + 1] = base[i * 3 + 1] * shade // 255
+        rgba[o + 2] = base[i * 3 + 2] * shade // 255
+        rgba[o + 3] = 255
+    return bytes(rgba)
+
+
+def _stamps_version(stamps: tuple) -> bytes:
+    if not any(stamps):
+        return EMPTY_VERSION
+    return hashlib.blake2b(struct.pack(f">{len(stamps)}i", *stamps), digest_size=16).digest()
+
+
+class TileRenderer:
+    """Cached tiles for one dimension's ``region`` directory.
+
+    Args:
+        region_dir: Directory holding ``r.<x>.<z>.mca`` files.
+        cache_dir: Where tile PNGs and their render state are kept.
+        regions: Shared open region files.
+        max_tiles: Rendered tiles kept in memory.
+    """
+
+    def __init__(self, region_dir: str, cache_dir: str, regions: Optional[RegionCache] = None, max_tiles: int = 256):
+        self.region_dir = region_dir
+        self.cache_dir = cache_dir
+        self.regions = regions or RegionCache()
+        self.max_tiles = max_tiles
+        self._lock = threading.Lock()
+        # (level, x, z) -> (version, png), least recently used first
+        self._tiles: "OrderedDict[Tuple[int, int, int], Tuple[bytes, bytes]]" = OrderedDict()
+        self._queue: "collections.deque[Tuple[int, int, int]]" = collections.deque()
+        self._thread: Optional[threading.Thread] = None
+
+    def tile(self, level: int, x: int, z: int) -> Tuple[bytes, bool]:
+        """PNG for tile ``(x, z)`` at ``level``, and whether it is up to date.
+
+        A stale tile is queued for the background renderer; until it is
+        done, this returns the previous render or a blank tile.
+        """
+        png = self._current(level, x, z, self._version(level, x, z))
+        if png is not None:
+            return png, True
+        previous = self._remembered(level, x, z) or self._read_tile(level, x, z)
+        self._schedule((level, x, z))
+        return (previous[1] if previous else EMPTY_TILE), False
+
+    def render(self, level: int, x: int, z: int) -> bytes:
+        """PNG for tile ``(x, z)`` at ``level``, rendering it (and stale children) now."""
+        version = self._version(level, x, z)
+        png = self._current(level, x, z, version)
+        if png is not None:
+            return png
+        if level == 0:
+            version, png = self._render_base(x, z)
+        else:
+            children = [self.render(level - 1, 2 * x + dx, 2 * z + dz) for dz in (0, 1) for dx in (0, 1)]
+            png = self._downsample(children, version)
+            self._write(self._tile_path(level, x, z) + ".png", png)
+        self._remember((level, x, z), version, png)
+        return png
+
+    # Versions and lookups
+
+    def _version(self, level: int, x: int, z: int) -> bytes:
+        if level == 0:
+            return _stamps_version(self._stamps(x, z)[1])
+        children = [self._version(level - 1, 2 * x + dx, 2 * z + dz) for dz in (0, 1) for dx in (0, 1)]
+        if all(child == EMPTY_VERSION for child in children):
+            return EMPTY_VERSION
+        return hashlib.blake2b(b"".join(children), digest_size=16).digest()
+
+    def _stamps(self, x: int, z: int):
+        """The region holding level-0 tile ``(x, z)`` and the timestamps of its 16x16 chunks."""
+        region = self.regions.get(os.path.join(self.region_dir, f"r.{x >> 1}.{z >> 1}.mca"))
+        if region is None:
+            return None, ()
+        chunk_x0, chunk_z0 = (x & 1) * _TILE_CHUNKS, (z & 1) * _TILE_CHUNKS
+        all_stamps = region.timestamps()
+        return region, tuple(
+            all_stamps[(chunk_z0 + cz) * CHUNKS + chunk_x0 + cx]
+            for cz in range(_TILE_CHUNKS) for cx in range(_TILE_CHUNKS)
+        )
+
+    def _current(self, level: int, x: int, z: int, version: bytes) -> Optional[bytes]:
+        """The tile if a render of ``version`` is in memory or on disk."""
+        if version == EMPTY_VERSION:
+            return EMPTY_TILE
+        remembered = self._remembered(level, x, z)
+        if remembered is not None and remembered[0] == version:
+            return remembered[1]
+        stored = self._read_tile(level, x, z)
+        if stored is not None and stored[0] == version:
+            self._remember((level, x, z), *stored)
+            return stored[1]
+        return None
+
+    def _remembered(self, level: int, x: int, z: int) -> Optional[Tuple[bytes, bytes]]:
+        with self._lock:
+            cached = self._tiles.get((level, x, z))
+            if cached is not None:
+                self._tiles.move_to_end((level, x, z))
+            return cached
+
+    def _remember(self, key: Tuple[int, int, int], version: bytes, png: bytes):
+        with self._lock:
+            self._tiles[key] = (version, png)
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+
+    def _read_tile(self, level: int, x: int, z: int) -> Optional[Tuple[bytes, bytes]]:
+        try:
+            with open(self._tile_path(level, x, z) + ".png", "rb") as f:
+                png = f.read()
+        except OSError:
+            return None
+        version = png_version(png)
+        return (version, png) if version is not None else None
+
+    # Background rendering
+
+    def _schedule(self, key: Tuple[int, int, int]):
+        with self._lock:
+            if key in self._queue:
+                self._queue.remove(key)
+            # Newest first: the tiles of the view the user is looking at now
+            self._queue.append(key)
+            while len(self._queue) > _MAX_QUEUED:
+                self._queue.popleft()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._render_loop, name="map-tiles", daemon=True)
+                self._thread.start()
+
+    def _render_loop(self):
+        while True:
+            with self._lock:
+                if not self._queue:
+                    # Under the lock, so a tile queued now starts a fresh thread
+                    self._thread = None
+                    return
+                key = self._queue.pop()
+            try:
+                self.render(*key)
+            except Exception:
+                logger.exception(f"Rendering map tile {key} of {self.region_dir} failed")
+
+    # Rendering
+
+    def _downsample(self, children: List[bytes], version: bytes) -> bytes:
+        rgba = bytearray(TILE_SIZE * TILE_SIZE * 4)
+        half = TILE_SIZE // 2
+        for index, png in enumerate(children):
+            if png is EMPTY_TILE:
+                continue
+            pixels = _decode_own_png(png)
+            ox, oz = (index % 2) * half, (index // 2) * half
+            for row in range(half):
+                source = pixels[(2 * row) * TILE_SIZE * 4:(2 * row + 1) * TILE_SIZE * 4]
+                target = ((oz + row) * TILE_SIZE + ox) * 4
+                # Every other pixel of every other row
+                for col in range(half):
+                    rgba[target + col * 4:target + col * 4 + 4] = source[col * 8:col * 8 + 4]
+        return encode_png(TILE_SIZE, TILE_SIZE, bytes(rgba), version)
+
+    def _render_base(self, x: int, z: int) -> Tuple[bytes, bytes]:
+        region, stamps = self._stamps(x, z)
+        # From the timestamps actually drawn, in case the region changed since the request
+        version = _stamps_version(stamps)
+        if version == EMPTY_VERSION:
+            return version, EMPTY_TILE
+        chunk_x0, chunk_z0 = (x & 1) * _TILE_CHUNKS, (z & 1) * _TILE_CHUNKS
+        old_stamps, base, heights = self._load_state(x, z)
+        for i, stamp in enumerate(stamps):
+            if old_stamps is not None and old_stamps[i] == stamp:
+                continue
+            cx, cz = i % _TILE_CHUNKS, i // _TILE_CHUNKS
+            chunk = region.read_chunk(chunk_x0 + cx, chunk_z0 + cz, CHUNK_TAGS) if stamp else None
+            rendered = render_chunk(chunk) if chunk else None
+            for column in range(256):
+                px = cx * 16 + (column & 15)
+                pz = cz * 16 + (column >> 4)
+                pixel = pz * TILE_SIZE + px
+                color = rendered[0][column] if rendered else None
+                if color is None:
+                    heights[pixel] = _NO_HEIGHT
+                else:
+                    heights[pixel] = rendered[1][column]
+                    base[pixel * 3:pixel * 3 + 3] = bytes(color)
+        png = encode_png(TILE_SIZE, TILE_SIZE, _shade(base, heights), version)
+        path = self._tile_path(0, x, z)
+        self._write(path + ".state", struct.pack(f">{len(stamps)}i", *stamps) + bytes(base) + heights.tobytes())
+        self._write(path + ".png", png)
+        return version, png
+
+    # Files
+
+    def _tile_path(self, level: int, x: int, z: int) -> str:
+        return os.path.join(self.cache_dir, str(level), f"{x}_{z}")
+
+    def _load_state(self, x: int, z: int):
+        """Timestamps, unshaded colours and heights from the last render, if any."""
+        pixels = TILE_SIZE * TILE_SIZE
+        stamps_size = 4 * _TILE_CHUNKS * _TILE_CHUNKS
+        try:
+            with open(self._tile_path(0, x, z) + ".state", "rb") as f:
+                data = f.read()
+        except OSError:
+            data = b""
+        if len(data) != stamps_size + 3 * pixels + 2 * pixels:
+            return None, bytearray(3 * pixels), array.array("h", [_NO_HEIGHT]) * pixels
+        stamps = struct.unpack_from(f">{_TILE_CHUNKS * _TILE_CHUNKS}i", data)
+        base = bytearray(data[stamps_size:stamps_size + 3 * pixels])
+        heights = array.array("h", data[stamps_size + 3 * pixels:])
+        return stamps, base, heights
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+
+def _decode_own_png(png: bytes) -> bytes:
+    """RGBA pixels of a PNG written by ``encode_png`` (filter type 0 only)."""
+    offset, idat = 8, []
+    while offset < len(png):
+        length = struct.unpack_from(">I", png, offset)[0]
+        kind = png[offset + 4:offset + 8]
+        if kind == b"IDAT":
+            idat.append(png[offset + 8:offset + 8 + length])
+        offset += 12 + length
+    raw = zlib.decompress(b"".join(idat))
+    stride = TILE_SIZE * 4 + 1
+    return b"".join(raw[row * stride + 1:(row + 1) * stride] for row in range(TILE_SIZE))
@@ -0,0 +1,29 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+from flask import Flask
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Modules read their configuration at import time; keep tests off real data
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(prefix="mineboard-test-"), "data.db"))
+
+
+@pytest.fixture
+def app_db(tmp_path, monkeypatch):
+    """An app context with a fresh, initialised database."""
+    from src import database
+
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "data.db"))
+    app = Flask(__name__)
+    app.teardown_appcontext(database.close_db)
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        database.init_db()
+    with app.app_context():
+        yield app
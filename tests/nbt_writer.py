@@ -0,0 +1,116 @@
+"""Minimal NBT and Anvil writers for building test fixtures."""
+import gzip
+import os
+import struct
+import zlib
+
+from src.nbt import (
+    TAG_BYTE, TAG_BYTE_ARRAY, TAG_COMPOUND, TAG_DOUBLE, TAG_END, TAG_FLOAT, TAG_INT, TAG_INT_ARRAY,
+    TAG_LIST, TAG_LONG, TAG_LONG_ARRAY, TAG_SHORT, TAG_STRING,
+)
+
+_FORMATS = {TAG_BYTE: ">b", TAG_SHORT: ">h", TAG_INT: ">i", TAG_LONG: ">q", TAG_FLOAT: ">f", TAG_DOUBLE: ">d"}
+_ARRAY_FORMATS = {TAG_BYTE_ARRAY: "b", TAG_INT_ARRAY: "i", TAG_LONG_ARRAY: "q"}
+
+
+class Tag:
+    """A value with an explicit tag type, e.g. ``Tag(TAG_BYTE, 1)`` or ``Tag(TAG_LIST, [...], TAG_INT)``."""
+
+    def __init__(self, tag: int, value, item_tag: int = TAG_END):
+        self.tag, self.value, self.item_tag = tag, value, item_tag
+
+
+def _tag_of(value) -> int:
+    if isinstance(value, Tag):
+        return value.tag
+    if isinstance(value, bool):
+        return TAG_BYTE
+    if isinstance(value, int):
+        return TAG_INT
+    if isinstance(value, float):
+        return TAG_DOUBLE
+    if isinstance(value, str):
+        return TAG_STRING
+    if isinstance(value, dict):
+        return TAG_COMPOUND
+    if isinstance(value, list):
+        return TAG_LIST
+    raise TypeError(f"No NBT tag for {value!r}")
+
+
+def _string(text: str) -> bytes:
+    raw = text.encode("utf-8")
+    return struct.pack(">H", len(raw)) + raw
+
+
+def _payload(value) -> bytes:
+    tag = _tag_of(value)
+    item_tag = TAG_END
+    if isinstance(value, Tag):
+        value, item_tag = value.value, value.item_tag
+    if tag in _FORMATS:
+        return struct.pack(_FORMATS[tag], value)
+    if tag in _ARRAY_FORMATS:
+        return struct.pack(f">i{len(value)}{_ARRAY_FORMATS[tag]}", len(value), *value)
+    if tag == TAG_STRING:
+        return _string(value)
+    if tag == TAG_COMPOUND:
+        return b"".join(bytes([_tag_of(v)]) + _string(k) + _payload(v) for k, v in value.items()) + b"\x00"
+    if tag == TAG_LIST:
+        if value and item_tag == TAG_END:
+            item_tag = _tag_of(value[0])
+        return bytes([item_tag]) + struct.pack(">i", len(value)) + b"".join(_payload(v) for v in value)
+    raise TypeError(f"Unknown tag {tag}")
+
+
+def dumps(root: dict, name: str = "") -> bytes:
+    """An uncompressed NBT document with a compound root."""
+    return bytes([TAG_COMPOUND]) + _string(name) + _payload(root)
+
+
+def dumps_gzip(root: dict) -> bytes:
+    return gzip.compress(dumps(root))
+
+
+def pack_longs(values, bits: int):
+    """Pack values ``bits`` wide into signed longs without spanning (1.16+)."""
+    per_long = 64 // bits
+    longs = []
+    for i in range(0, len(values), per_long):
+        word = 0
+        for j, value in enumerate(values[i:i + per_long]):
+            word |= value << (j * bits)
+        longs.append(word - (1 << 64) if word >= 1 << 63 else word)
+    return longs
+
+
+def write_region(path: str, chunks: dict, timestamp: int = 1, compression: int = 2, external=()):
+    """An ``.mca`` file holding ``{(x, z): chunk_document}``.
+
+    Chunks listed in ``external`` go to ``c.<x>.<z>.mcc`` files next to
+    it, as the server does for chunks over 1 MiB.
+    """
+    region_x, region_z = (int(part) for part in os.path.basename(path).split(".")[1:3])
+    locations, timestamps, body = bytearray(4096), bytearray(4096), bytearray()
+    sector = 2
+    for (x, z), document in chunks.items():
+        data = dumps(document)
+        if compression == 1:
+            data = gzip.compress(data)
+        elif compression == 2:
+            data = zlib.compress(data)
+        if (x, z) in external:
+            mcc = f"c.{region_x * 32 + x}.{region_z * 32 + z}.mcc"
+            with open(os.path.join(os.path.dirname(path), mcc), "wb") as f:
+                f.write(data)
+            blob = struct.pack(">iB", 1, compression | 128)
+        else:
+            blob = struct.pack(">iB", len(data) + 1, compression) + data
+        blob += b"\x00" * (-len(blob) % 4096)
+        count = len(blob) // 4096
+        struct.pack_into(">I", locations, 4 * (z * 32 + x), (sector << 8) | count)
+        struct.pack_into(">i", timestamps, 4 * (z * 32 + x), timestamp)
+        body += blob
+        sector += count
+    with open(path, "wb") as f:
+        f.write(locations + timestamps + body)
@@ -0,0 +1,106 @@
+"""Anvil region files: chunk lookup, compression and the open-file cache."""
+import os
+
+import pytest
+
+from src.anvil import COMPRESSION_GZIP, COMPRESSION_LZ4, COMPRESSION_NONE, COMPRESSION_ZLIB, RegionCache, RegionFile
+from tests.nbt_writer import write_region
+
+
+def chunk(x, z):
+    return {"xPos": x, "zPos": z, "Status": "minecraft:full", "Lights": "skipped" * 50}
+
+
+@pytest.mark.parametrize("compression", [COMPRESSION_GZIP, COMPRESSION_ZLIB, COMPRESSION_NONE])
+def test_read_chunk(tmp_path, compression):
+    path = str(tmp_path / "r.0.0.mca")
+    write_region(path, {(3, 4): chunk(3, 4), (31, 31): chunk(31, 31)}, timestamp=1700000000, compression=compression)
+    region = RegionFile(path)
+    try:
+        assert region.read_chunk(3, 4)["xPos"] == 3
+        assert region.read_chunk(31, 31)["zPos"] == 31
+        assert region.read_chunk(0, 0) is None
+    finally:
+        region.close()
+
+
+def test_read_chunk_only_wanted_tags(tmp_path):
+    path = str(tmp_path / "r.0.0.mca")
+    write_region(path, {(0, 0): chunk(0, 0)})
+    region = RegionFile(path)
+    assert region.read_chunk(0, 0, ("Status", "xPos")) == {"Status": "minecraft:full", "xPos": 0}
+    region.close()
+
+
+def test_timestamps(tmp_path):
+    path = str(tmp_path / "r.-1.2.mca")
+    write_region(path, {(1, 2): chunk(1, 2)}, timestamp=1234)
+    region = RegionFile(path)
+    stamps = region.timestamps()
+    assert (region.region_x, region.region_z) == (-1, 2)
+    assert len(stamps) == 1024
+    assert stamps[2 * 32 + 1] == 1234
+    assert sum(stamps) == 1234
+    region.close()
+
+
+def test_external_chunk(tmp_path):
+    path = str(tmp_path / "r.1.-1.mca")
+    write_region(path, {(2, 3): chunk(34, -29)}, external={(2, 3)})
+    assert os.path.exists(tmp_path / "c.34.-29.mcc")
+    region = RegionFile(path)
+    assert region.read_chunk(2, 3)["xPos"] == 34
+    region.close()
+
+
+def test_lz4_and_damaged_chunks_are_skipped(tmp_path):
+    path = str(tmp_path / "r.0.0.mca")
+    write_region(path, {(0, 0): chunk(0, 0), (1, 0): chunk(1, 0)})
+    with open(path, "r+b") as f:
+        # First chunk claims LZ4, second one has its data cut off
+        f.seek(2 * 4096 + 4)
+        f.write(bytes([COMPRESSION_LZ4]))
+        f.seek(3 * 4096 + 5)
+        f.write(b"\x00" * 16)
+    region = RegionFile(path)
+    assert region.read_chunk(0, 0) is None
+    assert region.read_chunk(1, 0) is None
+    region.close()
+
+
+def test_region_shorter_than_its_header(tmp_path):
+    path = tmp_path / "r.0.0.mca"
+    path.write_bytes(b"")
+    region = RegionFile(str(path))
+    assert region.timestamps() == [0] * 1024
+    assert region.read_chunk(0, 0) is None
+    region.close()
+
+
+def test_region_cache_reopens_changed_files(tmp_path):
+    path = str(tmp_path / "r.0.0.mca")
+    write_region(path, {(0, 0): chunk(0, 0)}, timestamp=1)
+    cache = RegionCache()
+    first = cache.get(path)
+    assert cache.get(path) is first
+
+    write_region(path, {(0, 0): chunk(0, 0), (1, 1): chunk(1, 1)}, timestamp=2)
+    os.utime(path, ns=(1, 1))
+    second = cache.get(path)
+    assert second is not first
+    assert second.timestamps()[33] == 2
+    assert cache.get(str(tmp_path / "r.9.9.mca")) is None
+
+
+def test_region_cache_closes_least_recently_used(tmp_path):
+    cache = RegionCache(max_open=2)
+    paths = []
+    for x in range(3):
+        paths.append(str(tmp_path / f"r.{x}.0.mca"))
+        write_region(paths[-1], {(0, 0): chunk(0, 0)})
+    regions = [cache.get(path) for path in paths[:2]]
+    cache.get(paths[0])   # now the most recently used
+    cache.get(paths[2])
+    assert cache.get(paths[0]) is regions[0]
+    assert cache.get(paths[1]) is not regions[1]
+
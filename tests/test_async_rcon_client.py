@@ -0,0 +1,130 @@
+"""AsyncRconClient and the asyncio run_commands path against the fake RCON server."""
+import asyncio
+import socket
+import time
+
+import pytest
+
+from src import async_rcon_client, rcon_client
+from src.async_rcon_client import AsyncRconClient, run_commands, run_on_servers, run_sync
+from src.rcon_fake import FakeRconServer
+
+PASSWORD = "secret"
+
+
+@pytest.fixture
+def server():
+    with FakeRconServer(password=PASSWORD, players={"Steve": {}, "Alex": {}}) as server:
+        yield server
+        rcon_client._pool.invalidate((*server.address, PASSWORD))
+
+
+def config(server, password=PASSWORD):
+    host, port = server.address
+    return {"host": host, "port": port, "password": password, "user_id": None, "generation": 0}
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_command_and_reassembly(server):
+    server.max_payload = 100
+
+    async def main():
+        host, port = server.address
+        async with AsyncRconClient(host, PASSWORD, port=port, timeout=5) as client:
+            assert await client.command("list") == "There are 2 of a max of 20 players online: Steve, Alex"
+            return await client.commands(["help", "give Steve stone 3", "list"], window=2)
+
+    help_text, give, players = asyncio.run(main())
+    assert help_text == server.execute("help")
+    assert give == "Gave 3 [Stone] to Steve"
+    assert players.startswith("There are 2")
+
+
+def test_auth_failure(server):
+    async def main():
+        host, port = server.address
+        await AsyncRconClient(host, "wrong", port=port, timeout=5).connect()
+
+    with pytest.raises(Exception, match="Authentication failed"):
+        asyncio.run(main())
+    assert asyncio.run(run_commands(config(server, "wrong"), ["list"])) == [
+        "Error: Authentication failed. Check RCON password in settings."
+    ]
+
+
+def test_run_commands_reuses_pooled_connections(server):
+    async def main():
+        for _ in range(3):
+            assert (await run_commands(config(server), ["give Steve stone 1"]))[0].startswith("Gave 1")
+
+    asyncio.run(main())
+    assert server.stats["connections"] == 1
+
+
+def test_pool_follows_blocking_pool_invalidation(server):
+    async def main():
+        await run_commands(config(server), ["say hi"])
+        rcon_client._pool.invalidate((*server.address, PASSWORD))
+        await run_commands(config(server), ["say hi"])
+
+    asyncio.run(main())
+    assert server.stats["connections"] == 2
+
+
+def test_reads_are_served_from_the_shared_cache(server):
+    cfg = config(server)
+    first = asyncio.run(run_commands(cfg, ["list"]))
+    # The blocking client sees what the asyncio client cached, and vice versa
+    assert rcon_client.execute_batch(cfg, ["list"]) == first
+    assert asyncio.run(run_commands(cfg, ["list"])) == first
+    assert server.log == ["list"]
+
+
+def test_per_call_timeout(server):
+    server.latency = 1.0
+    started = time.monotonic()
+    results = asyncio.run(run_commands(config(server), ["say slow"], timeout=0.2))
+    assert time.monotonic() - started < 0.9
+    assert results == ["Error: Connection timed out. Is the Minecraft server running?"]
+
+
+def test_unreachable_server_opens_the_shared_breaker():
+    port = closed_port()
+    cfg = {"host": "127.0.0.1", "port": port, "password": PASSWORD}
+    try:
+        for _ in range(rcon_client._breakers.failure_threshold):
+            assert "refused" in asyncio.run(run_commands(cfg, ["list"], timeout=2))[0]
+        assert rcon_client._breakers.snapshot(("127.0.0.1", port))["state"] == "open"
+        assert asyncio.run(run_commands(cfg, ["list"]))[0].startswith("Error: Server offline")
+    finally:
+        rcon_client._breakers.reset(("127.0.0.1", port))
+
+
+def test_fan_out_across_servers_through_the_sync_bridge():
+    servers = [FakeRconServer(password=PASSWORD, players={f"P{i}": {}}, latency=0.2).start() for i in range(5)]
+    dead = {"host": "127.0.0.1", "port": closed_port(), "password": PASSWORD}
+    try:
+        started = time.monotonic()
+        results = run_sync(run_on_servers([config(s) for s in servers] + [dead], "say hello", timeout=2), timeout=10)
+        # Concurrent: five 0.2 s round trips do not add up
+        assert time.monotonic() - started < 0.8
+        assert results[:5] == [""] * 5
+        assert "refused" in results[5]
+    finally:
+        for s in servers:
+            s.stop()
+            rcon_client._pool.invalidate((*s.address, PASSWORD))
+        rcon_client._breakers.reset((dead["host"], dead["port"]))
+
+
+def test_sync_bridge_gives_up_after_its_timeout():
+    with pytest.raises(TimeoutError):
+        run_sync(asyncio.sleep(5), timeout=0.1)
+    # The loop is still usable afterwards
+    assert run_sync(asyncio.sleep(0, result="ok"), timeout=5) == "ok"
+    assert async_rcon_client._loop_thread._loop.is_running()
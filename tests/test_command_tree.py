@@ -0,0 +1,72 @@
+"""Parsing ``help`` output into a command tree, validation and completion."""
+import pytest
+
+from src.command_tree import parse_help, split_top_level
+
+HELP = """/give <targets> <item> [<count>]
+/time (add|query|set)
+/tell -> msg
+/msg <targets> <message>
+/list [uuids]
+/seed
+/execute (align|anchored|as|at|facing|if|in|on|positioned|rotated|run|store|summon|unless)
+/weather (clear|rain|thunder) [<duration>]
+/tp (<location>|<destination>|<targets>)
+"""
+
+
+@pytest.fixture
+def tree():
+    return parse_help(HELP)
+
+
+def test_split_keeps_brackets_and_quotes_together():
+    assert split_top_level('kill @e[type=cow, limit=1]') == ["kill", "@e[type=cow, limit=1]"]
+    assert split_top_level('say "hello there"  world') == ["say", '"hello there"', "world"]
+    assert split_top_level('give Steve stone{display:{Name:"a b"}} 2') == ["give", "Steve", 'stone{display:{Name:"a b"}}', "2"]
+    assert split_top_level("") == []
+
+
+def test_parse_help_reads_usages_and_aliases(tree):
+    assert len(tree) == 8
+    assert tree.resolve("tell") == "msg" and tree.resolve("nope") is None
+    assert tree.usage("give") == "/give <targets> <item> [<count>]"
+    assert tree.usage("seed") == "/seed"
+    assert "tell" in tree.names() and tree.names() == sorted(tree.names())
+
+
+def test_parse_help_splits_lines_glued_together_over_rcon():
+    glued = parse_help("/give <targets> <item>/time (add|query|set)/tell -> msg/msg <targets> <message>")
+    assert glued.names() == ["give", "msg", "tell", "time"]
+    assert glued.usage("time") == "/time (add|query|set)"
+
+
+def test_validate_accepts_plausible_commands(tree):
+    for command in ("/give Steve stone 2", "time set day", "tell Alex hi there", "list",
+                    "tp ~ ~1 ~", "weather rain 600", "minecraft:give Steve stone",
+                    "execute as @a run give @s stone"):
+        assert tree.validate(command) is None, command
+
+
+def test_validate_rejects_what_would_certainly_fail(tree):
+    assert tree.validate("   ") == "Command is empty"
+    assert tree.validate("gvie Steve stone") == "Unknown command /gvie. Did you mean /give?"
+    assert tree.validate("time sett day") == "/time expects add or query or set, not 'sett'"
+    assert tree.validate("seed 1") == "/seed takes no arguments"
+    assert tree.validate("give Steve") == "Incomplete command, usage: /give <targets> <item> [<count>]"
+    # The command after ``execute ... run`` is checked too
+    assert tree.validate("execute as @a run weather snow").startswith("/weather expects clear")
+
+
+def test_complete_command_names_and_keywords(tree):
+    assert tree.complete("/ti") == ["/time"]
+    assert tree.complete("t") == ["tell", "time", "tp"]
+    assert tree.complete("t", limit=2) == ["tell", "time"]
+    assert tree.complete("time ") == ["time add", "time query", "time set"]
+    assert tree.complete("/weather c") == ["/weather clear"]
+
+
+def test_complete_gives_up_on_free_form_arguments(tree):
+    assert tree.complete("give Ste") == []
+    assert tree.complete("seed ") == []
+    assert tree.complete("unknown ") == []
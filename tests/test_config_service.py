@@ -0,0 +1,79 @@
+"""Per-user RCON config cache and its credential generations."""
+import pytest
+
+from src.database import get_db
+from src.rcon_client import RconConnectionPool
+from src.services import config_service
+from src.services.config_service import get_rcon_config, save_rcon_config
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(config_service, "_config_cache", {})
+    monkeypatch.setattr(config_service, "_generations", {})
+
+
+def update_row(user_id, **columns):
+    """Change a saved config behind the cache's back, as another worker would."""
+    db = get_db()
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    db.execute(f"UPDATE rcon_config SET {assignments} WHERE user_id = ?", (*columns.values(), user_id))
+    db.commit()
+
+
+def test_defaults_for_no_user(app_db):
+    config = get_rcon_config(None)
+    assert config["source"] == "default" and config["generation"] == 0
+
+
+def test_saved_config_is_served_from_the_cache(app_db):
+    save_rcon_config(1, "mc.example", 25575, "secret")
+    update_row(1, password="changed")
+    config = get_rcon_config(1)
+    assert (config["host"], config["password"], config["source"]) == ("mc.example", "secret", "db")
+
+    # Callers get copies; changing one does not change the cache
+    config["password"] = "mutated"
+    assert get_rcon_config(1)["password"] == "secret"
+
+
+def test_generation_moves_only_when_credentials_change(app_db):
+    save_rcon_config(1, "mc.example", 25575, "secret")
+    first = get_rcon_config(1)["generation"]
+
+    save_rcon_config(1, "mc.example", 25575, "secret", game_port=25566, server_dir="/srv/mc")
+    assert get_rcon_config(1)["generation"] == first
+
+    save_rcon_config(1, "mc.example", 25575, "other")
+    assert get_rcon_config(1)["generation"] == first + 1
+    save_rcon_config(1, "mc.example", 25576, "other")
+    assert get_rcon_config(1)["generation"] == first + 2
+
+
+def test_expired_entries_pick_up_changes_from_other_workers(app_db, monkeypatch):
+    save_rcon_config(1, "mc.example", 25575, "secret")
+    first = get_rcon_config(1)["generation"]
+    monkeypatch.setattr(config_service, "CONFIG_CACHE_TTL", 0)
+    # Re-reading unchanged credentials keeps the generation
+    save_rcon_config(1, "mc.example", 25575, "secret")
+    assert get_rcon_config(1)["generation"] == first
+
+    update_row(1, host="other.example")
+    config = get_rcon_config(1)
+    assert config["host"] == "other.example" and config["generation"] == first + 1
+
+
+def test_users_have_independent_generations(app_db):
+    save_rcon_config(1, "a.example", 25575, "secret")
+    save_rcon_config(2, "b.example", 25575, "secret")
+    save_rcon_config(1, "a.example", 25575, "changed")
+    assert get_rcon_config(1)["generation"] == 2
+    assert get_rcon_config(2)["generation"] == 1
+
+
+def test_pool_notices_a_new_generation():
+    pool = RconConnectionPool()
+    assert not pool.note_config_generation(1, 1)   # first sighting
+    assert not pool.note_config_generation(1, 1)
+    assert pool.note_config_generation(1, 2)
+    assert not pool.note_config_generation(2, 5)
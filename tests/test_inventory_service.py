@@ -0,0 +1,77 @@
+"""Inventory snapshots: deltas, unchanged polls and concurrent recording."""
+import threading
+import time
+
+from src.database import get_db
+from src.services import inventory_service
+from src.services.inventory_service import INVENTORY, _load_slots, get_inventory_changes, record_inventory
+
+DIRT = ("minecraft:dirt", 64, None)
+STONE = ("minecraft:stone", 12, None)
+SAND = ("minecraft:sand", 1, None)
+# Enough slots that changing one is stored as a delta, not a new baseline
+HOTBAR = {(INVENTORY, slot): ("minecraft:torch", slot + 1, None) for slot in range(3, 9)}
+
+
+def stored(snapshot_id):
+    db = get_db()
+    row = db.execute("SELECT id, baseline_id FROM inventory_snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+    return _load_slots(db, row)
+
+
+def test_changes_are_stored_as_deltas(app_db):
+    first = record_inventory(1, "Steve", {**HOTBAR, (INVENTORY, 0): DIRT, (INVENTORY, 1): STONE})
+    second = record_inventory(1, "Steve", {**HOTBAR, (INVENTORY, 0): DIRT})
+    assert second != first
+    assert stored(second) == {**HOTBAR, (INVENTORY, 0): DIRT}
+    rows = get_db().execute("SELECT slot, item FROM inventory_slots WHERE snapshot_id = ?", (second,)).fetchall()
+    assert [tuple(row) for row in rows] == [(1, None)]
+
+    changes = get_inventory_changes(1, "steve", since=first)
+    assert changes["snapshot_id"] == second
+    assert [(c["slot"], c["after"]) for c in changes["changes"]] == [(1, None)]
+
+
+def test_unchanged_polls_write_nothing_until_the_check_is_due(app_db, monkeypatch):
+    slots = {(INVENTORY, 0): DIRT}
+    snapshot_id = record_inventory(1, "Steve", slots)
+    db = get_db()
+    changes = db.total_changes
+    assert record_inventory(1, "Steve", slots) == snapshot_id
+    assert db.total_changes == changes
+
+    monkeypatch.setattr(inventory_service, "CHECK_INTERVAL", 0)
+    assert record_inventory(1, "Steve", slots) == snapshot_id
+    assert db.total_changes == changes + 1
+
+
+def test_concurrent_polls_do_not_share_a_base_snapshot(app_db, monkeypatch):
+    record_inventory(1, "Steve", {**HOTBAR, (INVENTORY, 0): DIRT, (INVENTORY, 1): STONE})
+    load_slots = inventory_service._load_slots
+
+    def slow_load_slots(db, snapshot):
+        time.sleep(0.2)   # widen the window between reading the base and writing the delta
+        return load_slots(db, snapshot)
+
+    monkeypatch.setattr(inventory_service, "_load_slots", slow_load_slots)
+    inventories = [
+        {**HOTBAR, (INVENTORY, 0): DIRT},
+        {**HOTBAR, (INVENTORY, 0): DIRT, (INVENTORY, 1): STONE, (INVENTORY, 2): SAND},
+    ]
+    recorded = {}
+
+    def poll(slots):
+        # Its own app context, so its own connection, like another worker
+        with app_db.app_context():
+            recorded[record_inventory(1, "Steve", slots)] = slots
+
+    threads = [threading.Thread(target=poll, args=(slots,)) for slots in inventories]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    monkeypatch.setattr(inventory_service, "_load_slots", load_slots)
+    assert len(recorded) == 2
+    for snapshot_id, slots in recorded.items():
+        assert stored(snapshot_id) == slots
@@ -0,0 +1,143 @@
+"""LogFollower: tailing, rollover and truncation of ``logs/latest.log``."""
+import os
+import time
+
+import pytest
+
+from src import log_follower
+from src.log_follower import LogFollower, get_follower
+
+
+@pytest.fixture(params=["inotify", "poll"])
+def follower(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(log_follower, "LOG_POLL_INTERVAL", 0.05)
+    if request.param == "poll":
+        monkeypatch.setattr(log_follower, "_libc", None)
+    elif log_follower._libc is None:
+        pytest.skip("inotify is not available")
+    (tmp_path / "logs").mkdir()
+    path = tmp_path / "logs" / "latest.log"
+    path.write_text("[10:00:00] [Server thread/INFO]: Starting\n")
+    follower = LogFollower(str(path))
+    follower.touch()
+    yield follower
+    # Let the reader thread run out
+    monkeypatch.setattr(log_follower, "LOG_FOLLOW_IDLE", 0)
+
+
+def write(path, text, mode="a"):
+    with open(path, mode) as f:
+        f.write(text)
+
+
+def texts_after(follower, line_id=None, expected=None, timeout=5.0):
+    """Lines after ``line_id`` once there are ``expected`` of them (or the deadline passed)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        lines, _, _ = follower.lines_after(line_id)
+        if expected is None and lines or expected is not None and len(lines) >= expected:
+            return [text for _, text in lines]
+        if time.monotonic() > deadline:
+            return [text for _, text in lines]
+        time.sleep(0.02)
+
+
+def test_existing_lines_then_appended_ones(follower):
+    assert texts_after(follower, expected=1) == ["[10:00:00] [Server thread/INFO]: Starting"]
+    line_id = follower.last_id
+    write(follower.path, "one\ntwo\r\nthr")
+    assert texts_after(follower, line_id, 2) == ["one", "two"]
+    write(follower.path, "ee\n")
+    assert texts_after(follower, line_id, 3) == ["one", "two", "three"]
+
+
+def test_line_ids_are_file_offsets(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_follower, "LOG_POLL_INTERVAL", 0.05)
+    path = tmp_path / "latest.log"
+    path.write_text("")
+    follower = LogFollower(str(path), max_lines=3)
+    follower.touch()
+    write(path, "".join(f"line {i}\n" for i in range(5)))
+    assert texts_after(follower, expected=3) == ["line 2", "line 3", "line 4"]
+    lines, skipped, reset = follower.lines_after(None)
+    key = lines[0][0].rpartition("-")[0]
+    # Each line ends 7 bytes after the previous one
+    assert [line_id for line_id, _ in lines] == [f"{key}-21", f"{key}-28", f"{key}-35"]
+    assert (skipped, reset) == (False, False)
+
+    # Lines that fell out of the buffer are reported as skipped
+    assert follower.lines_after(f"{key}-7") == (lines, True, False)
+    assert follower.lines_after(f"{key}-14") == (lines, False, False)
+    assert follower.lines_after(f"{key}-28") == (lines[2:], False, False)
+    # An id another worker gave out before this one read that far
+    assert follower.lines_after(f"{key}-99") == ([], False, False)
+    # Ids from a file this follower never read start over
+    assert follower.lines_after("1.2.3-28") == (lines, False, True)
+    assert follower.lines_after("nonsense") == (lines, False, True)
+    monkeypatch.setattr(log_follower, "LOG_FOLLOW_IDLE", 0)
+
+
+def test_followers_of_one_file_agree_on_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_follower, "LOG_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(log_follower, "_SEED_BYTES", 20)
+    path = tmp_path / "latest.log"
+    write(path, "".join(f"line {i}\n" for i in range(5)))
+    early = LogFollower(str(path))
+    early.touch()
+    assert texts_after(early, expected=2) == ["line 3", "line 4"]
+    write(path, "line 5\n")
+    assert texts_after(early, expected=3) == ["line 3", "line 4", "line 5"]
+    late = LogFollower(str(path))   # another worker, started later with less of the file
+    late.touch()
+    assert texts_after(late, expected=2) == ["line 4", "line 5"]
+
+    # A poll may land on either follower with the id the other one gave out
+    early_lines = early.lines_after(None)[0]
+    assert late.lines_after(early_lines[0][0]) == (early_lines[1:], False, False)
+    assert early.lines_after(early_lines[1][0]) == late.lines_after(early_lines[1][0])
+    assert early.last_id == late.last_id
+    monkeypatch.setattr(log_follower, "LOG_FOLLOW_IDLE", 0)
+
+
+def test_rollover_drains_the_old_file_first(follower):
+    texts_after(follower, expected=1)
+    line_id = follower.last_id
+    write(follower.path, "last of old\n")
+    directory = os.path.dirname(follower.path)
+    os.rename(follower.path, os.path.join(directory, "2026-10-17-1.log"))
+    write(follower.path, "first of new\n", "w")
+    assert texts_after(follower, line_id, 2) == ["last of old", "first of new"]
+
+
+def test_truncated_log_is_read_from_the_start(follower):
+    texts_after(follower, expected=1)
+    line_id = follower.last_id
+    write(follower.path, "after restart\n", "w")
+    assert texts_after(follower, line_id, 1) == ["after restart"]
+    # The rewritten file has another first line, so ids from before do not carry over
+    assert follower.last_id.rpartition("-")[0] != line_id.rpartition("-")[0]
+
+
+def test_reader_stops_when_idle_and_resumes(follower, monkeypatch):
+    texts_after(follower, expected=1)
+    monkeypatch.setattr(log_follower, "LOG_FOLLOW_IDLE", 0)
+    # With inotify the reader only looks at the clock when it wakes; wake it
+    write(os.path.join(os.path.dirname(follower.path), "wake"), "")
+    deadline = time.monotonic() + 5
+    while follower._thread is not None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert follower._thread is None
+
+    line_id = follower.last_id
+    write(follower.path, "while stopped\n")
+    monkeypatch.setattr(log_follower, "LOG_FOLLOW_IDLE", 60)
+    follower.touch()
+    assert texts_after(follower, line_id, 1) == ["while stopped"]
+
+
+def test_followers_are_shared_per_path_and_forgotten_after_fork(tmp_path):
+    path = str(tmp_path / "latest.log")
+    assert get_follower(path) is get_follower(path)
+    before = get_follower(path)
+    log_follower._forget_followers()
+    assert get_follower(path) is not before
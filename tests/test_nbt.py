@@ -0,0 +1,106 @@
+"""Binary NBT: tag types, selected tags, and reading files as they decompress."""
+import gzip
+import zlib
+
+import pytest
+
+from src import nbt
+from src.nbt import (
+    TAG_BYTE, TAG_BYTE_ARRAY, TAG_FLOAT, TAG_INT_ARRAY, TAG_LIST, TAG_LONG, TAG_LONG_ARRAY, TAG_SHORT, TAG_STRING,
+    NbtError, read_nbt, read_nbt_file,
+)
+from tests.nbt_writer import Tag, dumps
+
+PLAYER = {
+    "DataVersion": 3953,
+    "Pos": [0.5, 64.0, -12.5],
+    "Health": Tag(TAG_FLOAT, 20.0),
+    "abilities": {"flying": Tag(TAG_BYTE, 0), "walkSpeed": Tag(TAG_FLOAT, 0.25)},
+    "recipeBook": {"recipes": [f"minecraft:recipe_{i}" for i in range(500)], "toBeDisplayed": Tag(TAG_LIST, [], TAG_STRING)},
+    "Heights": Tag(TAG_LONG_ARRAY, list(range(-300, 300))),
+    "UUID": Tag(TAG_INT_ARRAY, [1, -2, 3, -4]),
+    "Seed": Tag(TAG_BYTE_ARRAY, [-1, 0, 1]),
+    "Inventory": [{"Slot": Tag(TAG_BYTE, 0), "id": "minecraft:stone", "count": 3, "Damage": Tag(TAG_SHORT, 7)}],
+    "Time": Tag(TAG_LONG, 2 ** 40),
+    "foodLevel": 20,
+}
+DECODED = {
+    **PLAYER,
+    "Health": 20.0,
+    "abilities": {"flying": 0, "walkSpeed": 0.25},
+    "recipeBook": {"recipes": PLAYER["recipeBook"]["recipes"], "toBeDisplayed": []},
+    "Heights": list(range(-300, 300)),
+    "UUID": [1, -2, 3, -4],
+    "Seed": b"\xff\x00\x01",
+    "Inventory": [{"Slot": 0, "id": "minecraft:stone", "count": 3, "Damage": 7}],
+    "Time": 2 ** 40,
+}
+
+
+def test_read_every_tag_type():
+    assert read_nbt(dumps(PLAYER, name="root")) == DECODED
+
+
+def test_read_selected_tags():
+    data = dumps(PLAYER)
+    assert read_nbt(data, ("Pos", "abilities.flying", "missing", "Inventory")) == {
+        "Pos": [0.5, 64.0, -12.5], "abilities": {"flying": 0}, "Inventory": DECODED["Inventory"],
+    }
+    # A parent wanted whole wins over a path into it
+    assert read_nbt(data, ("abilities", "abilities.flying")) == {"abilities": DECODED["abilities"]}
+    assert read_nbt(data, ()) == {}
+
+
+def test_modified_utf8_strings():
+    data = dumps({"name": "x"}).replace(b"\x00\x01x", b"\x00\x09a\xc0\x80\xed\xa0\xbd\xed\xb8\x80")
+    assert read_nbt(data) == {"name": "a\x00\U0001f600"}
+
+
+@pytest.mark.parametrize("data, message", [
+    (dumps({"Pos": [1.0, 2.0]})[:-6], "Truncated NBT at offset"),
+    (b"\x09\x00\x00", "not a compound"),
+    (dumps({"a": Tag(TAG_INT_ARRAY, [1])}).replace(b"\x00\x00\x00\x01\x00", b"\xff\xff\xff\xff\x00", 1), "Negative length"),
+    (b"\x0a\x00\x00\x0e\x00\x01a\x00", "Unknown tag type 14"),
+])
+def test_malformed(data, message):
+    with pytest.raises(NbtError, match=message):
+        read_nbt(data)
+
+
+@pytest.fixture(params=["gzip", "zlib", "raw"])
+def player_file(request, tmp_path):
+    data = dumps(PLAYER)
+    data = {"gzip": gzip.compress, "zlib": zlib.compress, "raw": bytes}[request.param](data)
+    path = tmp_path / "player.dat"
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.mark.parametrize("read_size", [1, 7, 64 * 1024])
+def test_read_file(player_file, monkeypatch, read_size):
+    # Small reads put every kind of value across a buffer boundary
+    monkeypatch.setattr(nbt, "_READ_SIZE", read_size)
+    assert read_nbt_file(player_file) == DECODED
+    tags = ("Heights", "UUID", "foodLevel", "abilities.walkSpeed")
+    assert read_nbt_file(player_file, tags) == read_nbt(dumps(PLAYER), tags)
+
+
+def test_file_is_decompressed_only_as_far_as_needed(tmp_path, monkeypatch):
+    monkeypatch.setattr(nbt, "_READ_SIZE", 256)
+    data = gzip.compress(dumps(PLAYER))
+    path = tmp_path / "player.dat"
+    # Cut off in the recipe book, after Pos and Health
+    path.write_bytes(data[:len(data) // 2])
+    assert read_nbt_file(str(path), ("Pos", "Health")) == {"Pos": [0.5, 64.0, -12.5], "Health": 20.0}
+    with pytest.raises(NbtError, match="Cannot decompress"):
+        read_nbt_file(str(path))
+
+
+def test_truncated_file(tmp_path):
+    path = tmp_path / "player.dat"
+    path.write_bytes(dumps(PLAYER)[:-100])
+    with pytest.raises(NbtError, match="Truncated NBT at offset"):
+        read_nbt_file(str(path))
+    path.write_bytes(b"")
+    with pytest.raises(NbtError, match="Truncated NBT at offset 0"):
+        read_nbt_file(str(path))
@@ -0,0 +1,106 @@
+"""Circuit breaker state changes: closed, open, half-open and back."""
+import socket
+import time
+
+import pytest
+
+from src.rcon_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreakerRegistry
+
+
+@pytest.fixture
+def listener():
+    """A port that accepts TCP connections, as a server back online would."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        yield sock.getsockname()
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return ("127.0.0.1", sock.getsockname()[1])
+
+
+def wait_for_state(registry, key, state, timeout=5):
+    deadline = time.monotonic() + timeout
+    while registry.snapshot(key)["state"] != state:
+        assert time.monotonic() < deadline, f"breaker never became {state}"
+        time.sleep(0.005)
+
+
+def trip(registry, key):
+    for _ in range(registry.failure_threshold):
+        registry.record_failure(key, "Error: Connection refused.")
+
+
+def test_opens_after_consecutive_failures():
+    registry = CircuitBreakerRegistry(failure_threshold=3, base_backoff=60)
+    key = closed_port()
+    registry.record_failure(key, "Error: boom")
+    registry.record_failure(key, "Error: boom")
+    assert registry.before_call(key) is None
+    assert registry.snapshot(key)["failures"] == 2
+
+    registry.record_failure(key, "Error: Connection refused.")
+    snapshot = registry.snapshot(key)
+    assert snapshot["state"] == OPEN and 59 <= snapshot["retry_in"] <= 60
+    assert registry.before_call(key) == "Error: Server offline, retrying in 59s. Last error: Connection refused."
+
+
+def test_success_forgets_earlier_failures():
+    registry = CircuitBreakerRegistry(failure_threshold=2, base_backoff=60)
+    key = closed_port()
+    registry.record_failure(key, "Error: boom")
+    registry.record_success(key)
+    registry.record_failure(key, "Error: boom")
+    assert registry.snapshot(key) == {"state": CLOSED, "failures": 1, "retry_in": None, "last_error": "Error: boom"}
+
+
+def test_probe_half_opens_and_admits_a_single_trial(listener):
+    registry = CircuitBreakerRegistry(failure_threshold=1, base_backoff=0.01, probe_timeout=1)
+    trip(registry, listener)
+    wait_for_state(registry, listener, HALF_OPEN)
+
+    assert registry.before_call(listener) is None
+    # Everyone else fails fast while the trial is out
+    assert registry.before_call(listener).startswith("Error: Server offline")
+    registry.cancel_trial(listener)
+    assert registry.before_call(listener) is None
+
+    registry.record_success(listener)
+    assert registry.snapshot(listener)["state"] == CLOSED
+    assert registry.before_call(listener) is None
+
+
+def test_failed_trial_reopens_with_a_longer_backoff(listener):
+    registry = CircuitBreakerRegistry(failure_threshold=1, base_backoff=0.01, max_backoff=60, probe_timeout=1)
+    trip(registry, listener)
+    wait_for_state(registry, listener, HALF_OPEN)
+    assert registry.before_call(listener) is None
+
+    registry.record_failure(listener, "Error: Command timeout")
+    assert registry.snapshot(listener)["state"] == OPEN
+    assert registry._breakers[listener].backoff == pytest.approx(0.02)
+
+
+def test_unreachable_probes_back_off_up_to_the_cap():
+    registry = CircuitBreakerRegistry(failure_threshold=1, base_backoff=0.01, max_backoff=0.04, probe_timeout=1)
+    key = closed_port()
+    trip(registry, key)
+    deadline = time.monotonic() + 5
+    while registry._breakers[key].backoff < 0.04:
+        assert time.monotonic() < deadline, "backoff never reached its cap"
+        time.sleep(0.005)
+    time.sleep(0.1)
+    assert registry._breakers[key].backoff == 0.04
+    assert registry.snapshot(key)["state"] == OPEN
+
+
+def test_reset_closes_the_breaker():
+    registry = CircuitBreakerRegistry(failure_threshold=1, base_backoff=60)
+    key = closed_port()
+    trip(registry, key)
+    registry.reset(key)
+    assert registry.before_call(key) is None
+    assert registry.snapshot(key)["state"] == CLOSED
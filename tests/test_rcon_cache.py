@@ -0,0 +1,72 @@
+"""Read-only response caching and write invalidation, alone and through batches."""
+import pytest
+
+from src import rcon_client
+from src.rcon_cache import FAMILY_ENTITY, FAMILY_PLAYERS, ResponseCache
+from src.rcon_client import execute_batch
+from src.rcon_fake import FakeRconServer
+
+PASSWORD = "secret"
+
+
+def test_read_only_commands_do_not_invalidate():
+    cache = ResponseCache({FAMILY_PLAYERS: 60})
+    cache.put("srv", "list", "There are 0 players", cache.generation("srv"))
+    for command in ("scoreboard players get Steve kills", "banlist", "whitelist list", "data get entity Steve"):
+        cache.invalidate_for("srv", command)
+    assert cache.get("srv", "list") == "There are 0 players"
+    assert cache.generation("srv") == 0
+
+
+def test_writes_invalidate_what_they_touch():
+    cache = ResponseCache({FAMILY_PLAYERS: 60, FAMILY_ENTITY: 60})
+    cache.put("srv", "list", "players", 0)
+    cache.put("srv", "data get entity Steve Pos", "pos", 0)
+    cache.put("srv", "data get entity Alex Pos", "alex", 0)
+
+    assert cache.invalidate_for("srv", "tp Steve 1 2 3") == 1
+    assert cache.get("srv", "data get entity Steve Pos") is None
+    assert cache.get("srv", "data get entity Alex Pos") == "alex"
+    assert cache.get("srv", "list") == "players"
+
+    # Commands the cache does not understand may have changed anything
+    cache.invalidate_for("srv", "reload")
+    assert cache.get("srv", "list") is None and cache.get("srv", "data get entity Alex Pos") is None
+
+
+@pytest.fixture
+def server():
+    with FakeRconServer(password=PASSWORD, players={"Steve": {}, "Alex": {}}) as server:
+        yield server
+        rcon_client._pool.invalidate((*server.address, PASSWORD))
+
+
+def config(server):
+    host, port = server.address
+    return {"host": host, "port": port, "password": PASSWORD, "generation": 1}
+
+
+def test_reads_after_a_write_in_the_same_batch_run_live(server):
+    cfg = config(server)
+    before = execute_batch(cfg, ["data get entity Steve Pos"])[0]
+
+    moved = execute_batch(cfg, ["tp Steve 100 70 100", "data get entity Steve Pos"])
+    assert moved[1] != before and "100.0d, 70.0d, 100.0d" in moved[1]
+
+    # The fresh read was cached at the generation its own batch's write left behind
+    assert execute_batch(cfg, ["data get entity Steve Pos"]) == [moved[1]]
+    assert server.log == ["data get entity Steve Pos", "tp Steve 100 70 100", "data get entity Steve Pos"]
+
+
+def test_hits_before_the_first_write_are_still_served(server):
+    cfg = config(server)
+    players, alex = execute_batch(cfg, ["list", "data get entity Alex Pos"])
+    server.log.clear()
+
+    results = execute_batch(cfg, ["list", "tp Steve 1 2 3", "list", "data get entity Alex Pos"])
+    assert results[0] == results[2] == players and results[3] == alex
+    assert server.log == ["tp Steve 1 2 3", "list", "data get entity Alex Pos"]
+    # Entries the write could not have changed survive it
+    server.log.clear()
+    assert execute_batch(cfg, ["list", "data get entity Alex Pos"]) == [players, alex]
+    assert server.log == []
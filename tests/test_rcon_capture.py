@@ -0,0 +1,59 @@
+"""Capturing RCON traffic and replaying it."""
+import pytest
+
+from src import rcon_client
+from src.rcon_capture import CaptureWriter, read_capture, replay
+from src.rcon_fake import FakeRconServer
+
+LATENCY = 0.05
+
+
+@pytest.fixture
+def capture(tmp_path, monkeypatch):
+    path = str(tmp_path / "capture.jsonl")
+    monkeypatch.setattr(rcon_client, "_capture", CaptureWriter(path))
+    return path
+
+
+def test_pipelined_responses_are_timed_one_by_one(capture):
+    with FakeRconServer(password="pw", players={"Steve": {}}, latency=LATENCY) as server:
+        host, port = server.address
+        cfg = {"host": host, "port": port, "password": "pw", "generation": 1}
+        commands = ["list", "give Steve stone 1", "give Steve dirt 2", "give Steve sand 3"]
+        responses = rcon_client.execute_batch(cfg, commands, user_id=7)
+        rcon_client._pool.invalidate((host, port, "pw"))
+
+    entries = list(read_capture(capture))
+    assert [(e["s"], e["u"], e["c"], e["r"]) for e in entries] == [
+        (f"{host}:{port}", 7, command, response) for command, response in zip(commands, responses)
+    ]
+    # Each response took one server delay, not the time since the batch was sent
+    for entry in entries:
+        assert 1000 * LATENCY * 0.8 <= entry["l"] < 1000 * LATENCY * 1.8
+
+
+def test_errors_are_captured(capture):
+    with FakeRconServer(password="pw") as server:
+        server.drop_rate = 1.0
+        host, port = server.address
+        cfg = {"host": host, "port": port, "password": "pw", "generation": 1}
+        assert rcon_client.execute_batch(cfg, ["list", "seed"]) == ["Error: Connection closed by server"] * 2
+        rcon_client._pool.invalidate((host, port, "pw"))
+    entries = list(read_capture(capture))
+    assert [(e["c"], e["e"]) for e in entries] == [("list", "Error: Connection closed by server"),
+                                                   ("seed", "Error: Connection closed by server")]
+    assert all("r" not in e and e["l"] >= 0 for e in entries)
+
+
+def test_replay(capture):
+    with FakeRconServer(password="pw", players={"Steve": {}}, latency=LATENCY) as server:
+        host, port = server.address
+        cfg = {"host": host, "port": port, "password": "pw", "generation": 1}
+        rcon_client.execute_batch(cfg, ["list", "give Steve stone 1"], user_id=1)
+        # A write, so it runs live rather than from the cached list
+        rcon_client.execute_batch(cfg, ["give Steve stone 2"], user_id=2)
+        rcon_client._pool.invalidate((host, port, "pw"))
+
+        summary = replay(list(read_capture(capture)), host, port, "pw", speed=0)
+    assert (summary["commands"], summary["errors"], summary["users"]) == (3, 0, 2)
+    assert summary["captured"]["p50_ms"] == pytest.approx(summary["replayed"]["p50_ms"], rel=0.5)
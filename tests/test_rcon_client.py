@@ -0,0 +1,171 @@
+"""RconClient and the connection pool against the fake RCON server."""
+import threading
+
+import pytest
+
+from src import rcon_client
+from src.rcon_client import RconClient, RconConnectionPool, execute_batch, split_command
+from src.rcon_codec import MAX_COMMAND_BYTES
+from src.rcon_fake import FakeRconServer
+
+PASSWORD = "secret"
+
+
+@pytest.fixture
+def server():
+    with FakeRconServer(password=PASSWORD, players={"Steve": {}, "Alex": {}}) as server:
+        yield server
+
+
+def connect(server, password=PASSWORD):
+    host, port = server.address
+    client = RconClient(host, password, port=port, timeout=5)
+    client.connect()
+    return client
+
+
+def config(server, password=PASSWORD):
+    host, port = server.address
+    return {"host": host, "port": port, "password": password, "generation": 1}
+
+
+def test_command(server):
+    client = connect(server)
+    assert client.command("list") == "There are 2 of a max of 20 players online: Steve, Alex"
+    client.disconnect()
+
+
+def test_multi_packet_reply_is_reassembled(server):
+    server.max_payload = 100
+    client = connect(server)
+    response = client.command("help")
+    assert len(response) > 10 * server.max_payload
+    assert response == server.execute("help")
+    client.disconnect()
+
+
+def test_pipelined_commands_keep_their_order(server):
+    server.max_payload = 100
+    client = connect(server)
+    commands = ["help", "list", "give Steve stone 3", "list"]
+    responses = dict(client.iter_commands(commands, window=2))
+    assert responses[0].startswith("/")
+    assert responses[1] == responses[3]
+    assert responses[2] == "Gave 3 [Stone] to Steve"
+    client.disconnect()
+
+
+def test_auth_failure(server):
+    server.fail_auth = True
+    with pytest.raises(Exception, match="Authentication failed"):
+        connect(server)
+    assert server.stats["auth_failures"] == 1
+    assert execute_batch(config(server), ["list"], user_id=None) == [
+        "Error: Authentication failed. Check RCON password in settings."
+    ]
+
+
+def test_wrong_password(server):
+    with pytest.raises(Exception, match="Authentication failed"):
+        connect(server, password="wrong")
+
+
+def test_pool_reuses_connections(server):
+    host, port = server.address
+    pool = RconConnectionPool(max_per_server=2)
+    for _ in range(3):
+        client = pool.acquire(host, port, PASSWORD, timeout=5)
+        assert client.command("list").startswith("There are 2")
+        pool.release(client)
+    assert server.stats["connections"] == 1
+    pool.close_all()
+
+
+def test_pool_caps_connections_per_server(server):
+    host, port = server.address
+    pool = RconConnectionPool(max_per_server=2)
+    first = pool.acquire(host, port, PASSWORD, timeout=5)
+    second = pool.acquire(host, port, PASSWORD, timeout=5)
+    with pytest.raises(Exception, match="pool exhausted"):
+        pool.acquire(host, port, PASSWORD, timeout=0.1)
+
+    # A waiter gets the connection released while it waits
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(host, port, PASSWORD, timeout=5)))
+    waiter.start()
+    pool.release(first)
+    waiter.join()
+    assert acquired == [first]
+    assert server.stats["connections"] == 2
+    pool.release(second)
+    pool.release(acquired[0])
+    pool.close_all()
+
+
+def test_pool_replaces_connections_the_server_closed(server):
+    host, port = server.address
+    pool = RconConnectionPool()
+    client = pool.acquire(host, port, PASSWORD, timeout=5)
+    pool.release(client)
+    server.stop()
+
+    with FakeRconServer(port=port, password=PASSWORD) as restarted:
+        fresh = pool.acquire(host, port, PASSWORD, timeout=5)
+        assert fresh is not client
+        assert fresh.command("list").startswith("There are 0")
+        assert restarted.stats["connections"] == 1
+        pool.release(fresh)
+    pool.close_all()
+
+
+def test_stop_closes_open_connections(server):
+    client = connect(server)
+    assert client.is_alive()
+    server.stop()
+    with pytest.raises(Exception, match="Connection closed by server"):
+        client.command("list")
+
+
+def test_dropped_connection_is_an_error_and_discarded(server):
+    server.drop_rate = 1.0
+    client = connect(server)
+    with pytest.raises(Exception, match="Connection closed by server"):
+        client.command("list")
+    client.disconnect()
+
+    cfg = config(server)
+    assert execute_batch(cfg, ["list"]) == ["Error: Connection closed by server"]
+    server.drop_rate = 0.0
+    # The dropped socket was not handed back out
+    assert execute_batch(cfg, ["list"])[0].startswith("There are 2")
+    rcon_client._pool.invalidate((cfg["host"], cfg["port"], PASSWORD))
+
+
+def test_split_command_short_commands_pass_through():
+    assert split_command("say hi") == ["say hi"]
+    assert split_command("give Steve stone " + "1" * 1000) == ["give Steve stone " + "1" * 1000]
+
+
+def test_split_command_breaks_chat_at_words():
+    words = [f"word{i:04d}" for i in range(400)]
+    chunks = split_command("/tell Steve " + " ".join(words))
+    assert len(chunks) > 1
+    assert all(chunk.startswith("/tell Steve ") and len(chunk.encode("utf-8")) <= MAX_COMMAND_BYTES
+               for chunk in chunks)
+    assert " ".join(chunk[len("/tell Steve "):] for chunk in chunks) == " ".join(words)
+
+
+def test_split_command_hard_wraps_long_words_on_character_boundaries():
+    chunks = split_command("say " + "é" * 2000)
+    assert all(len(chunk.encode("utf-8")) <= MAX_COMMAND_BYTES for chunk in chunks)
+    assert "".join(chunk[len("say "):] for chunk in chunks) == "é" * 2000
+
+
+@pytest.mark.parametrize("command", [
+    "fill " + "1 " * 800,
+    "tell " + "A" * 1500 + " hi",   # the prefix alone is over the limit
+    "tell " + "A" * (MAX_COMMAND_BYTES - 7) + " " + "é" * 800,   # room for one byte, characters need two
+])
+def test_split_command_too_long(command):
+    with pytest.raises(Exception, match="Command too long"):
+        split_command(command)
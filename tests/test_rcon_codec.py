@@ -0,0 +1,77 @@
+"""RCON packet encoding, buffered decoding and response reassembly."""
+import pytest
+
+from src.rcon_codec import (
+    MAX_COMMAND_BYTES, SERVERDATA_AUTH, SERVERDATA_EXECCOMMAND, SERVERDATA_RESPONSE_VALUE,
+    PacketReader, ResponseCollector, encode_packet,
+)
+
+
+class ChunkedSocket:
+    """Hands out a byte stream ``chunk`` bytes per ``recv_into``, like a slow network."""
+
+    def __init__(self, stream: bytes, chunk: int):
+        self.stream = bytes(stream)
+        self.chunk = chunk
+        self.calls = 0
+
+    def recv_into(self, view):
+        self.calls += 1
+        data = self.stream[:min(self.chunk, len(view))]
+        self.stream = self.stream[len(data):]
+        view[:len(data)] = data
+        return len(data)
+
+
+def test_encode_packet():
+    assert encode_packet(7, SERVERDATA_AUTH, "pw") == (
+        b"\x0c\x00\x00\x00" b"\x07\x00\x00\x00" b"\x03\x00\x00\x00" b"pw" b"\x00\x00"
+    )
+
+
+def test_command_size_limit():
+    encode_packet(1, SERVERDATA_EXECCOMMAND, "x" * MAX_COMMAND_BYTES)
+    with pytest.raises(Exception, match="Command too long"):
+        encode_packet(1, SERVERDATA_EXECCOMMAND, "é" * (MAX_COMMAND_BYTES // 2 + 1))
+    # Responses are not requests; only the server limits them
+    encode_packet(1, SERVERDATA_RESPONSE_VALUE, "x" * 5000)
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 13, 1 << 16])
+def test_reader_reassembles_packets_split_across_reads(chunk):
+    payloads = ["", "hello", "ü" * 100, "x" * 4000]
+    stream = b"".join(encode_packet(i, SERVERDATA_RESPONSE_VALUE, p) for i, p in enumerate(payloads))
+    reader = PacketReader(ChunkedSocket(stream, chunk), buffer_size=64)
+    for i, payload in enumerate(payloads):
+        request_id, body, packet_type = reader.read_packet()
+        assert (request_id, bytes(body).decode("utf-8"), packet_type) == (i, payload, SERVERDATA_RESPONSE_VALUE)
+    assert reader.buffered == 0
+
+
+def test_reader_parses_packets_that_arrived_together_in_one_read():
+    stream = b"".join(encode_packet(i, SERVERDATA_RESPONSE_VALUE, "ok") for i in range(10))
+    sock = ChunkedSocket(stream, 1 << 16)
+    reader = PacketReader(sock)
+    assert [reader.read_packet()[0] for _ in range(10)] == list(range(10))
+    assert sock.calls == 1
+
+
+def test_reader_errors():
+    with pytest.raises(Exception, match="Connection closed by server"):
+        PacketReader(ChunkedSocket(encode_packet(1, 0, "cut")[:-3], 4)).read_packet()
+    with pytest.raises(Exception, match="Invalid RCON packet length 4"):
+        PacketReader(ChunkedSocket(b"\x04\x00\x00\x00" + bytes(8), 64)).read_packet()
+
+
+def test_collector_joins_fragments_until_the_sentinel():
+    collector = ResponseCollector()
+    collector.expect(1, 2, index=0)
+    collector.expect(3, 4, index=1)
+    assert collector.pending == 2
+    assert collector.feed(1, b"first ") is None
+    assert collector.feed(1, "ü".encode("utf-8")) is None
+    assert collector.feed(99, b"stray") is None
+    assert collector.feed(2, b"") == (0, "first ü")
+    assert collector.feed(3, b"") is None
+    assert collector.feed(4, b"") == (1, "")
+    assert collector.pending == 0
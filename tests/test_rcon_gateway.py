@@ -0,0 +1,143 @@
+import os
+import socket
+import tempfile
+import threading
+
+import pytest
+
+from src import rcon_client
+from src.rcon_gateway import GatewayClient, recv_frame, send_frame
+
+CFG = {"host": "127.0.0.1", "port": 25575, "password": "pw", "generation": 1}
+
+
+class StubGateway:
+    """A gateway socket whose reply to each request is chosen by the test."""
+
+    def __init__(self, reply, path=None):
+        self.path = path or os.path.join(tempfile.mkdtemp(), "gw.sock")
+        self.reply = reply
+        self.requests = []
+        self._connections = []
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        self._server.listen()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self._connections.append(conn)
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    message = recv_frame(conn)
+                except Exception:
+                    return
+                if message is None:
+                    return
+                self.requests.append(message)
+                reply = self.reply(message)
+                if reply is None:
+                    return   # drop the connection mid-request
+                send_frame(conn, reply)
+
+    def close(self):
+        self._server.close()
+        for conn in self._connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+@pytest.fixture
+def in_process(monkeypatch):
+    """Record batches that run in this process instead of the gateway."""
+    calls = []
+    monkeypatch.setattr(rcon_client, "get_rcon_config", lambda user_id=None: dict(CFG))
+    monkeypatch.setattr(rcon_client, "execute_batch",
+                        lambda cfg, commands, *args: calls.append(commands) or ["local"] * len(commands))
+    return calls
+
+
+def use_gateway(monkeypatch, path, timeout=5):
+    monkeypatch.setattr(rcon_client, "_gateway", GatewayClient(path, timeout=timeout))
+
+
+def test_runs_in_process_when_gateway_cannot_be_reached(monkeypatch, in_process):
+    use_gateway(monkeypatch, os.path.join(tempfile.mkdtemp(), "missing.sock"))
+    assert rcon_client.run_commands(["give Steve dirt"], 1) == ["local"]
+    assert in_process == [["give Steve dirt"]]
+
+
+def test_uses_gateway_reply(monkeypatch, in_process):
+    gateway = StubGateway(lambda message: {"ok": True, "results": ["Gave 1 [Dirt]"]})
+    use_gateway(monkeypatch, gateway.path)
+    try:
+        assert rcon_client.run_commands(["give Steve dirt"], 1) == ["Gave 1 [Dirt]"]
+    finally:
+        gateway.close()
+    assert in_process == []
+
+
+@pytest.mark.parametrize("reply", [
+    lambda message: None,                                   # connection dropped after the request
+    lambda message: {"ok": False, "error": "boom"},         # exception inside the gateway
+])
+def test_never_reruns_a_sent_batch(monkeypatch, in_process, reply):
+    gateway = StubGateway(reply)
+    use_gateway(monkeypatch, gateway.path)
+    try:
+        results = rcon_client.run_commands(["give Steve dirt", "list"], 1)
+    finally:
+        gateway.close()
+    assert len(gateway.requests) == 1
+    assert in_process == []
+    assert all(result.startswith("Error: RCON gateway failed") for result in results)
+    assert len(results) == 2
+
+
+def test_timeout_after_send_is_an_error(monkeypatch, in_process):
+    release = threading.Event()
+    gateway = StubGateway(lambda message: release.wait(5) and None)
+    use_gateway(monkeypatch, gateway.path, timeout=0.2)
+    try:
+        results = rcon_client.run_commands(["give Steve dirt"], 1)
+    finally:
+        release.set()
+        gateway.close()
+    assert len(gateway.requests) == 1
+    assert in_process == []
+    assert results[0].startswith("Error: RCON gateway failed")
+
+
+def test_reconnects_after_gateway_restart_without_losing_the_request(monkeypatch, in_process):
+    first = StubGateway(lambda message: {"ok": True, "results": ["one"]})
+    use_gateway(monkeypatch, first.path)
+    assert rcon_client.run_commands(["list"], 1) == ["one"]
+    # The worker's idle socket is now closed by the peer; it must reconnect, not fail
+    first.close()
+    second = StubGateway(lambda message: {"ok": True, "results": ["two"]}, path=first.path)
+    try:
+        assert rcon_client.run_commands(["list"], 1) == ["two"]
+    finally:
+        second.close()
+    assert in_process == []
+
+
+def test_read_only_requests_fall_back_after_a_failed_reply(monkeypatch):
+    gateway = StubGateway(lambda message: {"ok": False, "error": "boom"})
+    use_gateway(monkeypatch, gateway.path)
+    try:
+        assert isinstance(rcon_client.get_cache_stats(), dict)
+    finally:
+        gateway.close()
@@ -0,0 +1,93 @@
+"""Token buckets, the RCON rate limiter and where admission spends tokens."""
+import time
+
+import pytest
+
+from src import rcon_client
+from src.rcon_ratelimit import RateLimited, RateLimiter, TokenBucket, is_heavy
+from src.rcon_scheduler import PRIORITY_BACKGROUND, RconScheduler
+
+# The quick-command batch with the most heavy commands
+KILL_PASSIVE_MOBS = ["/kill @e[type=cow]", "/kill @e[type=sheep]", "/kill @e[type=pig]", "/kill @e[type=chicken]"]
+
+
+def test_bucket_starts_full_and_refills_at_its_rate():
+    bucket = TokenBucket(rate=2, burst=4)
+    now = bucket.updated
+    assert bucket.wait_for(4, now) == 0
+    bucket.take(4)
+    assert bucket.wait_for(1, now) == pytest.approx(0.5)
+    assert bucket.wait_for(1, now + 0.5) == 0
+    # Never holds more than its burst, however long it sat idle
+    assert bucket.wait_for(1, now + 3600) == 0 and bucket.tokens == 4
+
+
+def test_new_bucket_serves_a_full_burst_for_an_earlier_clock_reading():
+    now = time.monotonic()
+    assert TokenBucket(rate=1, burst=4).wait_for(4, now) == 0
+
+
+def test_bucket_reservations_queue_behind_each_other():
+    bucket = TokenBucket(rate=1, burst=1)
+    now = bucket.updated
+    bucket.take(1)
+    bucket.take(2)   # reserved by a waiting caller
+    assert bucket.tokens == -2
+    assert bucket.wait_for(1, now) == pytest.approx(3)
+
+
+def test_heavy_commands():
+    assert is_heavy("/fill 0 0 0 10 10 10 stone") and is_heavy("execute as @p run summon zombie")
+    assert is_heavy("kill @e[type=item]") and not is_heavy("kill Steve")
+    assert not is_heavy("give Steve stone")
+
+
+def test_every_built_in_batch_fits_the_default_burst():
+    limiter = RateLimiter()
+    assert limiter.reserve("srv", 1, KILL_PASSIVE_MOBS) == 0
+    assert rcon_client._rate_limiter.limits["heavy"][1] >= len(KILL_PASSIVE_MOBS)
+
+
+def test_batches_wait_for_tokens_up_to_max_wait():
+    limiter = RateLimiter(server_rate=10, server_burst=5, user_rate=0, heavy_rate=0, max_wait=1)
+    assert limiter.reserve("srv", 1, ["list"] * 5) == 0
+    assert limiter.reserve("srv", 1, ["list"] * 5) == pytest.approx(0.5, abs=0.01)
+    with pytest.raises(RateLimited):
+        limiter.reserve("srv", 1, ["list"] * 10)
+    # A rejected batch consumes nothing
+    assert limiter.reserve("srv", 1, ["list"]) == pytest.approx(0.6, abs=0.01)
+    assert limiter.stats() == {"admitted": 3, "delayed": 2, "rejected": 1, "avg_delay_ms": pytest.approx(550, abs=10)}
+
+
+def test_acquire_sleeps_for_its_reservation():
+    limiter = RateLimiter(server_rate=20, server_burst=1, user_rate=0, heavy_rate=0)
+    limiter.acquire("srv", 1, ["list"])
+    started = time.monotonic()
+    limiter.acquire("srv", 1, ["list"])
+    assert time.monotonic() - started >= 0.04
+
+
+def test_users_and_heavy_commands_have_their_own_buckets():
+    limiter = RateLimiter(server_rate=0, user_rate=1, user_burst=2, heavy_rate=1, heavy_burst=1, max_wait=0)
+    limiter.reserve("srv", 1, ["say a", "say b"])
+    with pytest.raises(RateLimited):
+        limiter.reserve("srv", 1, ["say c"])
+    limiter.reserve("srv", 2, ["say c"])
+    # The heavy budget is per server, whoever sends the command
+    limiter.reserve("srv", 2, ["summon pig"])
+    with pytest.raises(RateLimited):
+        limiter.reserve("srv", 3, ["locate structure village"])
+    limiter.reserve("other", 3, ["locate structure village"])
+
+
+def test_calls_the_scheduler_sheds_spend_no_tokens(monkeypatch):
+    scheduler = RconScheduler(per_server_limit=1)
+    limiter = RateLimiter()
+    monkeypatch.setattr(rcon_client, "_scheduler", scheduler)
+    monkeypatch.setattr(rcon_client, "_rate_limiter", limiter)
+    cfg = {"host": "127.0.0.1", "port": 1, "password": "pw"}
+    scheduler.acquire(None, ("127.0.0.1", 1))
+
+    error = rcon_client._admit(cfg, ["list"], [None], None, PRIORITY_BACKGROUND)
+    assert error.startswith("Error: Server busy")
+    assert limiter.stats()["admitted"] == 0
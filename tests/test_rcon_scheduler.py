@@ -0,0 +1,122 @@
+"""Fair, bounded admission of RCON calls across tenants and servers."""
+import threading
+import time
+
+import pytest
+
+from src.rcon_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, QueueTimeout, RconScheduler, RequestShed
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition never held"
+        time.sleep(0.001)
+
+
+def queue(scheduler, tenant, server, granted, **kwargs):
+    """Start a caller that records its tenant once granted, then releases."""
+    queued = sum(stats["queued"] for stats in scheduler.stats().values())
+
+    def run():
+        try:
+            scheduler.acquire(tenant, server, **kwargs)
+        except QueueTimeout as e:
+            granted.append((tenant, e))
+            return
+        granted.append(tenant)
+        scheduler.release(tenant, server)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    wait_until(lambda: sum(stats["queued"] for stats in scheduler.stats().values()) > queued)
+    return thread
+
+
+def test_waiting_tenants_take_turns():
+    scheduler = RconScheduler(global_limit=1, per_tenant_limit=4, per_server_limit=4)
+    scheduler.acquire("a", "srv-a")
+    granted = []
+    threads = [queue(scheduler, "a", "srv-a", granted) for _ in range(3)]
+    threads.append(queue(scheduler, "b", "srv-b", granted))
+
+    scheduler.release("a", "srv-a")
+    for thread in threads:
+        thread.join()
+    # First come, first served would make b wait behind all of a's calls
+    assert granted == ["a", "b", "a", "a"]
+    assert scheduler.stats("a")["a"]["granted"] == 4
+
+
+def test_tenant_bulkhead_leaves_room_for_others():
+    scheduler = RconScheduler(global_limit=8, per_tenant_limit=1, per_server_limit=8)
+    scheduler.acquire("a", "srv")
+    with pytest.raises(QueueTimeout):
+        scheduler.acquire("a", "srv", timeout=0.05)
+    scheduler.acquire("b", "srv", timeout=0)
+    assert {tenant: stats["running"] for tenant, stats in scheduler.stats().items()} == {"a": 1, "b": 1}
+
+
+def test_server_bulkhead_is_shared_by_tenants():
+    scheduler = RconScheduler(global_limit=8, per_tenant_limit=8, per_server_limit=2)
+    scheduler.acquire("a", "slow")
+    scheduler.acquire("b", "slow")
+    with pytest.raises(QueueTimeout):
+        scheduler.acquire("c", "slow", timeout=0.05)
+    scheduler.acquire("c", "fast", timeout=0)
+
+
+def test_expired_waiters_are_rejected_and_dequeued():
+    scheduler = RconScheduler(global_limit=1, queue_timeout=0.05)
+    scheduler.acquire("a", "srv")
+    started = time.monotonic()
+    with pytest.raises(QueueTimeout, match="expired in queue"):
+        scheduler.acquire("b", "srv")
+    assert time.monotonic() - started >= 0.05
+    assert scheduler.stats("b")["b"] == {
+        "queued": 0, "running": 0, "granted": 0, "rejected": 1, "shed": 0, "avg_wait_ms": 0.0, "max_wait_ms": 0.0,
+    }
+
+    # The expired waiter does not get the slot once it frees up
+    scheduler.release("a", "srv")
+    scheduler.acquire("c", "srv", timeout=0)
+
+
+def test_slot_is_released_on_error():
+    scheduler = RconScheduler(global_limit=1)
+    with pytest.raises(RuntimeError):
+        with scheduler.slot("a", "srv"):
+            raise RuntimeError("boom")
+    with scheduler.slot("b", "srv", timeout=0):
+        assert scheduler.stats("b")["b"]["running"] == 1
+
+
+def test_background_calls_are_shed_instead_of_queued():
+    scheduler = RconScheduler(global_limit=8, per_tenant_limit=8, per_server_limit=2)
+    scheduler.acquire("a", "srv", priority=PRIORITY_BACKGROUND)
+    # The server's last slot is kept for interactive calls
+    started = time.monotonic()
+    with pytest.raises(RequestShed):
+        scheduler.acquire("b", "srv", priority=PRIORITY_BACKGROUND)
+    assert time.monotonic() - started < 0.05
+    scheduler.acquire("b", "srv", priority=PRIORITY_INTERACTIVE, timeout=0)
+    assert scheduler.stats("b")["b"]["shed"] == 1
+
+
+def test_interactive_calls_queue_while_background_ones_are_shed():
+    scheduler = RconScheduler(global_limit=1, per_tenant_limit=4, per_server_limit=4)
+    scheduler.acquire("a", "srv-a")
+    granted = []
+    waiter = queue(scheduler, "c", "srv-c", granted, priority=PRIORITY_INTERACTIVE)
+    with pytest.raises(RequestShed):
+        scheduler.acquire("b", "srv-b", priority=PRIORITY_BACKGROUND)
+    scheduler.release("a", "srv-a")
+    waiter.join()
+    assert granted == ["c"]
+
+
+def test_single_slot_servers_still_serve_background_calls():
+    scheduler = RconScheduler(per_server_limit=1)
+    scheduler.acquire("a", "srv", priority=PRIORITY_BACKGROUND, timeout=0)
+    with pytest.raises(RequestShed):
+        scheduler.acquire("a", "srv", priority=PRIORITY_BACKGROUND)
@@ -0,0 +1,74 @@
+"""Coalescing of read-only RCON batches across callers and priorities."""
+import threading
+import time
+
+from src import rcon_client
+from src.rcon_fake import FakeRconServer
+from src.rcon_ratelimit import RateLimited
+from src.rcon_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from src.rcon_singleflight import SingleFlight, flight_key, is_read_only
+
+
+def test_only_read_only_batches_are_keyed():
+    assert is_read_only("/list") and is_read_only("data  get entity Steve Health")
+    assert not is_read_only("give Steve stone")
+    assert flight_key("srv", ["/list", "time query daytime"]) == ("srv", ("list", "time query daytime"))
+    assert flight_key("srv", ["list", "kill Steve"]) is None
+
+
+def join(flights, key, priority, results):
+    thread = threading.Thread(target=lambda: results.append(flights.do(key, lambda flight: "own run", priority)))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not flights.stats()["shared"] and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return thread
+
+
+def test_followers_of_any_priority_share_and_promote_the_flight():
+    flights = SingleFlight()
+    results, seen = [], []
+
+    def leader(flight):
+        seen.append(flight.priority)
+        follower = join(flights, "key", PRIORITY_INTERACTIVE, results)
+        seen.append(flight.priority)
+        return "shared", follower
+
+    result, follower = flights.do("key", leader, PRIORITY_BACKGROUND)
+    follower.join()
+    assert result == "shared" and results == [("shared", follower)]
+    assert seen == [PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE]
+    assert flights.stats() == {"executed": 1, "shared": 1, "in_flight": 0}
+
+
+def test_dropped_background_poll_is_admitted_again_for_a_user_who_joined(monkeypatch):
+    with FakeRconServer(password="pw", players={"Steve": {}}) as server:
+        host, port = server.address
+        cfg = {"host": host, "port": port, "password": "pw", "generation": 1}
+        acquire = rcon_client._rate_limiter.acquire
+        shared = rcon_client._flights.stats()["shared"]
+        waits, results = [], []
+
+        def click():
+            results.append(rcon_client.execute_batch(cfg, ["list"], None, PRIORITY_INTERACTIVE))
+
+        def acquire_under_load(server_key, user_id, commands, max_wait=None):
+            waits.append(max_wait)
+            if max_wait == 0:
+                # A user opens the page while the poll is being dropped
+                threading.Thread(target=click).start()
+                deadline = time.monotonic() + 5
+                while rcon_client._flights.stats()["shared"] == shared and time.monotonic() < deadline:
+                    time.sleep(0.001)
+                raise RateLimited("Server busy - rate limit exceeded, retry in 1.0s")
+            return acquire(server_key, user_id, commands, max_wait=max_wait)
+
+        monkeypatch.setattr(rcon_client._rate_limiter, "acquire", acquire_under_load)
+        poll = rcon_client.execute_batch(cfg, ["list"], None, PRIORITY_BACKGROUND)
+        deadline = time.monotonic() + 5
+        while not results and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert waits == [0, None]
+        assert poll == results[0] == ["There are 1 of a max of 20 players online: Steve"]
+        rcon_client._pool.invalidate((host, port, "pw"))
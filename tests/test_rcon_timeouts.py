@@ -0,0 +1,74 @@
+"""Adaptive RCON timeouts: RFC 6298 smoothing, clamping and slow commands."""
+import pytest
+
+from src.rcon_timeouts import COMMAND, CONNECT, AdaptiveTimeouts, command_family
+
+
+def timeouts(floor=0.0, ceiling=10.0, slow=60.0):
+    return AdaptiveTimeouts(floors={CONNECT: floor, COMMAND: floor},
+                            ceilings={CONNECT: ceiling, COMMAND: ceiling}, slow_command_timeout=slow)
+
+
+def test_unmeasured_servers_get_the_ceiling():
+    estimates = timeouts(ceiling=7)
+    assert estimates.connect_timeout("srv") == 7
+    assert estimates.command_timeout("srv", ["list"]) == 7
+
+
+def test_first_sample_sets_srtt_and_half_of_it_as_variance():
+    estimates = timeouts()
+    estimates.record("srv", COMMAND, 0.2)
+    # srtt + 4 * rttvar = 0.2 + 4 * 0.1
+    assert estimates.command_timeout("srv") == pytest.approx(0.6)
+    assert estimates.connect_timeout("srv") == 10   # kinds are tracked apart
+
+
+def test_later_samples_follow_rfc_6298():
+    estimates = timeouts()
+    estimates.record("srv", COMMAND, 0.2)
+    estimates.record("srv", COMMAND, 0.4)
+    # rttvar = 3/4 * 0.1 + 1/4 * |0.2 - 0.4|, then srtt = 7/8 * 0.2 + 1/8 * 0.4
+    rttvar = 0.75 * 0.1 + 0.25 * 0.2
+    srtt = 0.875 * 0.2 + 0.125 * 0.4
+    assert estimates.command_timeout("srv") == pytest.approx(srtt + 4 * rttvar)
+    snapshot = estimates.snapshot("srv")[COMMAND]
+    assert snapshot["samples"] == 2
+    assert snapshot["srtt_ms"] == pytest.approx(1000 * srtt, abs=0.01)
+    assert snapshot["rttvar_ms"] == pytest.approx(1000 * rttvar, abs=0.01)
+
+
+def test_steady_rtts_converge_to_the_floor():
+    estimates = timeouts(floor=0.5)
+    for _ in range(100):
+        estimates.record("srv", CONNECT, 0.002)
+    assert estimates.connect_timeout("srv") == 0.5
+    estimates.record("slow", CONNECT, 30)
+    assert estimates.connect_timeout("slow") == 10
+
+
+def test_slow_command_families_get_their_minimum():
+    estimates = timeouts()
+    estimates.record("srv", COMMAND, 0.01)
+    assert estimates.is_slow(["list", "execute as @p run locate structure village"])
+    assert estimates.command_timeout("srv", ["list", "locate structure village"]) == 60
+    assert estimates.command_timeout("srv", ["list"]) == pytest.approx(0.03)
+
+
+def test_a_timeout_forgets_the_estimates():
+    estimates = timeouts()
+    estimates.record("srv", CONNECT, 0.01)
+    estimates.record("srv", COMMAND, 0.01)
+    estimates.record_timeout("srv")
+    assert estimates.connect_timeout("srv") == estimates.command_timeout("srv") == 10
+    assert estimates.snapshot("srv")[COMMAND]["samples"] == 0
+
+
+@pytest.mark.parametrize("command, family", [
+    ("/list", "list"),
+    ("execute as @a at @s run tp ~ ~1 ~", "tp"),
+    ("execute if entity @p run execute as @p run locate biome plains", "locate"),
+    ("execute as @a", "execute"),
+    ("", ""),
+])
+def test_command_family_looks_through_execute(command, family):
+    assert command_family(command) == family
@@ -0,0 +1,147 @@
+"""Server List Ping: the handshake, reply parsing and the status cache."""
+import io
+import json
+import socket
+import struct
+import threading
+
+import pytest
+
+from src import server_status
+from src.server_status import _Reader, _varint, get_server_status, ping_server, players_from_status
+
+
+class FakeStatusServer:
+    """Answers one Server List Ping per connection with ``status``.
+
+    With ``pong=False`` it closes after the status reply, like old servers.
+    """
+
+    def __init__(self, status, pong=True):
+        self.status = status
+        self.pong = pong
+        self.connections = 0
+        self.handshakes = []
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.address = self.sock.getsockname()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            with conn:
+                self.connections += 1
+                reader = _Reader(conn)
+                handshake = reader.exact(reader.packet_length())
+                self.handshakes.append(handshake)
+                reader.exact(reader.packet_length())   # status request
+                body = json.dumps(self.status).encode("utf-8")
+                payload = _varint(0) + _varint(len(body)) + body
+                conn.sendall(_varint(len(payload)) + payload)
+                if not self.pong:
+                    continue
+                ping = reader.exact(reader.packet_length())
+                conn.sendall(_varint(len(ping)) + ping)
+
+
+class _BytesSocket:
+    """Just enough of a socket for ``_Reader`` to parse bytes already sent."""
+
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    def recv(self, size):
+        return self.stream.read(size)
+
+
+STATUS = {
+    "version": {"name": "1.21.1", "protocol": 767},
+    "players": {"online": 3, "max": 20, "sample": [
+        {"name": "Steve", "id": "00000000-0000-0000-0000-000000000001"},
+        {"name": "Alex", "id": "00000000-0000-0000-0000-000000000002"},
+        {"name": "Anonymous Player", "id": "00000000-0000-0000-0000-000000000000"},
+    ]},
+    "description": {"text": "A ", "extra": [{"text": "Mineboard", "bold": True}, " server"]},
+}
+
+
+@pytest.fixture
+def status_server():
+    server = FakeStatusServer(STATUS)
+    yield server
+    server.close()
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(server_status, "_cache", {})
+
+
+def test_ping_parses_the_status_reply(status_server):
+    host, port = status_server.address
+    status = ping_server(host, port, timeout=2)
+    assert status["online"] and status["version"] == "1.21.1" and status["protocol"] == 767
+    assert status["motd"] == "A Mineboard server"
+    assert (status["players_online"], status["players_max"]) == (3, 20)
+    # Hidden players are reported under the all-zero UUID and left out
+    assert status["sample"] == ["Steve", "Alex"]
+    assert status["latency_ms"] >= 0
+
+    # Handshake: protocol -1, server address, port, next state 1 (status)
+    reader = _Reader(_BytesSocket(status_server.handshakes[0]))
+    assert reader.varint() == 0 and reader.varint() == -1
+    assert reader.exact(reader.varint()) == host.encode()
+    assert struct.unpack(">H", reader.exact(2))[0] == port and reader.varint() == 1
+
+
+def test_servers_that_close_before_the_pong_still_report():
+    server = FakeStatusServer({"version": {"name": "1.8"}, "players": {"online": 0, "max": 10},
+                               "description": "Old server"}, pong=False)
+    try:
+        status = ping_server(*server.address, timeout=2)
+    finally:
+        server.close()
+    assert status["motd"] == "Old server" and status["sample"] == [] and status["latency_ms"] >= 0
+
+
+def test_status_is_cached_for_the_configured_ttl(status_server, monkeypatch):
+    host, port = status_server.address
+    monkeypatch.setattr(server_status, "STATUS_CACHE_TTL", 60)
+    assert get_server_status(host, port)["online"]
+    assert get_server_status(host, port)["online"]
+    assert status_server.connections == 1
+
+    monkeypatch.setattr(server_status, "STATUS_CACHE_TTL", 0)
+    server_status._cache.clear()
+    get_server_status(host, port)
+    get_server_status(host, port)
+    assert status_server.connections == 3
+
+
+def test_unreachable_servers_are_offline():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    status = get_server_status("127.0.0.1", port, timeout=1)
+    assert status["online"] is False and status["error"]
+    assert players_from_status(status) is None
+
+
+def test_players_only_come_from_a_complete_sample():
+    assert players_from_status({"online": True, "players_online": 2, "sample": ["Steve", "Alex"]}) == ["Steve", "Alex"]
+    assert players_from_status({"online": True, "players_online": 30, "sample": ["Steve"]}) is None
+    assert players_from_status({"online": True, "players_online": 0, "sample": []}) == []
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 25565, 2 ** 31 - 1, -1, -(2 ** 31)])
+def test_varints_round_trip(value):
+    assert _Reader(_BytesSocket(_varint(value))).varint() == value
@@ -0,0 +1,75 @@
+"""SNBT parsing: scalars and their suffixes, strings, keys and typed arrays."""
+import pytest
+
+from src.snbt import SnbtError, parse, parse_entity_data
+
+
+@pytest.mark.parametrize("text, value", [
+    ("3b", 3), ("3B", 3), ("-7s", -7), ("7S", 7), ("42", 42), ("-42", -42),
+    ("9000000000l", 9000000000), ("5L", 5), ("007", 7),
+    ("1.5f", 1.5), ("2F", 2.0), ("0.25d", 0.25), ("3D", 3.0), ("1.5", 1.5), ("1e3", 1000.0), (".5d", 0.5),
+    ("true", 1), ("false", 0),
+])
+def test_numbers_and_booleans(text, value):
+    result = parse(text)
+    assert result == value and type(result) is type(value)
+
+
+@pytest.mark.parametrize("text", ["1.0E400d", "-1e999", "1e400f"])
+def test_floats_beyond_the_double_range_are_none(text):
+    assert parse(text) is None
+    assert parse(f"{{a: {text}, b: 1}}") == {"a": None, "b": 1}
+
+
+def test_fractional_byte_is_a_string():
+    assert parse("{a: 1.5b, b: 2.0s, c: 1e3L}") == {"a": "1.5b", "b": "2.0s", "c": "1e3L"}
+
+
+def test_bare_words_are_strings():
+    assert parse("[stone, minecraft.air, a_b-c+d]") == ["stone", "minecraft.air", "a_b-c+d"]
+
+
+def test_keys():
+    assert parse('{plain: 1, "minecraft:custom_name": 2, \'single key\': 3, "": 4, 0: 5}') == {
+        "plain": 1, "minecraft:custom_name": 2, "single key": 3, "": 4, "0": 5,
+    }
+
+
+def test_string_escapes():
+    assert parse(r'"say \"hi\" \\o/"') == r'say "hi" \o/'
+    assert parse(r"'it\'s \"quoted\" \\'") == "it's \"quoted\" \\"
+    assert parse(r'"don\'t"') == "don't"
+    # JSON text inside an SNBT string, as item names are stored
+    assert parse("""'{"text":"Blade"}'""") == '{"text":"Blade"}'
+    assert parse('"a: 1b, [x]"') == "a: 1b, [x]"
+
+
+@pytest.mark.parametrize("text, value", [
+    ("[I; 1, -2, 3]", [1, -2, 3]),
+    ("[B;1b,2b]", [1, 2]),
+    ("[L; 9000000000L, 1l]", [9000000000, 1]),
+    ("[ I ; ]", []),
+    ("{UUID: [I; -1, 2, 3, 4]}", {"UUID": [-1, 2, 3, 4]}),
+])
+def test_typed_arrays(text, value):
+    assert parse(text) == value
+
+
+def test_nested_structure():
+    assert parse("{Inventory: [{Slot: 0b, id: 'minecraft:stone', count: 3}], Pos: [0.5d, 64.0d, -0.5d], Tags: []}") == {
+        "Inventory": [{"Slot": 0, "id": "minecraft:stone", "count": 3}],
+        "Pos": [0.5, 64.0, -0.5],
+        "Tags": [],
+    }
+
+
+@pytest.mark.parametrize("text", ["{a: 1", "{a 1}", "[1, 2", "", "{a: 1} x"])
+def test_malformed_input(text):
+    with pytest.raises(SnbtError):
+        parse(text)
+
+
+def test_parse_entity_data():
+    assert parse_entity_data("Steve has the following entity data: {Health: 20.0f}") == {"Health": 20.0}
+    assert parse_entity_data("Steve has the following entity data: 1.0E400d") is None
+    assert parse_entity_data("No entity was found") is None
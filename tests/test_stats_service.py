@@ -0,0 +1,135 @@
+"""Stats files: parsing, incremental loading, renames and the background job."""
+import json
+import os
+import time
+
+import pytest
+
+from src.database import get_db
+from src.services import stats_service
+from src.services.stats_service import compare_players, get_leaderboard, ingest_stats, parse_stats
+
+STEVE = "00000000-0000-0000-0000-000000000001"
+ALEX = "00000000-0000-0000-0000-000000000002"
+
+
+@pytest.fixture
+def job(app_db):
+    """Stops the background job at the end of the test, before the database goes away."""
+    yield
+    with stats_service._watch_lock:
+        stats_service._watched.clear()
+    stats_service._wake.set()
+    if stats_service._thread is not None:
+        stats_service._thread.join(timeout=10)
+
+
+@pytest.fixture
+def world(job, tmp_path, monkeypatch):
+    """A tenant world with a stats directory; ``names`` stands in for usercache.json."""
+    world_dir = tmp_path / "world"
+    (world_dir / "stats").mkdir(parents=True)
+    names = {STEVE: "Steve", ALEX: "Alex"}
+    monkeypatch.setattr(stats_service, "get_world_dir", lambda user_id: str(world_dir))
+    monkeypatch.setattr(stats_service, "get_player_names", lambda user_id: dict(names))
+    return world_dir, names
+
+
+def write_stats(world_dir, uuid, custom=None, mined=None, mtime_ns=None):
+    path = world_dir / "stats" / f"{uuid}.json"
+    stats = {"minecraft:custom": custom or {}, "minecraft:mined": mined or {}}
+    path.write_text(json.dumps({"stats": stats, "DataVersion": 3953}))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def stored(uuid):
+    rows = get_db().execute("SELECT category, stat, value FROM player_stats WHERE uuid = ?", (uuid,)).fetchall()
+    return {f"{row['category']}:{row['stat']}": row["value"] for row in rows}
+
+
+def test_parse_stats_adds_totals():
+    values = parse_stats({"stats": {
+        "minecraft:custom": {"minecraft:walk_one_cm": 300, "minecraft:fly_one_cm": 50, "minecraft:jump": 4},
+        "minecraft:mined": {"minecraft:stone": 10, "minecraft:dirt": 5},
+        "minecraft:broken": "corrupt",
+    }})
+    assert values[("custom", "jump")] == 4
+    assert values[("total", "mined")] == 15
+    assert values[("total", "distance_cm")] == 350
+    assert ("total", "custom") not in values
+
+
+def test_only_changed_files_and_stats_are_loaded(world):
+    world_dir, _ = world
+    write_stats(world_dir, STEVE, {"minecraft:jump": 4}, mtime_ns=1)
+    write_stats(world_dir, ALEX, {"minecraft:jump": 9}, mtime_ns=1)
+    assert ingest_stats(1) == {"scanned": 2, "loaded": 2, "removed": 0, "renamed": 0}
+    assert ingest_stats(1)["loaded"] == 0
+
+    db = get_db()
+    changes = db.total_changes
+    write_stats(world_dir, STEVE, {"minecraft:jump": 4}, {"minecraft:stone": 2}, mtime_ns=2)
+    assert ingest_stats(1)["loaded"] == 1
+    assert stored(STEVE) == {"custom:jump": 4, "mined:stone": 2, "total:mined": 2, "total:distance_cm": 0}
+    # The file row, the new stat and the new total; unchanged stats are not rewritten
+    assert db.total_changes - changes == 3
+
+
+def test_names_follow_the_usercache_without_stats_changes(world):
+    world_dir, names = world
+    write_stats(world_dir, STEVE, {"minecraft:jump": 4})
+    ingest_stats(1)
+    # Read the table directly: a leaderboard request would start the job, which may apply the rename first
+    assert get_db().execute("SELECT name FROM stats_files WHERE uuid = ?", (STEVE,)).fetchone()["name"] == "Steve"
+
+    names[STEVE] = "Steve2"
+    assert ingest_stats(1) == {"scanned": 1, "loaded": 0, "removed": 0, "renamed": 1}
+    board = get_leaderboard(1, "custom:jump", player="steve2")
+    assert board["entries"][0]["player"] == "Steve2"
+    assert board["player"]["rank"] == 1
+
+
+def test_removed_files_take_their_stats_with_them(world):
+    world_dir, _ = world
+    write_stats(world_dir, STEVE, {"minecraft:jump": 4})
+    write_stats(world_dir, ALEX, {"minecraft:jump": 9})
+    ingest_stats(1)
+    os.remove(world_dir / "stats" / f"{ALEX}.json")
+    assert ingest_stats(1)["removed"] == 1
+    assert stored(ALEX) == {}
+    assert stored(STEVE)
+
+
+def test_requests_read_the_tables_and_the_job_loads_them(world, monkeypatch):
+    world_dir, _ = world
+    write_stats(world_dir, STEVE, {"minecraft:jump": 4}, {"minecraft:stone": 1})
+    write_stats(world_dir, ALEX, {"minecraft:jump": 9})
+    monkeypatch.setattr(stats_service, "STATS_INGEST_INTERVAL", 0.05)
+    monkeypatch.setattr(stats_service, "STATS_INGEST_IDLE", 0.5)
+
+    board = get_leaderboard(1, "custom:jump")
+    assert board["available"]
+    deadline = time.monotonic() + 10
+    while not board["entries"] and time.monotonic() < deadline:
+        time.sleep(0.02)
+        board = get_leaderboard(1, "custom:jump")
+    assert [(e["player"], e["value"]) for e in board["entries"]] == [("Alex", 9), ("Steve", 4)]
+
+    comparison = compare_players(1, ["Steve", "Alex", "Herobrine"], "mined")
+    assert comparison["players"] == ["Steve", "Alex"]
+    assert comparison["missing"] == ["Herobrine"]
+    assert comparison["stats"] == {"mined:stone": {"Steve": 1}}
+
+    # Nobody asks any more: the job stops
+    thread = stats_service._thread
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+
+def test_no_local_world(job, monkeypatch):
+    monkeypatch.setattr(stats_service, "get_world_dir", lambda user_id: None)
+    assert ingest_stats(1) is None
+    assert not get_leaderboard(1, "custom:jump")["available"]
+    assert stats_service._thread is None or not stats_service._thread.is_alive()
+
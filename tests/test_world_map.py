@@ -0,0 +1,160 @@
+"""Map tiles: chunk surfaces, tile versions, background rendering and the caches."""
+import os
+import time
+
+import pytest
+
+from src import world_map
+from src.nbt import TAG_BYTE, TAG_LONG_ARRAY, read_nbt
+from src.world_map import (
+    EMPTY_TILE, TILE_SIZE, TileRenderer, _decode_own_png, block_color, encode_png, png_version, render_chunk,
+)
+from tests.nbt_writer import Tag, dumps, pack_longs, write_region
+
+GRASS = (109, 153, 48)
+SAND = (219, 207, 163)
+
+
+def chunk(top="minecraft:grass_block", height=8, status="minecraft:full"):
+    """A 1.18+ chunk whose surface is ``top`` at y = 64 + ``height``, stone below."""
+    palette = [{"Name": "minecraft:air"}, {"Name": "minecraft:stone"}, {"Name": top}]
+    states = [1 if y < height else 2 if y == height else 0 for y in range(16) for _ in range(256)]
+    surface = [64 + height + 1 + 64] * 256   # heights count from min_y = -64
+    return {
+        "Status": status,
+        "yPos": Tag(TAG_BYTE, -4),
+        "sections": [{"Y": Tag(TAG_BYTE, 4), "block_states": {"palette": palette, "data": Tag(TAG_LONG_ARRAY, pack_longs(states, 4))}}],
+        "Heightmaps": {"WORLD_SURFACE": Tag(TAG_LONG_ARRAY, pack_longs(surface, 9))},
+    }
+
+
+def pixel(png, x, z):
+    pixels = _decode_own_png(png)
+    offset = (z * TILE_SIZE + x) * 4
+    return tuple(pixels[offset:offset + 4])
+
+
+@pytest.fixture
+def world(tmp_path):
+    region_dir = tmp_path / "region"
+    region_dir.mkdir()
+    return region_dir, str(tmp_path / "tiles")
+
+
+def test_render_chunk_surface():
+    colors, heights = render_chunk(read_nbt(dumps(chunk(height=5))))
+    assert colors[0] == GRASS and heights[0] == 69
+    assert len(colors) == len(heights) == 256
+    assert render_chunk(read_nbt(dumps(chunk(status="minecraft:features")))) is None
+
+
+def test_block_color_fallbacks():
+    assert block_color("minecraft:sand") == SAND
+    assert block_color("minecraft:birch_planks") == (162, 130, 78)
+    assert block_color("mod:unknown_thing") == (140, 140, 140)
+
+
+def test_png_version_roundtrip():
+    rgba = bytes(range(256)) * (TILE_SIZE * TILE_SIZE * 4 // 256)
+    png = encode_png(TILE_SIZE, TILE_SIZE, rgba, b"\x01" * 16)
+    assert png_version(png) == b"\x01" * 16
+    assert _decode_own_png(png) == rgba
+    assert png_version(encode_png(TILE_SIZE, TILE_SIZE, rgba)) is None
+
+
+def test_render_base_tile(world):
+    region_dir, cache_dir = world
+    write_region(str(region_dir / "r.0.0.mca"), {(0, 0): chunk(), (1, 0): chunk("minecraft:sand")})
+    renderer = TileRenderer(str(region_dir), cache_dir)
+    png = renderer.render(0, 0, 0)
+    assert pixel(png, 0, 0)[:3] == tuple(c * 220 // 255 for c in GRASS)   # flat: shaded evenly
+    assert pixel(png, 16, 0)[:3] == tuple(c * 220 // 255 for c in SAND)
+    assert pixel(png, 40, 40)[3] == 0   # no chunk there
+    # The other three quarters of the region are empty
+    assert renderer.render(0, 1, 1) is EMPTY_TILE
+    assert renderer.tile(0, 1, 1) == (EMPTY_TILE, True)
+    assert renderer.tile(2, 5, 5) == (EMPTY_TILE, True)
+
+
+def test_zoomed_out_tile_downsamples_children(world):
+    region_dir, cache_dir = world
+    write_region(str(region_dir / "r.0.0.mca"), {(0, 0): chunk()})
+    renderer = TileRenderer(str(region_dir), cache_dir)
+    png = renderer.render(1, 0, 0)
+    assert pixel(png, 0, 0)[3] == 255 and pixel(png, 7, 7)[3] == 255
+    assert pixel(png, 8, 0)[3] == 0
+    assert os.path.exists(os.path.join(cache_dir, "1", "0_0.png"))
+
+
+def wait_until_current(renderer, level, x, z, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        png, current = renderer.tile(level, x, z)
+        if current:
+            return png
+        time.sleep(0.02)
+    raise AssertionError("tile was not rendered in time")
+
+
+def test_stale_tiles_render_in_the_background(world):
+    region_dir, cache_dir = world
+    write_region(str(region_dir / "r.0.0.mca"), {(0, 0): chunk()})
+    renderer = TileRenderer(str(region_dir), cache_dir)
+    png, current = renderer.tile(3, 0, 0)
+    assert png is EMPTY_TILE and not current
+    png = wait_until_current(renderer, 3, 0, 0)
+    assert pixel(png, 0, 0)[3] == 255
+
+    # Changed chunks: the previous render is served until the new one is ready
+    write_region(str(region_dir / "r.0.0.mca"), {(0, 0): chunk("minecraft:sand")}, timestamp=2)
+    os.utime(region_dir / "r.0.0.mca", ns=(1, 1))
+    stale, current = renderer.tile(3, 0, 0)
+    if not current:
+        assert stale == png
+    assert wait_until_current(renderer, 3, 0, 0) != png
+
+
+def test_tiles_are_read_back_from_disk(world, monkeypatch):
+    region_dir, cache_dir = world
+    write_region(str(region_dir / "r.0.0.mca"), {(0, 0): chunk()})
+    rendered = {level: TileRenderer(str(region_dir), cache_dir).render(level, 0, 0) for level in range(3)}
+
+    def no_rendering(*args):
+        raise AssertionError("tile rendered again")
+
+    monkeypatch.setattr(TileRenderer, "_render_base", no_rendering)
+    monkeypatch.setattr(TileRenderer, "_downsample", no_rendering)
+    fresh = TileRenderer(str(region_dir), cache_dir)
+    for level, png in rendered.items():
+        assert fresh.tile(level, 0, 0) == (png, True)
+
+
+def test_only_changed_chunks_are_redrawn(world, monkeypatch):
+    region_dir, cache_dir = world
+    chunks = {(x, z): chunk() for x in range(4) for z in range(4)}
+    write_region(str(region_dir / "r.0.0.mca"), chunks)
+    TileRenderer(str(region_dir), cache_dir).render(0, 0, 0)
+
+    drawn = []
+    monkeypatch.setattr(world_map, "render_chunk", lambda document: drawn.append(document) or render_chunk(document))
+    chunks[(2, 3)] = chunk("minecraft:sand")
+    write_region(str(region_dir / "r.0.0.mca"), chunks)
+    # Only the changed chunk gets a new timestamp
+    with open(region_dir / "r.0.0.mca", "r+b") as f:
+        f.seek(4096 + 4 * (3 * 32 + 2))
+        f.write((5).to_bytes(4, "big"))
+    png = TileRenderer(str(region_dir), cache_dir).render(0, 0, 0)
+    assert len(drawn) == 1
+    assert pixel(png, 2 * 16, 3 * 16)[:3] == tuple(c * 220 // 255 for c in SAND)
+    assert pixel(png, 0, 0)[:3] == tuple(c * 220 // 255 for c in GRASS)
+
+
+def test_memory_cache_is_bounded(world):
+    region_dir, cache_dir = world
+    write_region(str(region_dir / "r.0.0.mca"), {(0, 0): chunk(), (16, 16): chunk()})
+    renderer = TileRenderer(str(region_dir), cache_dir, max_tiles=2)
+    for level in range(4):
+        renderer.render(level, 0, 0)
+    renderer.render(0, 1, 1)
+    assert len(renderer._tiles) == 2
+    assert (0, 1, 1) in renderer._tiles